@@ -0,0 +1 @@
+"""Benchmarks of the etl jobs on synthetic inputs of configurable size."""
@@ -0,0 +1,325 @@
+"""Benchmark cases. Each case writes synthetic inputs of a given size to a
+directory once, then returns a factory of the etl job that reads them and
+writes to an output directory. Only constructing and running the job is
+timed."""
+
+import csv
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict
+from xml.dom import minidom
+
+from benchmarks import generators
+
+_SESSION_TIMES = {
+    "session_start_time": "2023-10-10T14:00:00Z",
+    "session_end_time": "2023-10-10T17:00:00Z",
+}
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    """A benchmark of one etl job."""
+
+    name: str
+    size_description: str
+    default_size: int
+    setup: Callable[[Path, Path, int], Callable[[], Any]]
+
+
+def _setup_bergamo(
+    directory: Path, output_directory: Path, size: int
+) -> Callable[[], Any]:
+    """BergamoEtl on a ScanImage header with size rois and size photostim
+    groups, at least 2 since BergamoEtl reads 2. Writing a ScanImage tiff
+    needs ScanImage itself, so the header is read from text files instead
+    of the tiff. The job is run once to check that it builds a session
+    rather than timing an error."""
+    from aind_metadata_mapper.bergamo.session import (
+        BergamoEtl,
+        JobSettings,
+        RawImageInfo,
+    )
+
+    metadata_path, description_path = generators.write_scanimage_header(
+        directory, n_rois=size, n_photostim_groups=max(size, 2)
+    )
+
+    class SyntheticBergamoEtl(BergamoEtl):
+        """Reads the header from the synthetic text files."""
+
+        def _extract(self) -> RawImageInfo:
+            """Read the synthetic header."""
+            return RawImageInfo(
+                metadata=metadata_path.read_text(),
+                description0=description_path.read_text(),
+                shape=[100, 528 * size, 512],
+            )
+
+    job_settings = JobSettings(
+        input_source=directory,
+        output_directory=output_directory,
+        mouse_platform_name="disc",
+        active_mouse_platform=True,
+        experimenter_full_name=["John Smith"],
+        subject_id="12345",
+        stream_start_time="2023-10-10T15:00:00Z",
+        stream_end_time="2023-10-10T16:00:00Z",
+        stimulus_start_time="2023-10-10T15:15:00Z",
+        stimulus_end_time="2023-10-10T15:45:00Z",
+        photo_stim_groups=[
+            {"group_index": i, "number_trials": 5} for i in range(max(size, 2))
+        ],
+        **_SESSION_TIMES,
+    )
+    job_response = SyntheticBergamoEtl(job_settings).run_job()
+    if job_response.status_code not in (200, 406):
+        raise RuntimeError(
+            f"Bergamo benchmark job failed: {job_response.message}"
+        )
+    return lambda: SyntheticBergamoEtl(job_settings)
+
+
+def _setup_ephys(
+    directory: Path, output_directory: Path, size: int
+) -> Callable[[], Any]:
+    """EphysEtl on two streams, each with a newscale stage log of size
+    rows split over two probes."""
+    from aind_metadata_mapper.ephys.session import EphysEtl
+
+    probes = ["46121", "46118"]
+    stage_log_paths = [
+        generators.write_stage_log(
+            directory / f"newscale_{stream}.csv", size, probes
+        )
+        for stream in range(2)
+    ]
+    settings_path = generators.write_open_ephys_settings(
+        directory / "settings.xml", ["ProbeA", "ProbeB"]
+    )
+    ephys_module = {
+        "arc_angle": 5.3,
+        "module_angle": -27.1,
+        "angle_unit": "degrees",
+        "primary_targeted_structure": "VISp",
+    }
+    experiment_data = {
+        "experimenter_full_name": ["Al Dente"],
+        "subject_id": "699889",
+        "session_type": "Receptive field mapping",
+        "iacuc_protocol": "2109",
+        "rig_id": "323_EPHYS2-RF_2024-01-18_01",
+        "animal_weight_prior": None,
+        "calibrations": [],
+        "maintenance": [],
+        "camera_names": [],
+        "stick_microscopes": [
+            {
+                "assembly_name": "20516338",
+                "arc_angle": -180.0,
+                "module_angle": -180.0,
+                "angle_unit": "degrees",
+            }
+        ],
+        "daqs": "Basestation",
+        "data_streams": [
+            {
+                **{f"ephys_module_{probe}": ephys_module for probe in probes},
+                "mouse_platform_name": "Running Wheel",
+                "active_mouse_platform": False,
+            }
+            for _ in stage_log_paths
+        ],
+    }
+
+    def make_job() -> EphysEtl:
+        """Parse the logs as a caller of EphysEtl does."""
+        stage_logs = []
+        for stage_log_path in stage_log_paths:
+            with open(stage_log_path, "r") as f:
+                stage_logs.append(list(csv.reader(f)))
+        with open(settings_path, "r") as f:
+            openephys_log = minidom.parse(f)
+        return EphysEtl(
+            output_directory=output_directory,
+            stage_logs=stage_logs,
+            openephys_logs=[openephys_log] * len(stage_logs),
+            experiment_data=json.loads(json.dumps(experiment_data)),
+        )
+
+    return make_job
+
+
+def _setup_fib(
+    directory: Path, output_directory: Path, size: int
+) -> Callable[[], Any]:
+    """FIBEtl on a teensy log with size trials."""
+    from aind_metadata_mapper.fib.session import FIBEtl, JobSettings
+
+    job_settings = JobSettings(
+        output_directory=output_directory,
+        string_to_parse=generators.make_teensy_log(size),
+        experimenter_full_name=["Don Key"],
+        session_start_time=_SESSION_TIMES["session_start_time"],
+        notes="",
+        labtracks_id="000000",
+        iacuc_protocol="2115",
+        light_source_list=[
+            {
+                "name": "470nm LED",
+                "excitation_power": 0.020,
+                "excitation_power_unit": "milliwatt",
+            }
+        ],
+        detector_list=[
+            {
+                "name": "Hamamatsu Camera",
+                "exposure_time": 10,
+                "trigger_type": "Internal",
+            }
+        ],
+        fiber_connections_list=[
+            {
+                "patch_cord_name": "Patch Cord A",
+                "patch_cord_output_power": 40,
+                "output_power_unit": "microwatt",
+                "fiber_name": "Fiber A",
+            }
+        ],
+    )
+    return lambda: FIBEtl(job_settings)
+
+
+def _setup_gather_metadata(
+    directory: Path, output_directory: Path, size: int
+) -> Callable[[], Any]:
+    """GatherMetadataJob on a processing json with size data processes,
+    which it parses into the main metadata."""
+    from aind_metadata_mapper.gather_metadata import (
+        GatherMetadataJob,
+        JobSettings,
+        MetadataSettings,
+    )
+
+    processing_path = generators.write_processing(
+        directory / "processing.json", size
+    )
+    job_settings = JobSettings(
+        directory_to_write_to=output_directory,
+        metadata_settings=MetadataSettings(
+            name="ecephys_632269_2023-10-10_10-10-10",
+            location="s3://some-bucket/ecephys_632269_2023-10-10_10-10-10",
+            processing_filepath=processing_path,
+        ),
+    )
+    return lambda: GatherMetadataJob(job_settings)
+
+
+def _setup_mesoscope(
+    directory: Path, output_directory: Path, size: int
+) -> Callable[[], Any]:
+    """MesoscopeEtl on a platform json with size imaging planes. The
+    ScanImage metadata of the timeseries tiff is substituted, since writing
+    one needs ScanImage itself."""
+    from aind_metadata_mapper.mesoscope.session import (
+        JobSettings,
+        MesoscopeEtl,
+    )
+
+    generators.write_mesoscope_inputs(directory, size)
+
+    class SyntheticMesoscopeEtl(MesoscopeEtl):
+        """Substitutes the ScanImage metadata of the timeseries tiff."""
+
+        def _read_metadata(self, tiff_path: Path) -> list:
+            """Metadata of a 512x512 timeseries."""
+            return [
+                {
+                    "SI.hRoiManager.scanZoomFactor": 1.0,
+                    "SI.hRoiManager.pixelsPerLine": 512,
+                    "SI.hRoiManager.linesPerFrame": 512,
+                }
+            ]
+
+    job_settings = JobSettings(
+        input_source=directory,
+        behavior_source=directory,
+        output_directory=output_directory,
+        subject_id="12345",
+        project="some_project",
+        experimenter_full_name=["John Doe"],
+        **_SESSION_TIMES,
+    )
+    return lambda: SyntheticMesoscopeEtl(job_settings)
+
+
+def _setup_mvr_rig(
+    directory: Path, output_directory: Path, size: int
+) -> Callable[[], Any]:
+    """MvrRigEtl on a rig and an MVR config with size cameras."""
+    from aind_metadata_mapper.neuropixels.mvr_rig import MvrRigEtl
+
+    rig_path = generators.write_rig(directory / "rig.json", 1, size)
+    mvr_config_path = generators.write_mvr_config(directory / "mvr.ini", size)
+    mvr_mapping = {f"Camera {i}": f"Camera {i}" for i in range(size)}
+    return lambda: MvrRigEtl(
+        rig_path, output_directory, mvr_config_path, mvr_mapping
+    )
+
+
+def _setup_open_ephys_rig(
+    directory: Path, output_directory: Path, size: int
+) -> Callable[[], Any]:
+    """OpenEphysRigEtl on a rig and a settings.xml with size probes."""
+    from aind_metadata_mapper.neuropixels.open_ephys_rig import (
+        OpenEphysRigEtl,
+    )
+
+    rig_path = generators.write_rig(directory / "rig.json", size, 1)
+    settings_path = generators.write_open_ephys_settings(
+        directory / "settings.xml", [f"Probe{i}" for i in range(size)]
+    )
+    return lambda: OpenEphysRigEtl(
+        rig_path,
+        output_directory,
+        open_ephys_settings_sources=[settings_path],
+        probe_manipulator_serial_numbers=[
+            (f"Ephys Assembly {i}", f"SN{i}") for i in range(size)
+        ],
+    )
+
+
+def _setup_sync_rig(
+    directory: Path, output_directory: Path, size: int
+) -> Callable[[], Any]:
+    """SyncRigEtl on a Sync config with size lines."""
+    from aind_metadata_mapper.neuropixels.sync_rig import SyncRigEtl
+
+    rig_path = generators.write_rig(directory / "rig.json", 1, 1)
+    config_path = generators.write_sync_config(directory / "sync.yml", size)
+    return lambda: SyncRigEtl(rig_path, output_directory, config_path)
+
+
+CASES: Dict[str, BenchmarkCase] = {
+    case.name: case
+    for case in [
+        BenchmarkCase(
+            "bergamo", "rois and photostim groups", 100, _setup_bergamo
+        ),
+        BenchmarkCase(
+            "ephys", "stage log rows per stream", 500000, _setup_ephys
+        ),
+        BenchmarkCase("fib", "teensy log trials", 10000, _setup_fib),
+        BenchmarkCase(
+            "gather-metadata",
+            "data processes",
+            200,
+            _setup_gather_metadata,
+        ),
+        BenchmarkCase("mesoscope", "imaging planes", 400, _setup_mesoscope),
+        BenchmarkCase("mvr-rig", "cameras", 200, _setup_mvr_rig),
+        BenchmarkCase("open-ephys-rig", "probes", 200, _setup_open_ephys_rig),
+        BenchmarkCase("sync-rig", "sync lines", 500, _setup_sync_rig),
+    ]
+}
@@ -0,0 +1,375 @@
+"""Write synthetic inputs of the etl jobs. Each generator takes a size, so
+the benchmarks can show how the jobs scale with their inputs."""
+
+import copy
+import json
+from pathlib import Path
+from typing import List, Tuple
+
+RESOURCES_DIR = Path(__file__).parents[1] / "tests" / "resources"
+BASE_RIG_PATH = RESOURCES_DIR / "neuropixels" / "base_rig.json"
+TEENSY_LOG_PATH = RESOURCES_DIR / "fib" / "example_from_teensy.txt"
+BASE_PROCESSING_PATH = (
+    RESOURCES_DIR
+    / "gather_metadata_job"
+    / "metadata_files"
+    / "processing.json"
+)
+
+# Header keys read by BergamoEtl. The real headers have several hundred
+# more, which are padded in with the filler keys below.
+_SCANIMAGE_HEADER = {
+    "SI.hBeams.powers": "[15 0.8]",
+    "SI.hFastZ.enable": "false",
+    "SI.hFastZ.userZs": "0",
+    "SI.hRoiManager.linesPerFrame": "512",
+    "SI.hRoiManager.pixelsPerLine": "512",
+    "SI.hRoiManager.scanFrameRate": "30.0119",
+    "SI.hRoiManager.scanVolumeRate": "30.0119",
+    "SI.hRoiManager.scanZoomFactor": "1.2",
+}
+_SCANIMAGE_FILLER_KEYS = 450
+_SCANIMAGE_DESCRIPTION = (
+    "frameNumbers = 1\n"
+    "acquisitionNumbers = 1\n"
+    "frameTimestamps_sec = 0.000000000\n"
+    "epoch = [2023  7 24 14 14 17.854]\n"
+    "I2CData = {}\n"
+)
+_NP_PROBE_CHANNELS = 384
+
+
+def _imaging_roi(index: int) -> dict:
+    """Imaging roi of a ScanImage header, tiled along x by index."""
+    return {
+        "classname": "scanimage.mroi.Roi",
+        "name": f"Imaging Roi {index}",
+        "zs": 0,
+        "scanfields": {
+            "classname": "scanimage.mroi.scanfield.fields.RotatedRectangle",
+            "centerXY": [18 * index, 0],
+            "sizeXY": [18, 18],
+            "pixelResolutionXY": [512, 512],
+        },
+    }
+
+
+def _photostim_roi(duration: float, n_neurons: int) -> dict:
+    """Stimulus roi of a ScanImage photostim group."""
+    return {
+        "classname": "scanimage.mroi.Roi",
+        "scanfields": {
+            "classname": "scanimage.mroi.scanfield.fields.StimulusField",
+            "stimulusFunction": "scanimage.mroi.stimulusfunctions.logspiral",
+            "duration": duration,
+            "repetitions": 10,
+            "powers": 20,
+            "slmPattern": [
+                [0.5 * i, -0.5 * i, 0, 1] for i in range(n_neurons)
+            ],
+        },
+    }
+
+
+def write_scanimage_header(
+    directory: Path, n_rois: int, n_photostim_groups: int
+) -> Tuple[Path, Path]:
+    """
+    Write the metadata and first frame description of a ScanImage tiff.
+    Parameters
+    ----------
+    directory : Path
+    n_rois : int
+      Number of imaging rois.
+    n_photostim_groups : int
+      Number of photostim groups. At least 1.
+
+    Returns
+    -------
+    Tuple[Path, Path]
+      Paths of the metadata and the description text files.
+
+    """
+    header = dict(_SCANIMAGE_HEADER)
+    for i in range(_SCANIMAGE_FILLER_KEYS):
+        header[f"SI.hFiller{i % 10}.property{i}"] = f"[{i} {i + 1} {i + 2}]"
+    roi_groups = {
+        "RoiGroups": {
+            "imagingRoiGroup": {
+                "rois": [_imaging_roi(i) for i in range(n_rois)]
+            },
+            "photostimRoiGroups": [
+                {
+                    "name": f"Group {i}",
+                    "rois": [
+                        _photostim_roi(0.005, 0),
+                        _photostim_roi(0.01, 10),
+                        _photostim_roi(0.02, 0),
+                    ],
+                }
+                for i in range(n_photostim_groups)
+            ],
+        }
+    }
+    metadata_path = directory / "scanimage_metadata.txt"
+    description_path = directory / "scanimage_description0.txt"
+    metadata_path.write_text(
+        "\n".join(f"{k} = {v}" for k, v in header.items())
+        + "\n\n"
+        + json.dumps(roi_groups)
+    )
+    description_path.write_text(_SCANIMAGE_DESCRIPTION)
+    return metadata_path, description_path
+
+
+def write_stage_log(
+    path: Path, n_rows: int, probe_serial_numbers: List[str]
+) -> Path:
+    """
+    Write a newscale stage log. Each probe logs a contiguous block of rows,
+    10 ms apart.
+    Parameters
+    ----------
+    path : Path
+    n_rows : int
+    probe_serial_numbers : List[str]
+
+    Returns
+    -------
+    Path
+
+    """
+    block_size = -(-n_rows // len(probe_serial_numbers))
+    with open(path, "w") as f:
+        for row in range(n_rows):
+            serial_number = probe_serial_numbers[row // block_size]
+            ms = row * 10
+            position = 7500.0 + row % 1000
+            f.write(
+                f"2023/04/04 {10 + ms // 3600000:02d}:"
+                f"{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}."
+                f"{ms % 1000:03d}, SN{serial_number}, "
+                f"{position}, 7505.0, 7493.0, {position}, 7505.0, 7493.0\n"
+            )
+    return path
+
+
+def write_open_ephys_settings(path: Path, probe_names: List[str]) -> Path:
+    """
+    Write an Open Ephys settings.xml with one np_probe element, along with
+    its channel map, per probe.
+    Parameters
+    ----------
+    path : Path
+    probe_names : List[str]
+
+    Returns
+    -------
+    Path
+
+    """
+    channels = " ".join(f'CH{i}="0"' for i in range(_NP_PROBE_CHANNELS))
+    with open(path, "w") as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n\n<SETTINGS>\n'
+            "  <INFO>\n    <VERSION>0.6.6</VERSION>\n"
+            "    <DATE>21 Nov 2023 12:29:21</DATE>\n  </INFO>\n"
+            '  <SIGNALCHAIN>\n    <PROCESSOR name="Neuropix-PXI">\n'
+            "      <EDITOR>\n"
+        )
+        for i, probe_name in enumerate(probe_names):
+            f.write(
+                f'        <NP_PROBE slot="{2 + i // 4}" port="{1 + i % 4}" '
+                f'dock="1" probe_serial_number="{19192719000 + i}" '
+                f'probe_name="Neuropixels 1.0" '
+                f'custom_probe_name="{probe_name}">\n'
+                f"          <CHANNELS {channels}/>\n"
+                "        </NP_PROBE>\n"
+            )
+        f.write("      </EDITOR>\n    </PROCESSOR>\n  </SIGNALCHAIN>\n")
+        f.write("</SETTINGS>\n")
+    return path
+
+
+def write_rig(path: Path, n_ephys_assemblies: int, n_cameras: int) -> Path:
+    """
+    Write a neuropixels rig json, based on the rig of the tests, with the
+    given number of ephys assemblies and camera assemblies. Assembly i has
+    a probe named Probe{i} and a camera assembly named Camera {i}.
+    Parameters
+    ----------
+    path : Path
+    n_ephys_assemblies : int
+    n_cameras : int
+
+    Returns
+    -------
+    Path
+
+    """
+    rig = json.loads(BASE_RIG_PATH.read_text())
+    ephys_assembly = rig["ephys_assemblies"][0]
+    camera_assembly = rig["cameras"][0]
+    rig["ephys_assemblies"] = []
+    for i in range(n_ephys_assemblies):
+        assembly = copy.deepcopy(ephys_assembly)
+        assembly["name"] = f"Ephys Assembly {i}"
+        assembly["manipulator"]["name"] = f"Ephys Assembly {i} Manipulator"
+        assembly["probes"][0]["name"] = f"Probe{i}"
+        rig["ephys_assemblies"].append(assembly)
+    rig["cameras"] = []
+    for i in range(n_cameras):
+        assembly = copy.deepcopy(camera_assembly)
+        assembly["name"] = f"Camera {i}"
+        for device in ("camera", "lens", "filter"):
+            assembly[device]["name"] = f"Camera {i} {device}"
+        rig["cameras"].append(assembly)
+    path.write_text(json.dumps(rig))
+    return path
+
+
+def write_processing(path: Path, n_processes: int) -> Path:
+    """
+    Write a processing json, based on the processing json of the tests, with
+    n_processes data processes. Each process has the per channel parameters
+    of a 384 channel probe.
+    Parameters
+    ----------
+    path : Path
+    n_processes : int
+
+    Returns
+    -------
+    Path
+
+    """
+    processing = json.loads(BASE_PROCESSING_PATH.read_text())
+    pipeline = processing["processing_pipeline"]
+    data_process = pipeline["data_processes"][0]
+    pipeline["data_processes"] = []
+    for i in range(n_processes):
+        process = copy.deepcopy(data_process)
+        process["output_location"] = f"/tmp/stage/{i}"
+        process["parameters"] = {
+            "channel_gains": [
+                0.195 + c * 1e-4 for c in range(_NP_PROBE_CHANNELS)
+            ]
+        }
+        pipeline["data_processes"].append(process)
+    path.write_text(json.dumps(processing, indent=3))
+    return path
+
+
+def write_mvr_config(path: Path, n_cameras: int) -> Path:
+    """
+    Write an MVR config with a section per camera. Camera i has the label
+    Camera {i}.
+    Parameters
+    ----------
+    path : Path
+    n_cameras : int
+
+    Returns
+    -------
+    Path
+
+    """
+    with open(path, "w") as f:
+        f.write("[MVR_BACKEND]\nCODEC=h264_nvenc\n")
+        for i in range(n_cameras):
+            f.write(
+                f"\n[Camera {i}]\nID=DEV_{i:012X}\nSN=50-{536876074 + i}\n"
+                f"LABEL=Camera {i}\nTAG={i}\n"
+            )
+    return path
+
+
+def write_sync_config(path: Path, n_lines: int) -> Path:
+    """
+    Write a Sync config with n_lines labelled lines.
+    Parameters
+    ----------
+    path : Path
+    n_lines : int
+
+    Returns
+    -------
+    Path
+
+    """
+    with open(path, "w") as f:
+        f.write("device: Dev1\nfreq: 100000.0\nline_labels:\n")
+        for i in range(n_lines):
+            f.write(f"  {i}: line_{i}\n")
+    return path
+
+
+def write_mesoscope_inputs(directory: Path, n_planes: int) -> Path:
+    """
+    Write a mesoscope platform json with n_planes imaging planes spread
+    over groups of up to 8 planes, the behavior camera jsons and a
+    vasculature tif.
+    Parameters
+    ----------
+    directory : Path
+    n_planes : int
+
+    Returns
+    -------
+    Path
+      The directory, to be used as both input and behavior source.
+
+    """
+    from PIL import Image
+
+    groups = [
+        {
+            "local_z_stack_tif": f"local_z_stack{g % 10}.tiff",
+            "acquisition_framerate_Hz": 9.48,
+            "imaging_planes": [
+                {
+                    "targeted_depth": 150 + 10 * p,
+                    "targeted_structure_id": 385,
+                    "scanimage_power": 42,
+                }
+                for p in range(g * 8, min(n_planes, (g + 1) * 8))
+            ],
+        }
+        for g in range(-(-n_planes // 8))
+    ]
+    (directory / "session_platform.json").write_text(
+        json.dumps({"rig_id": "MESO.1", "imaging_plane_groups": groups})
+    )
+    for camera in ("Behavior", "Eye", "Face"):
+        (directory / f"session_{camera}_20240212T091443.json").write_text(
+            json.dumps(
+                {
+                    "RecordingReport": {
+                        "TimeStart": "2024-02-12T09:14:43Z",
+                        "TimeEnd": "2024-02-12T10:14:43Z",
+                    }
+                }
+            )
+        )
+    # Tag 306 is DateTime
+    Image.new("L", (16, 16)).save(
+        directory / "session_vasculature.tif",
+        tiffinfo={306: "2024:02:12 09:00:00"},
+    )
+    return directory
+
+
+def make_teensy_log(n_trials: int) -> str:
+    """
+    Make a teensy log of a fiber photometry session with n_trials
+    repetitions of the example log of the tests.
+    Parameters
+    ----------
+    n_trials : int
+
+    Returns
+    -------
+    str
+
+    """
+    return TEENSY_LOG_PATH.read_text() * n_trials
@@ -0,0 +1,260 @@
+"""Run the benchmarks, print the timings and peak memory as json and compare
+them with a saved baseline. For example:
+  python -m benchmarks.run --scale 0.1 --save-baseline baseline.json
+  python -m benchmarks.run --scale 0.1 --baseline baseline.json
+"""
+
+import argparse
+import gc
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from aind_metadata_mapper import codec
+from benchmarks.cases import CASES, BenchmarkCase
+
+
+class BenchmarkResult(BaseModel):
+    """Timings and peak memory of one benchmark case."""
+
+    name: str
+    size: int
+    repeats: int
+    best_time: float = Field(
+        ..., description="Fastest wall time of the job in seconds"
+    )
+    mean_time: float = Field(
+        ..., description="Mean wall time of the job in seconds"
+    )
+    peak_memory: int = Field(
+        ...,
+        description=(
+            "Peak memory allocated while the job ran in bytes, as traced by "
+            "tracemalloc"
+        ),
+    )
+    stages: Optional[Dict[str, float]] = Field(
+        None,
+        description=(
+            "Wall time of each stage of the fastest run in seconds, for jobs "
+            "that report metrics"
+        ),
+    )
+
+
+class BenchmarkReport(BaseModel):
+    """Results of a benchmark run."""
+
+    python_version: str = Field(default_factory=platform.python_version)
+    machine: str = Field(default_factory=platform.machine)
+    json_backend: str = Field(
+        default_factory=codec.backend, description="Json parser in use"
+    )
+    results: List[BenchmarkResult] = []
+
+
+def run_case(case: BenchmarkCase, size: int, repeats: int) -> BenchmarkResult:
+    """
+    Write the inputs of a case to a temporary directory, then run its job
+    repeats times for the timings and once more under tracemalloc for the
+    peak memory, which tracing slows down.
+    Parameters
+    ----------
+    case : BenchmarkCase
+    size : int
+      Size of the synthetic inputs.
+    repeats : int
+
+    Returns
+    -------
+    BenchmarkResult
+
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_directory = Path(temp_dir) / "output"
+        output_directory.mkdir()
+        make_job = case.setup(Path(temp_dir), output_directory, size)
+        times = []
+        stages = None
+        for _ in range(repeats):
+            gc.collect()
+            start = time.perf_counter()
+            job_response = make_job().run_job()
+            times.append(time.perf_counter() - start)
+            metrics = getattr(job_response, "metrics", None)
+            if metrics is not None and times[-1] == min(times):
+                stages = {
+                    stage: getattr(metrics, stage).wall_time
+                    for stage in ("extract", "transform", "validation", "load")
+                }
+        gc.collect()
+        tracemalloc.start()
+        try:
+            make_job().run_job()
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return BenchmarkResult(
+        name=case.name,
+        size=size,
+        repeats=repeats,
+        best_time=min(times),
+        mean_time=sum(times) / len(times),
+        peak_memory=peak_memory,
+        stages=stages,
+    )
+
+
+def find_regressions(
+    report: BenchmarkReport, baseline: BenchmarkReport, tolerance: float
+) -> List[str]:
+    """
+    Compare a report with a baseline. Cases are matched by name and size;
+    cases missing from the baseline are not compared.
+    Parameters
+    ----------
+    report : BenchmarkReport
+    baseline : BenchmarkReport
+    tolerance : float
+      Allowed relative increase of the best time and of the peak memory.
+      For example, 0.25 allows a case to be 25% slower than the baseline.
+
+    Returns
+    -------
+    List[str]
+      A description of each regression. Empty if there are none.
+
+    """
+    baseline_results = {
+        (result.name, result.size): result for result in baseline.results
+    }
+    regressions = []
+    for result in report.results:
+        baseline_result = baseline_results.get((result.name, result.size))
+        if baseline_result is None:
+            logging.info(
+                "No baseline for %s at size %d", result.name, result.size
+            )
+            continue
+        for field_name in ("best_time", "peak_memory"):
+            value = getattr(result, field_name)
+            baseline_value = getattr(baseline_result, field_name)
+            if value > baseline_value * (1 + tolerance):
+                regressions.append(
+                    f"{result.name} (size {result.size}): {field_name} "
+                    f"{value:g} is more than {tolerance:.0%} over the "
+                    f"baseline {baseline_value:g}"
+                )
+    return regressions
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Run the benchmarks from the command line.
+    Parameters
+    ----------
+    args : Optional[List[str]]
+      Command line arguments. Defaults to sys.argv[1:].
+
+    Returns
+    -------
+    int
+      Exit code. 1 if a case regressed compared with the baseline, else 0.
+
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        choices=sorted(CASES),
+        default=sorted(CASES),
+        help="Cases to run. Defaults to all of them.",
+    )
+    parser.add_argument(
+        "--scale",
+        default=1.0,
+        type=float,
+        help=(
+            "Multiplies the default size of every case. For example, 0.01 "
+            "runs in a few seconds. Defaults to 1."
+        ),
+    )
+    parser.add_argument(
+        "--repeats",
+        default=3,
+        type=int,
+        help="Number of timed runs of each case. Defaults to 3.",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        type=str,
+        help=(
+            "Report of a previous run to compare with. If it does not exist "
+            "yet, this run is saved to it instead."
+        ),
+    )
+    parser.add_argument(
+        "--tolerance",
+        default=0.25,
+        type=float,
+        help=(
+            "Allowed relative increase over the baseline of the best time "
+            "and of the peak memory. Defaults to 0.25."
+        ),
+    )
+    parser.add_argument(
+        "--save-baseline",
+        default=None,
+        type=str,
+        help="Save the report to this file, to compare later runs with.",
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=codec.available_backends(),
+        default=codec.backend(),
+        help=(
+            "Json parser of the jobs, to compare them. Defaults to the "
+            "fastest one installed."
+        ),
+    )
+    cli_args = parser.parse_args(args)
+    logging.basicConfig(level=logging.WARNING)
+    codec.set_backend(cli_args.json_backend)
+    report = BenchmarkReport()
+    for case_name in cli_args.cases:
+        case = CASES[case_name]
+        size = max(1, round(case.default_size * cli_args.scale))
+        logging.info(
+            "Running %s with %d %s", case_name, size, case.size_description
+        )
+        report.results.append(run_case(case, size, cli_args.repeats))
+    report_json = report.model_dump_json(indent=2)
+    print(report_json)
+    if cli_args.save_baseline is not None:
+        Path(cli_args.save_baseline).write_text(report_json)
+    if cli_args.baseline is None:
+        return 0
+    baseline_path = Path(cli_args.baseline)
+    if not baseline_path.exists():
+        # Timings depend on the machine, so the first run on a machine
+        # becomes the baseline of the next ones
+        baseline_path.write_text(report_json)
+        logging.warning("Saved the first baseline to %s", baseline_path)
+        return 0
+    baseline = BenchmarkReport.model_validate_json(baseline_path.read_text())
+    regressions = find_regressions(report, baseline, cli_args.tolerance)
+    for regression in regressions:
+        logging.warning("Regression: %s", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
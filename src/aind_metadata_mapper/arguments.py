@@ -0,0 +1,200 @@
+"""Command line arguments of the etl jobs. They are kept apart from the etl
+modules, which import aind_data_schema, so that the command line answers
+--help and usage errors without loading the models."""
+
+import argparse
+import json
+from typing import Callable, Dict, Optional
+
+
+def add_profiling_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the --profile and --trace options of the etl command line entry
+    points to parser.
+    Parameters
+    ----------
+    parser : argparse.ArgumentParser
+
+    """
+    parser.add_argument(
+        "--profile",
+        required=False,
+        default=None,
+        type=str,
+        help=(
+            "Profile the job with cProfile and write the stats to this file. "
+            "A summary of the slowest functions of each stage is written to "
+            "the same path with .txt appended."
+        ),
+    )
+    parser.add_argument(
+        "--trace",
+        required=False,
+        default=None,
+        type=str,
+        help=(
+            "Trace the stages of the job and write the spans to this file "
+            "in the Chrome trace event format."
+        ),
+    )
+
+
+def bergamo_parser(prog: Optional[str] = None) -> argparse.ArgumentParser:
+    """
+    Parser of the arguments of BergamoEtl.from_args.
+    Parameters
+    ----------
+    prog : Optional[str]
+      Name of the program in the usage message. Defaults to the name of the
+      running script.
+
+    Returns
+    -------
+    argparse.ArgumentParser
+
+    """
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument(
+        "-j",
+        "--job-settings",
+        required=True,
+        type=str,
+        help=(
+            r"""
+            Custom settings defined by the user defined as a json
+             string. For example: -j
+             '{
+             "input_source":"/directory/to/read/from",
+             "output_directory":"/directory/to/write/to",
+             "experimenter_full_name":["John Smith","Jane Smith"],
+             "subject_id":"12345",
+             "session_start_time":"2023-10-10T10:10:10",
+             "session_end_time":"2023-10-10T18:10:10",
+             "stream_start_time": "2023-10-10T11:10:10",
+             "stream_end_time":"2023-10-10T17:10:10",
+             "stimulus_start_time":"12:10:10",
+             "stimulus_end_time":"13:10:10"}'
+            """
+        ),
+    )
+    add_profiling_arguments(parser)
+    return parser
+
+
+def fib_parser(prog: Optional[str] = None) -> argparse.ArgumentParser:
+    """
+    Parser of the arguments of FIBEtl.from_args.
+    Parameters
+    ----------
+    prog : Optional[str]
+      Name of the program in the usage message. Defaults to the name of the
+      running script.
+
+    Returns
+    -------
+    argparse.ArgumentParser
+
+    """
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument(
+        "-j",
+        "--job-settings",
+        required=True,
+        type=str,
+        help=(
+            r"""
+            Custom settings defined by the user defined as a json
+             string. For example: -j
+             '{
+             "string_to_parse":"Received command o...",
+             "experimenter_full_name":["John Smith"],
+             "session_start_time":"2023-10-10T10:10:10",
+             "notes":"",
+             "labtracks_id":"000000",
+             "iacuc_protocol":"2115",
+             "light_source_list":[],
+             "detector_list":[],
+             "fiber_connections_list":[]}'
+            """
+        ),
+    )
+    add_profiling_arguments(parser)
+    return parser
+
+
+def gather_metadata_parser(
+    prog: Optional[str] = None,
+) -> argparse.ArgumentParser:
+    """
+    Parser of the arguments of GatherMetadataJob.from_args.
+    Parameters
+    ----------
+    prog : Optional[str]
+      Name of the program in the usage message. Defaults to the name of the
+      running script.
+
+    Returns
+    -------
+    argparse.ArgumentParser
+
+    """
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument(
+        "-j",
+        "--job-settings",
+        required=True,
+        type=str,
+        help=(
+            r"""
+            Instead of init args the job settings can optionally be passed
+            in as a json string in the command line.
+            """
+        ),
+    )
+    add_profiling_arguments(parser)
+    return parser
+
+
+def mesoscope_parser(prog: Optional[str] = None) -> argparse.ArgumentParser:
+    """
+    Parser of the arguments of MesoscopeEtl.from_args.
+    Parameters
+    ----------
+    prog : Optional[str]
+      Name of the program in the usage message. Defaults to the name of the
+      running script.
+
+    Returns
+    -------
+    argparse.ArgumentParser
+
+    """
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument(
+        "-u",
+        "--job-settings",
+        required=True,
+        type=json.loads,
+        help=(
+            r"""
+            Custom settings defined by the user defined as a json
+             string. For example: -u
+             '{"experimenter_full_name":["John Smith","Jane Smith"],
+             "subject_id":"12345",
+             "session_start_time":"2023-10-10T10:10:10",
+             "session_end_time":"2023-10-10T18:10:10",
+             "project":"my_project"}
+            """
+        ),
+    )
+    add_profiling_arguments(parser)
+    return parser
+
+
+# Parser of each etl of the command line, by the names of cli.ETL_REGISTRY
+PARSERS: Dict[str, Callable[[Optional[str]], argparse.ArgumentParser]] = {
+    "bergamo": bergamo_parser,
+    "fib": fib_parser,
+    "gather-metadata": gather_metadata_parser,
+    "mesoscope": mesoscope_parser,
+}
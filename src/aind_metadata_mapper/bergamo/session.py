@@ -1,7 +1,5 @@
 """Module to map bergamo metadata into a session model"""
 
-import argparse
-import json
 import logging
 import os
 import re
@@ -11,7 +9,6 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
 
-import numpy as np
 from aind_data_schema.core.session import (
     DetectorConfig,
     FieldOfView,
@@ -29,9 +26,15 @@ from aind_data_schema.models.stimulus import (
 from aind_data_schema.models.units import PowerUnit, SizeUnit
 from pydantic import Field
 from pydantic_settings import BaseSettings
-from ScanImageTiffReader import ScanImageTiffReader
 
-from aind_metadata_mapper.core import GenericEtl, JobResponse
+from aind_metadata_mapper import arguments, codec
+from aind_metadata_mapper.core import GenericEtl
+from aind_metadata_mapper.tracing import span
+
+# Heavy dependencies imported by the job once it reads its inputs. They are
+# imported lazily so that the command line starts quickly, and preloaded by
+# the workers of the server.
+LAZY_IMPORTS = ("numpy", "ScanImageTiffReader")
 
 
 class JobSettings(BaseSettings):
@@ -127,6 +130,7 @@ class BergamoEtl(GenericEtl[JobSettings]):
     def __init__(
         self,
         job_settings: Union[JobSettings, str],
+        **kwargs,
     ):
         """
         Class constructor for Base etl class.
@@ -134,12 +138,14 @@ class BergamoEtl(GenericEtl[JobSettings]):
         ----------
         job_settings: Union[JobSettings, str]
           Variables for a particular session
+        **kwargs
+          Passed to GenericEtl, such as validation_mode
         """
         if isinstance(job_settings, str):
             job_settings_model = JobSettings.model_validate_json(job_settings)
         else:
             job_settings_model = job_settings
-        super().__init__(job_settings=job_settings_model)
+        super().__init__(job_settings=job_settings_model, **kwargs)
 
     @staticmethod
     def _flat_dict_to_nested(flat: dict, key_delim: str = ".") -> dict:
@@ -185,6 +191,8 @@ class BergamoEtl(GenericEtl[JobSettings]):
         -------
         ParsedMetadata
         """
+        # numpy is slow to import, so it is only loaded when needed
+        import numpy as np
 
         # The metadata contains two parts separated by \n\n. The top part
         # looks like
@@ -205,7 +213,7 @@ class BergamoEtl(GenericEtl[JobSettings]):
 
         # The second part is a standard json string. We'll extract it and
         # append it to our dictionary
-        metadata_json = json.loads(raw_image_info.metadata.split("\n\n")[1])
+        metadata_json = codec.loads(raw_image_info.metadata.split("\n\n")[1])
         metadata["json"] = metadata_json
 
         # Convert description string to a dictionary
@@ -299,9 +307,9 @@ class BergamoEtl(GenericEtl[JobSettings]):
                 )
             data["dx"] = data["dx"].astype("int32")
             data["dy"] = data["dy"].astype("int32")
-            logging.debug(f"data[dx]: {data['dx']}")
-            logging.debug(f"data[dy]: {data['dy']}")
-            logging.debug(f"data[lines]: {data['lines']}")
+            logging.debug("data[dx]: %s", data["dx"])
+            logging.debug("data[dy]: %s", data["dy"])
+            logging.debug("data[lines]: %s", data["lines"])
         movie_start_time = datetime.strptime(
             description_first_image_dict["epoch"], "[%Y %m %d %H %M %S.%f]"
         )
@@ -358,25 +366,40 @@ class BergamoEtl(GenericEtl[JobSettings]):
         else:
             return tif_filepath
 
-    def _extract(self) -> RawImageInfo:
-        """Extract metadata from bergamo session. If input source is a file,
-        will extract data from file. If input source is a directory, will
-        attempt to find a file."""
+    def _get_si_file(self) -> Path:
+        """ScanImage file the metadata is read from. If input source is a
+        file, it is that file. If input source is a directory, will attempt
+        to find a file."""
         if isinstance(self.job_settings.input_source, str):
             input_source = Path(self.job_settings.input_source)
         else:
             input_source = self.job_settings.input_source
 
         if os.path.isfile(input_source):
-            file_with_metadata = input_source
+            return input_source
         else:
-            file_with_metadata = self._get_si_file_from_dir(input_source)
+            return self._get_si_file_from_dir(input_source)
+
+    def _input_files(self) -> List[Path]:
+        """The ScanImage file read by the etl job, rather than every tiff in
+        the input directory, so that the cache keys of a large session are
+        cheap to compute."""
+        return [self._get_si_file()]
+
+    def _extract(self) -> RawImageInfo:
+        """Extract metadata from bergamo session. If input source is a file,
+        will extract data from file. If input source is a directory, will
+        attempt to find a file."""
+        file_with_metadata = self._get_si_file()
+        from ScanImageTiffReader import ScanImageTiffReader
+
         # Not sure if a custom header was appended, but we can't use
         # o=json.loads(reader.metadata()) directly
-        with ScanImageTiffReader(str(file_with_metadata)) as reader:
-            img_metadata = reader.metadata()
-            img_description = reader.description(0)
-            img_shape = reader.shape()
+        with span("tiff_open", path=file_with_metadata):
+            with ScanImageTiffReader(str(file_with_metadata)) as reader:
+                img_metadata = reader.metadata()
+                img_description = reader.description(0)
+                img_shape = reader.shape()
         return RawImageInfo(
             metadata=img_metadata,
             description0=img_description,
@@ -396,7 +419,10 @@ class BergamoEtl(GenericEtl[JobSettings]):
         Session
 
         """
-        siHeader = self._parse_raw_image_info(extracted_source)
+        import numpy as np
+
+        with span("header_parse"):
+            siHeader = self._parse_raw_image_info(extracted_source)
         photostim_groups = siHeader.metadata["json"]["RoiGroups"][
             "photostimRoiGroups"
         ]
@@ -558,15 +584,6 @@ class BergamoEtl(GenericEtl[JobSettings]):
             active_mouse_platform=self.job_settings.active_mouse_platform,
         )
 
-    def run_job(self) -> JobResponse:
-        """Run the etl job and return a JobResponse."""
-        extracted = self._extract()
-        transformed = self._transform(extracted_source=extracted)
-        job_response = self._load(
-            transformed, self.job_settings.output_directory
-        )
-        return job_response
-
     # TODO: The following can probably be abstracted
     @classmethod
     def from_args(cls, args: list):
@@ -578,36 +595,15 @@ class BergamoEtl(GenericEtl[JobSettings]):
         A list of command line arguments to parse.
         """
 
-        parser = argparse.ArgumentParser()
-        parser.add_argument(
-            "-j",
-            "--job-settings",
-            required=True,
-            type=str,
-            help=(
-                r"""
-                Custom settings defined by the user defined as a json
-                 string. For example: -j
-                 '{
-                 "input_source":"/directory/to/read/from",
-                 "output_directory":"/directory/to/write/to",
-                 "experimenter_full_name":["John Smith","Jane Smith"],
-                 "subject_id":"12345",
-                 "session_start_time":"2023-10-10T10:10:10",
-                 "session_end_time":"2023-10-10T18:10:10",
-                 "stream_start_time": "2023-10-10T11:10:10",
-                 "stream_end_time":"2023-10-10T17:10:10",
-                 "stimulus_start_time":"12:10:10",
-                 "stimulus_end_time":"13:10:10"}'
-                """
-            ),
-        )
+        parser = arguments.bergamo_parser()
         job_args = parser.parse_args(args)
         job_settings_from_args = JobSettings.model_validate_json(
             job_args.job_settings
         )
         return cls(
             job_settings=job_settings_from_args,
+            profile_path=job_args.profile,
+            trace_path=job_args.trace,
         )
 
 
@@ -0,0 +1,466 @@
+"""Caches to reuse the intermediate and final results of etl jobs."""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field
+
+from aind_metadata_mapper.writers import _hash_file, atomic_write
+
+_ENTRY_SUFFIX = ".cache"
+
+
+class CacheEntry(BaseModel):
+    """Information about one entry of a cache."""
+
+    key: str
+    size: int = Field(..., description="Size of the entry in bytes")
+    last_used: datetime = Field(
+        ..., description="When the entry was last written or read"
+    )
+
+
+def _expand_paths(paths: Iterable[Union[Path, str]]) -> List[Path]:
+    """
+    Replace every directory in paths with the files directly inside it.
+    Parameters
+    ----------
+    paths : Iterable[Union[Path, str]]
+
+    Returns
+    -------
+    List[Path]
+      Files and missing paths, in a deterministic order.
+
+    """
+    expanded = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            expanded.extend(
+                sorted(child for child in path.iterdir() if child.is_file())
+            )
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def fingerprint_files(
+    paths: Iterable[Union[Path, str]], content_hash: bool = False
+) -> List[Tuple[str, Optional[int], Optional[Union[int, str]]]]:
+    """
+    Fingerprint the files an etl job reads, so that a changed input changes
+    the cache key of the job.
+    Parameters
+    ----------
+    paths : Iterable[Union[Path, str]]
+      Files or directories. A directory stands for the files directly in it.
+    content_hash : bool
+      If True, the sha256 of the contents is used instead of the
+      modification time. This survives copies and touches at the cost of
+      reading every input. Default is False.
+
+    Returns
+    -------
+    List[Tuple[str, Optional[int], Optional[Union[int, str]]]]
+      (path, size, mtime or hash) for each file. Size and mtime are None for
+      missing files.
+
+    """
+    fingerprints = []
+    for path in _expand_paths(paths):
+        try:
+            stat_result = path.stat()
+        except FileNotFoundError:
+            fingerprints.append((str(path), None, None))
+            continue
+        version = (
+            _hash_file(path).hex() if content_hash else stat_result.st_mtime_ns
+        )
+        fingerprints.append((str(path), stat_result.st_size, version))
+    return fingerprints
+
+
+def make_cache_key(*parts) -> str:
+    """
+    Hash json serializable parts into a cache key.
+    Parameters
+    ----------
+    *parts
+      Anything json can serialize. Other objects are converted with str.
+
+    Returns
+    -------
+    str
+      Hex digest of the canonical json of the parts.
+
+    """
+    canonical_json = json.dumps(
+        parts, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
+
+
+class BaseCache(ABC):
+    """Interface of a cache of bytes keyed by strings. Child classes decide
+    where the entries are stored. When the entries grow past max_size, the
+    least recently used ones are evicted."""
+
+    def __init__(self, max_size: int, content_hash: bool = False):
+        """
+        Class constructor for BaseCache.
+        Parameters
+        ----------
+        max_size : int
+          Total size of the entries in bytes before old ones are evicted.
+        content_hash : bool
+          Whether etl jobs fingerprint their inputs by the sha256 of their
+          contents instead of their modification times. Default is False.
+        """
+        self.max_size = max_size
+        self.content_hash = content_hash
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Read an entry and mark it as recently used.
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        Optional[bytes]
+          The contents of the entry, or None if there is no entry for key.
+
+        """
+
+    @abstractmethod
+    def set(self, key: str, contents: bytes) -> None:
+        """
+        Write an entry, then evict old entries if the cache is too large.
+        Parameters
+        ----------
+        key : str
+        contents : bytes
+
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Remove the entry for key if there is one.
+        Parameters
+        ----------
+        key : str
+
+        """
+
+    @abstractmethod
+    def entries(self) -> List[CacheEntry]:
+        """
+        List the entries, least recently used first.
+        Returns
+        -------
+        List[CacheEntry]
+
+        """
+
+    def size(self) -> int:
+        """Total size of the entries in bytes."""
+        return sum(entry.size for entry in self.entries())
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the total size is at
+        most max_size."""
+        entries = self.entries()
+        total_size = sum(entry.size for entry in entries)
+        for entry in entries:
+            if total_size <= self.max_size:
+                break
+            self.delete(entry.key)
+            total_size -= entry.size
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for entry in self.entries():
+            self.delete(entry.key)
+
+
+class MemoryCache(BaseCache):
+    """Cache of bytes in the memory of the current process. Useful to share
+    results between jobs run in the same process, such as with arun_job."""
+
+    def __init__(
+        self, max_size: int = 256 * 1024**2, content_hash: bool = False
+    ):
+        """
+        Class constructor for MemoryCache.
+        Parameters
+        ----------
+        max_size : int
+          Total size of the entries in bytes before old ones are evicted.
+          Default is 256 MiB.
+        content_hash : bool
+          Whether etl jobs fingerprint their inputs by the sha256 of their
+          contents instead of their modification times. Default is False.
+        """
+        super().__init__(max_size=max_size, content_hash=content_hash)
+        # Kept in least recently used first order
+        self._entries: Dict[str, Tuple[bytes, datetime]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Read an entry and mark it as recently used.
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        Optional[bytes]
+          The contents of the entry, or None if there is no entry for key.
+
+        """
+        with self._lock:
+            if key not in self._entries:
+                return None
+            contents, _ = self._entries[key]
+            self._entries[key] = (contents, datetime.now())
+            self._entries.move_to_end(key)
+        return contents
+
+    def set(self, key: str, contents: bytes) -> None:
+        """
+        Write an entry, then evict old entries if the cache is too large.
+        Parameters
+        ----------
+        key : str
+        contents : bytes
+
+        """
+        with self._lock:
+            replaced = self._entries.pop(key, None)
+            if replaced is not None:
+                self._size -= len(replaced[0])
+            self._entries[key] = (contents, datetime.now())
+            self._size += len(contents)
+            # Evict from the least recently used end
+            while self._size > self.max_size:
+                evicted_contents, _ = self._entries.popitem(last=False)[1]
+                self._size -= len(evicted_contents)
+
+    def delete(self, key: str) -> None:
+        """
+        Remove the entry for key if there is one.
+        Parameters
+        ----------
+        key : str
+
+        """
+        with self._lock:
+            deleted = self._entries.pop(key, None)
+            if deleted is not None:
+                self._size -= len(deleted[0])
+
+    def size(self) -> int:
+        """Total size of the entries in bytes."""
+        with self._lock:
+            return self._size
+
+    def entries(self) -> List[CacheEntry]:
+        """
+        List the entries, least recently used first.
+        Returns
+        -------
+        List[CacheEntry]
+
+        """
+        with self._lock:
+            return [
+                CacheEntry(key=key, size=len(contents), last_used=last_used)
+                for key, (contents, last_used) in self._entries.items()
+            ]
+
+
+class DiskCache(BaseCache):
+    """Cache of bytes in a directory with one file per entry. Entries are
+    written atomically, so several processes can share the directory. The
+    result and extract caches of etl jobs store pickles, which can run code
+    when they are loaded, so the directory of those caches needs to be
+    writable only by trusted users."""
+
+    def __init__(
+        self,
+        directory: Union[Path, str],
+        max_size: int = 1024**3,
+        content_hash: bool = False,
+    ):
+        """
+        Class constructor for DiskCache.
+        Parameters
+        ----------
+        directory : Union[Path, str]
+          Where to store the entries. Created if it does not exist.
+        max_size : int
+          Total size of the entries in bytes before old ones are evicted.
+          Default is 1 GiB.
+        content_hash : bool
+          Whether etl jobs fingerprint their inputs by the sha256 of their
+          contents instead of their modification times. Default is False.
+        """
+        super().__init__(max_size=max_size, content_hash=content_hash)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Running total of the size of the entries, so that set only scans
+        # the directory when the cache may need to evict
+        self._lock = threading.Lock()
+        self._size = sum(entry.size for entry in self.entries())
+
+    def __getstate__(self) -> dict:
+        """Leave the lock out when the cache is sent to worker processes."""
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Give a cache received by a worker process a lock of its own."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _entry_path(self, key: str) -> Path:
+        """Path of the file holding the entry for key."""
+        return self.directory / f"{key}{_ENTRY_SUFFIX}"
+
+    @staticmethod
+    def _file_size(path: Path) -> int:
+        """Size of the file at path, or 0 if it does not exist."""
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Read an entry and mark it as recently used.
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        Optional[bytes]
+          The contents of the entry, or None if there is no entry for key.
+
+        """
+        entry_path = self._entry_path(key)
+        try:
+            contents = entry_path.read_bytes()
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        return contents
+
+    def set(self, key: str, contents: bytes) -> None:
+        """
+        Write an entry, then evict old entries if the cache is too large.
+        Parameters
+        ----------
+        key : str
+        contents : bytes
+
+        """
+        entry_path = self._entry_path(key)
+        replaced_size = self._file_size(entry_path)
+        atomic_write(entry_path, contents)
+        with self._lock:
+            self._size += len(contents) - replaced_size
+            too_large = self._size > self.max_size
+        if too_large:
+            self.evict()
+
+    def delete(self, key: str) -> None:
+        """
+        Remove the entry for key if there is one.
+        Parameters
+        ----------
+        key : str
+
+        """
+        entry_path = self._entry_path(key)
+        deleted_size = self._file_size(entry_path)
+        entry_path.unlink(missing_ok=True)
+        with self._lock:
+            self._size = max(self._size - deleted_size, 0)
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the total size is at
+        most max_size. The scan also corrects the running total for entries
+        other processes wrote or removed."""
+        entries = self.entries()
+        total_size = sum(entry.size for entry in entries)
+        for entry in entries:
+            if total_size <= self.max_size:
+                break
+            self._entry_path(entry.key).unlink(missing_ok=True)
+            total_size -= entry.size
+        with self._lock:
+            self._size = total_size
+
+    def entries(self) -> List[CacheEntry]:
+        """
+        List the entries, least recently used first.
+        Returns
+        -------
+        List[CacheEntry]
+
+        """
+        entries = []
+        for entry_path in self.directory.glob(f"*{_ENTRY_SUFFIX}"):
+            try:
+                stat_result = entry_path.stat()
+            except FileNotFoundError:
+                # Evicted by another process while listing
+                continue
+            entries.append(
+                CacheEntry(
+                    key=entry_path.name[: -len(_ENTRY_SUFFIX)],
+                    size=stat_result.st_size,
+                    last_used=datetime.fromtimestamp(stat_result.st_mtime),
+                )
+            )
+        return sorted(entries, key=lambda entry: entry.last_used)
+
+
+if __name__ == "__main__":
+    sys_args = sys.argv[1:]
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-d",
+        "--directory",
+        required=True,
+        type=str,
+        help="Directory of the cache to inspect",
+    )
+    parser.add_argument(
+        "--clear",
+        action="store_true",
+        help="Remove every entry of the cache",
+    )
+    cli_args = parser.parse_args(sys_args)
+    disk_cache = DiskCache(cli_args.directory)
+    if cli_args.clear:
+        disk_cache.clear()
+    for cache_entry in disk_cache.entries():
+        print(cache_entry.model_dump_json())
+    print(f"Total size: {disk_cache.size()} bytes")
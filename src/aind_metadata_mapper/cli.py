@@ -0,0 +1,141 @@
+"""Single command line entry point to run any of the etl jobs."""
+
+import argparse
+import importlib
+import sys
+from typing import TYPE_CHECKING, List, Optional
+
+from aind_metadata_mapper import arguments
+
+if TYPE_CHECKING:  # pragma: no cover
+    from aind_metadata_mapper.core import JobResponse
+
+# Maps the etl names accepted on the command line to the module and class
+# that implement them. Only the module of the chosen etl is imported, so
+# adding an etl here does not slow down the others. The neuropixels rig etls
+# and EphysEtl are left out: they are constructed from python objects, such
+# as parsed stage logs and probe mappings, rather than from the json of job
+# settings, so they cannot be run from a command line or a manifest.
+ETL_REGISTRY = {
+    "bergamo": ("aind_metadata_mapper.bergamo.session", "BergamoEtl"),
+    "fib": ("aind_metadata_mapper.fib.session", "FIBEtl"),
+    "gather-metadata": (
+        "aind_metadata_mapper.gather_metadata",
+        "GatherMetadataJob",
+    ),
+    "mesoscope": ("aind_metadata_mapper.mesoscope.session", "MesoscopeEtl"),
+}
+
+# Commands that are not etls, mapped to the module whose main function
+# implements them.
+COMMANDS = {
+    "manifest": "aind_metadata_mapper.manifest",
+    "serve": "aind_metadata_mapper.server",
+}
+
+
+def load_etl_class(etl_name: str) -> type:
+    """
+    Import the class registered under etl_name.
+    Parameters
+    ----------
+    etl_name : str
+      One of the keys of ETL_REGISTRY.
+
+    Returns
+    -------
+    type
+      A class with a from_args classmethod and a run_job method.
+
+    """
+    module_name, class_name = ETL_REGISTRY[etl_name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def run_registered_job(etl_name: str, job_settings: str) -> "JobResponse":
+    """
+    Construct a registered etl job from the json of its settings and run
+    it. This is the unit of work sent to worker processes by the server and
+    the manifest runner.
+    Parameters
+    ----------
+    etl_name : str
+      One of the keys of ETL_REGISTRY.
+    job_settings : str
+      Json string of the job settings.
+
+    Returns
+    -------
+    JobResponse
+      The response from run_job. Jobs that do not return a response, such as
+      GatherMetadataJob, get a 200 response once they finish. If the job
+      raises an error, a response with a 500 status_code is returned.
+
+    """
+    # Imported here since core loads aind_data_schema
+    from aind_metadata_mapper.core import JobResponse, _error_response
+
+    try:
+        job_response = load_etl_class(etl_name)(job_settings).run_job()
+    except Exception as e:
+        return _error_response(e)
+    if job_response is None:
+        return JobResponse(status_code=200, message="Job finished.")
+    return job_response
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Parse the etl name, then construct the etl from the remaining arguments
+    and run it. If the job returns a JobResponse, it is printed as json.
+    Other commands, such as serve and manifest, get the remaining arguments
+    instead.
+    Parameters
+    ----------
+    args : Optional[List[str]]
+      Command line arguments. Defaults to sys.argv[1:].
+
+    Returns
+    -------
+    int
+      Exit code. 1 if the job responded with a 500 status_code, else 0.
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="aind-metadata-mapper",
+        description="Run an etl job to map metadata into aind-data-schema.",
+    )
+    parser.add_argument(
+        "etl",
+        choices=sorted(ETL_REGISTRY) + sorted(COMMANDS),
+        help=(
+            "Name of the etl job to run. Or serve, to run jobs sent to a "
+            "local server, or manifest, to run the jobs in a jsonl file."
+        ),
+    )
+    parser.add_argument(
+        "etl_args",
+        nargs=argparse.REMAINDER,
+        help=(
+            "Arguments passed to the etl job. Use <etl> --help to list them."
+        ),
+    )
+    cli_args = parser.parse_args(args)
+    if cli_args.etl in COMMANDS:
+        command_module = importlib.import_module(COMMANDS[cli_args.etl])
+        return command_module.main(cli_args.etl_args)
+    # Parse the arguments before the etl module is imported, so that --help
+    # and usage errors do not wait for aind_data_schema to load
+    arguments.PARSERS[cli_args.etl](
+        f"aind-metadata-mapper {cli_args.etl}"
+    ).parse_args(cli_args.etl_args)
+    etl_class = load_etl_class(cli_args.etl)
+    job_response = etl_class.from_args(cli_args.etl_args).run_job()
+    if job_response is None:
+        return 0
+    print(job_response.model_dump_json())
+    return 1 if job_response.status_code >= 500 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
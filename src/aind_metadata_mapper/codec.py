@@ -0,0 +1,107 @@
+"""The json codec of the package. Json is parsed with orjson when it is
+installed, which parses bytes directly and is several times faster than the
+json module, and with the json module otherwise. Json is always written with
+the json module, since orjson formats its output differently, such as in its
+separators, indentation and escaping of non-ascii characters, and the files
+written by the package need to stay the same."""
+
+import json
+from pathlib import Path
+from typing import Any, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_backend = "json" if orjson is None else "orjson"
+
+
+def available_backends() -> List[str]:
+    """Names of the json parsers that can be used, fastest first."""
+    return ["json"] if orjson is None else ["orjson", "json"]
+
+
+def backend() -> str:
+    """Name of the json parser in use."""
+    return _backend
+
+
+def set_backend(name: str) -> None:
+    """
+    Choose the json parser, such as to compare them in benchmarks.
+    Parameters
+    ----------
+    name : str
+      One of available_backends().
+
+    Raises
+    ------
+    ValueError
+      If the parser is not installed.
+
+    """
+    global _backend
+    if name not in available_backends():
+        raise ValueError(
+            f"Unknown json backend {name}. "
+            f"Available backends are {available_backends()}"
+        )
+    _backend = name
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """
+    Parse a json document. Documents that orjson rejects but the json module
+    accepts, such as ones with NaN or integers over 64 bits, are parsed with
+    the json module, so both parsers return the same objects.
+    Parameters
+    ----------
+    data : Union[bytes, bytearray, str]
+      Json document. Bytes are parsed without decoding them to a str first.
+
+    Returns
+    -------
+    Any
+
+    """
+    if _backend == "orjson":
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def load(path: Union[Path, str]) -> Any:
+    """
+    Parse a json file.
+    Parameters
+    ----------
+    path : Union[Path, str]
+
+    Returns
+    -------
+    Any
+
+    """
+    return loads(Path(path).read_bytes())
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> bytes:
+    """
+    Serialize an object to json encoded as utf-8, the same as
+    json.dumps(obj, indent=indent).encode("utf-8").
+    Parameters
+    ----------
+    obj : Any
+    indent : Optional[int]
+      Number of spaces to indent nested values by. None writes the document
+      on one line.
+
+    Returns
+    -------
+    bytes
+
+    """
+    return json.dumps(obj, indent=indent).encode("utf-8")
@@ -1,19 +1,173 @@
 """Core abstract class that can be used as a template for etl jobs."""
 
 import argparse
+import asyncio
+import contextvars
 import logging
+import os
+import pickle
+import random
+import sys
+import zlib
 from abc import ABC, abstractmethod
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from enum import Enum
+from multiprocessing.context import BaseContext
 from os import PathLike
 from pathlib import Path
-from typing import Any, Generic, Optional, TypeVar, Union
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
+from aind_data_schema import __version__ as aind_data_schema_version
 from aind_data_schema.base import AindCoreModel
-from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    ValidationError,
+    field_serializer,
+)
 from pydantic_settings import BaseSettings
 
+from aind_metadata_mapper import __version__
+from aind_metadata_mapper.arguments import add_profiling_arguments
+from aind_metadata_mapper.cache import (
+    BaseCache,
+    fingerprint_files,
+    make_cache_key,
+)
+from aind_metadata_mapper.metrics import (
+    JobMetrics,
+    MemoryProfile,
+    measure_stage,
+    profile_cpu,
+    read_io_counters,
+    record_io,
+    report_memory_profile,
+    trace_memory,
+)
+from aind_metadata_mapper.sinks import (
+    BaseSink,
+    CollectingSink,
+    DirectorySink,
+    document_name,
+)
+from aind_metadata_mapper.staging import stage_inputs
+from aind_metadata_mapper.tracing import span, trace_to
+from aind_metadata_mapper.writers import WriteMode, write_model
+
 _T = TypeVar("_T", bound=BaseSettings)
 
 
+class ValidationMode(str, Enum):
+    """How thoroughly a constructed model is re-validated before loading.
+
+    STRICT re-validates the full model (default). ONCE trusts the validation
+    that already ran when the model was constructed and only checks that the
+    required fields were set. SAMPLED runs a STRICT check on a random 1 in N
+    jobs and a ONCE check on the rest. OFF skips validation entirely.
+    """
+
+    STRICT = "strict"
+    ONCE = "once"
+    SAMPLED = "sampled"
+    OFF = "off"
+
+
+def _resolve_validation_mode(
+    validation_mode: ValidationMode, validation_sample_rate: int
+) -> ValidationMode:
+    """
+    Resolve SAMPLED into either STRICT or ONCE for the current job. Each
+    job is drawn independently, so the rate holds across batches spread
+    over many worker processes.
+    Parameters
+    ----------
+    validation_mode : ValidationMode
+    validation_sample_rate : int
+      A STRICT check is run on a random 1 in validation_sample_rate jobs.
+
+    Returns
+    -------
+    ValidationMode
+      The mode to apply to the current job. Never SAMPLED.
+
+    """
+    if validation_mode != ValidationMode.SAMPLED:
+        return validation_mode
+    if random.random() * validation_sample_rate < 1:
+        return ValidationMode.STRICT
+    return ValidationMode.ONCE
+
+
+def _check_sample_rate(validation_sample_rate: int) -> int:
+    """Reject a validation_sample_rate below 1, which would run a STRICT
+    check on every job instead of 1 in validation_sample_rate."""
+    if validation_sample_rate < 1:
+        raise ValueError(
+            "validation_sample_rate needs to be at least 1, got "
+            f"{validation_sample_rate}"
+        )
+    return validation_sample_rate
+
+
+def _check_required_fields(
+    model_instance: AindCoreModel,
+) -> Optional[ValidationError]:
+    """
+    Cheap check that the required fields of the model_instance were set. A
+    model built through its constructor always passes this check, but a model
+    built with model_construct may not.
+    Parameters
+    ----------
+    model_instance : AindCoreModel
+      Model to check.
+
+    Returns
+    -------
+    Optional[ValidationError]
+      None if all the required fields are set. Else, returns a
+      ValidationError listing the missing fields.
+
+    """
+    missing_fields = [
+        field_name
+        for field_name, field_info in model_instance.model_fields.items()
+        if field_info.is_required()
+        and field_name not in model_instance.model_fields_set
+    ]
+    if not missing_fields:
+        return None
+    return ValidationError.from_exception_data(
+        title=type(model_instance).__name__,
+        line_errors=[
+            {"type": "missing", "loc": (field_name,), "input": {}}
+            for field_name in missing_fields
+        ],
+    )
+
+
 class JobResponse(BaseModel):
     """Standard model of a JobResponse."""
 
@@ -21,22 +175,597 @@ class JobResponse(BaseModel):
     status_code: int
     message: Optional[str] = Field(None)
     data: Optional[str] = Field(None)
+    data_reference: Optional[str] = Field(
+        None, description="Where the model was streamed to, if anywhere"
+    )
+    data_size: Optional[int] = Field(
+        None, description="Number of bytes streamed to data_reference"
+    )
+    written: Optional[bool] = Field(
+        None,
+        description=(
+            "Whether the model was written. False if the write was skipped "
+            "because the file on disk was unchanged."
+        ),
+    )
+    cache_hit: Optional[bool] = Field(
+        None,
+        description=(
+            "Whether the model came from the result cache. None if no "
+            "result cache is used."
+        ),
+    )
+    metrics: Optional[JobMetrics] = Field(None)
+    model: Optional[AindCoreModel] = Field(
+        None,
+        exclude=True,
+        description=(
+            "The model itself, if the job was run with return_model. It is "
+            "never serialized."
+        ),
+    )
+    # Set when data was left out in favor of the model, so that data is
+    # serialized from the model if the response is serialized.
+    _data_from_model: bool = PrivateAttr(False)
+    # Documents a job in a worker process wrote to its CollectingSink, which
+    # the parent process writes to the sink they are bound for.
+    _documents: Optional[List[Tuple[str, bytes]]] = PrivateAttr(None)
+
+    @field_serializer("data")
+    def _serialize_data(self, data: Optional[str]) -> Optional[str]:
+        """Serialize the model into data only once the response itself is
+        serialized, such as when it is sent to another process."""
+        if data is None and self._data_from_model:
+            return self.model.model_dump_json()
+        return data
+
+
+# Attributes of a BaseEtl that configure how a job runs rather than what it
+# produces, so they are left out of its cache keys.
+_RUN_OPTION_ATTRIBUTES = {
+    "output_directory",
+    "validation_mode",
+    "validation_sample_rate",
+    "write_mode",
+    "result_cache",
+    "extract_cache",
+    "profile_memory",
+    "memory_report_path",
+    "return_model",
+    "profile_path",
+    "trace_path",
+    "staging_cache",
+}
+
+# Returned by _read_cached on a miss, since None is a valid extract result.
+_MISSING = object()
+
+
+def _qualified_name(etl_class: type) -> str:
+    """Module and name of an etl class, which is part of its cache keys."""
+    return f"{etl_class.__module__}.{etl_class.__qualname__}"
+
+
+def _read_cached(cache: BaseCache, cache_key: str, default: Any = None) -> Any:
+    """
+    Read an object stored by _write_cached.
+    Parameters
+    ----------
+    cache : BaseCache
+    cache_key : str
+    default : Any
+      Returned if there is no entry or the entry cannot be read.
+
+    Returns
+    -------
+    Any
+
+    """
+    contents = cache.get(cache_key)
+    if contents is None:
+        return default
+    try:
+        return pickle.loads(zlib.decompress(contents))
+    except Exception as e:
+        logging.warning("Ignoring unreadable cache entry %s: %r", cache_key, e)
+        return default
+
+
+def _write_cached(cache: BaseCache, cache_key: str, value: Any) -> None:
+    """
+    Store an object in a cache as a compressed pickle. Pickles are used
+    rather than json so that dataclasses, and models built with
+    model_construct that may not validate, come back exactly as they were.
+    Parameters
+    ----------
+    cache : BaseCache
+    cache_key : str
+    value : Any
+
+    """
+    contents = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    cache.set(cache_key, zlib.compress(contents, 1))
+
+
+def _etl_cache_key(
+    etl: Union["GenericEtl", "BaseEtl"],
+    stage: str,
+    cache: BaseCache,
+    version: str,
+) -> str:
+    """
+    Key of an etl job in one of its caches.
+    Parameters
+    ----------
+    etl : Union[GenericEtl, BaseEtl]
+    stage : str
+      Which result is cached, such as extract or result.
+    cache : BaseCache
+      The cache the key is for. Decides how the inputs are fingerprinted.
+    version : str
+      Changes whenever the cached result would change for the same inputs.
+
+    Returns
+    -------
+    str
+      A hash of the stage, the etl class, the settings of the job, the
+      fingerprints of its input files and the version.
+
+    """
+    return make_cache_key(
+        stage,
+        _qualified_name(type(etl)),
+        etl._cache_settings(),
+        fingerprint_files(etl._input_files(), cache.content_hash),
+        version,
+    )
+
+
+def _extract_version(etl: Union["GenericEtl", "BaseEtl"]) -> str:
+    """Version part of the extract cache key. Besides the version of the etl
+    class, it has the versions of this package and of aind_data_schema,
+    whose classes are pickled with the extracted data and may not unpickle
+    once they change."""
+    return "-".join(
+        [etl._extract_cache_version, __version__, aind_data_schema_version]
+    )
+
+
+def _check_result_cache(
+    etl: Union["GenericEtl", "BaseEtl"],
+) -> Tuple[Optional[str], Optional[AindCoreModel]]:
+    """
+    Look up an etl job in its result cache.
+    Parameters
+    ----------
+    etl : Union[GenericEtl, BaseEtl]
+
+    Returns
+    -------
+    Tuple[Optional[str], Optional[AindCoreModel]]
+      The cache key and the cached model. The key is None if no result cache
+      is used and the model is None on a miss.
+
+    """
+    if etl.result_cache is None:
+        return None, None
+    cache_key = _etl_cache_key(etl, "result", etl.result_cache, __version__)
+    return cache_key, _read_cached(etl.result_cache, cache_key)
+
+
+def _cached_extract(etl: Union["GenericEtl", "BaseEtl"]) -> Any:
+    """
+    Run the extract stage of an etl job through its extract cache.
+    Parameters
+    ----------
+    etl : Union[GenericEtl, BaseEtl]
+
+    Returns
+    -------
+    Any
+      Output of the _extract method, or the cached output if the inputs of
+      the job are unchanged.
+
+    """
+    if etl.extract_cache is None:
+        return etl._extract()
+    cache_key = _etl_cache_key(
+        etl, "extract", etl.extract_cache, _extract_version(etl)
+    )
+    extracted = _read_cached(etl.extract_cache, cache_key, _MISSING)
+    if extracted is _MISSING:
+        extracted = etl._extract()
+        _write_cached(etl.extract_cache, cache_key, extracted)
+    else:
+        logging.debug("Loaded extracted data from cache entry %s", cache_key)
+    return extracted
+
+
+async def _acached_extract(
+    etl: Union["GenericEtl", "BaseEtl"], executor: Optional[Executor]
+) -> Any:
+    """
+    Same as _cached_extract, but the extract stage is awaited through
+    _aextract and the cache is read and written in an executor.
+    Parameters
+    ----------
+    etl : Union[GenericEtl, BaseEtl]
+    executor : Optional[Executor]
+      If None, the default executor of the running event loop is used.
+
+    Returns
+    -------
+    Any
+
+    """
+    if etl.extract_cache is None:
+        return await etl._aextract()
+    loop = asyncio.get_running_loop()
+    cache_key = await loop.run_in_executor(
+        executor,
+        _etl_cache_key,
+        etl,
+        "extract",
+        etl.extract_cache,
+        _extract_version(etl),
+    )
+    extracted = await loop.run_in_executor(
+        executor, _read_cached, etl.extract_cache, cache_key, _MISSING
+    )
+    if extracted is _MISSING:
+        extracted = await etl._aextract()
+        await loop.run_in_executor(
+            executor, _write_cached, etl.extract_cache, cache_key, extracted
+        )
+    return extracted
+
+
+def _run_etl_job(
+    etl_class: Type["GenericEtl"],
+    job_settings: Union[BaseSettings, str],
+    etl_kwargs: dict,
+) -> JobResponse:
+    """
+    Construct and run a single etl job. This is the unit of work sent to the
+    worker processes in GenericEtl.run_many, so it needs to be a module level
+    function.
+    Parameters
+    ----------
+    etl_class : Type[GenericEtl]
+      The etl class to construct.
+    job_settings : Union[BaseSettings, str]
+      Settings passed to the etl class constructor.
+    etl_kwargs : dict
+      Extra keyword arguments passed to the etl class constructor.
+
+    Returns
+    -------
+    JobResponse
+      The response from run_job. If the job raises an error, a response with
+      a 500 status_code is returned instead so that one bad session does not
+      stop a batch.
+
+    """
+    try:
+        etl = etl_class(job_settings=job_settings, **etl_kwargs)
+        return _attach_documents(etl, etl.run_job())
+    except Exception as e:
+        return _error_response(e)
+
+
+def _collect_documents(etl_kwargs: dict) -> Tuple[dict, Optional[BaseSink]]:
+    """
+    Swap the sink in the kwargs of jobs sent to worker processes for a
+    CollectingSink. Sinks other than a DirectorySink hold locks and open
+    files, which cannot be pickled, and batch sinks need a single writer.
+    Parameters
+    ----------
+    etl_kwargs : dict
+      Keyword arguments passed to the etl class constructor.
+
+    Returns
+    -------
+    Tuple[dict, Optional[BaseSink]]
+      The kwargs to send to the workers, and the sink to write the
+      collected documents to in the parent process, if any.
+
+    """
+    sink = etl_kwargs.get("sink")
+    if sink is None or isinstance(sink, DirectorySink):
+        return etl_kwargs, None
+    return {**etl_kwargs, "sink": CollectingSink(sink.location)}, sink
+
+
+def _attach_documents(
+    etl: Union["GenericEtl", "BaseEtl"], job_response: JobResponse
+) -> JobResponse:
+    """Attach the documents the job collected in a worker process to its
+    response, so that they are sent back with it."""
+    if isinstance(getattr(etl, "sink", None), CollectingSink):
+        job_response._documents = etl.sink.documents
+    return job_response
+
+
+def _write_collected(
+    job_response: JobResponse, sink: Optional[BaseSink]
+) -> JobResponse:
+    """
+    Write the documents a job collected in a worker process to their sink.
+    Parameters
+    ----------
+    job_response : JobResponse
+      Response of the job, with the documents it collected, if any.
+    sink : Optional[BaseSink]
+      The sink passed to the runner.
+
+    Returns
+    -------
+    JobResponse
+      The same response, with a 500 status_code if the write failed.
+
+    """
+    documents = job_response._documents
+    if sink is None or documents is None:
+        return job_response
+    job_response._documents = None
+    try:
+        for name, contents in documents:
+            sink.write(name, contents)
+    except Exception as e:
+        validation_message = job_response.message.split("\n")[-1]
+        job_response.status_code = 500
+        job_response.message = (
+            f"Error writing to {sink.location}: {repr(e)}\n"
+            + validation_message
+        )
+    return job_response
+
+
+def _process_pool(
+    workers: int,
+    max_tasks_per_worker: Optional[int],
+    initializer: Optional[Callable[[], None]] = None,
+    mp_context: Optional[BaseContext] = None,
+) -> ProcessPoolExecutor:
+    """
+    Start a pool of worker processes.
+    Parameters
+    ----------
+    workers : int
+    max_tasks_per_worker : Optional[int]
+      Number of jobs a worker runs before it is replaced with a fresh
+      process. Workers are started with spawn then, since recycled workers
+      cannot be forked. Ignored before Python 3.11, where workers live as
+      long as the pool.
+    initializer : Optional[Callable[[], None]]
+      Module level function run in each worker when it starts.
+    mp_context : Optional[BaseContext]
+      Multiprocessing context that starts the workers. Defaults to the one
+      picked by ProcessPoolExecutor.
+
+    Returns
+    -------
+    ProcessPoolExecutor
+
+    """
+    if max_tasks_per_worker is None or sys.version_info < (3, 11):
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=initializer,
+        )
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        max_tasks_per_child=max_tasks_per_worker,
+        initializer=initializer,
+    )
+
+
+def _error_response(e: BaseException) -> JobResponse:
+    """Response of a job that raised e, or that was lost with its worker
+    process if e is a BrokenProcessPool."""
+    return JobResponse(
+        status_code=500, message=f"Error running job: {repr(e)}"
+    )
+
+
+def _wait_for_jobs(
+    pending: Dict[Future, Any], executor: Optional[ProcessPoolExecutor]
+) -> Tuple[List[Tuple[Any, JobResponse]], Optional[ProcessPoolExecutor]]:
+    """
+    Wait for at least one pending job to finish.
+    Parameters
+    ----------
+    pending : Dict[Future, Any]
+      Futures of the pending jobs and their keys. The finished jobs are
+      removed from it.
+    executor : Optional[ProcessPoolExecutor]
+      Pool the jobs were submitted to.
+
+    Returns
+    -------
+    Tuple[List[Tuple[Any, JobResponse]], Optional[ProcessPoolExecutor]]
+      Pairs of (key, response) of the finished jobs, and the pool, or None
+      if a worker process died and the pool was shut down.
+
+    """
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    finished = []
+    for future in done:
+        key = pending.pop(future)
+        e = future.exception()
+        if isinstance(e, BrokenProcessPool) and executor is not None:
+            # The other pending jobs of the pool are lost with it
+            executor.shutdown(wait=False)
+            executor = None
+        finished.append((key, _error_response(e) if e else future.result()))
+    return finished, executor
+
+
+def _run_in_pool(
+    tasks: Iterable[Tuple[Any, tuple]],
+    workers: Optional[int] = None,
+    max_tasks_per_worker: Optional[int] = None,
+    job_function: Callable[..., JobResponse] = _run_etl_job,
+) -> Iterator[Tuple[Any, JobResponse]]:
+    """
+    Run job_function over tasks in a process pool and yield the responses as
+    each job finishes. At most 2 * workers jobs are submitted at a time, so
+    neither the pending tasks nor the finished responses pile up in memory.
+    If a worker process dies, such as when it is killed for running out of
+    memory, the jobs submitted to the pool that had not finished are lost.
+    They are reported with a 500 status_code and the remaining tasks run in
+    a new pool.
+    Parameters
+    ----------
+    tasks : Iterable[Tuple[Any, tuple]]
+      Pairs of (key, args) where args are passed to job_function. The key is
+      yielded back with the response so callers can tell the jobs apart.
+    workers : Optional[int]
+      Number of worker processes. Defaults to the number of cpus.
+    max_tasks_per_worker : Optional[int]
+      Number of jobs a worker runs before it is replaced with a fresh
+      process. None means workers live as long as the pool.
+    job_function : Callable[..., JobResponse]
+      Module level function that runs one job. Default is _run_etl_job.
+
+    Returns
+    -------
+    Iterator[Tuple[Any, JobResponse]]
+      Pairs of (key, response) in the order the jobs finish.
+
+    """
+    workers = workers or os.cpu_count() or 1
+    pending: Dict[Future, Any] = {}
+    executor = None
+    try:
+        for key, args in tasks:
+            if executor is None:
+                executor = _process_pool(workers, max_tasks_per_worker)
+            try:
+                future = executor.submit(job_function, *args)
+            except BrokenProcessPool:
+                executor.shutdown(wait=False)
+                executor = _process_pool(workers, max_tasks_per_worker)
+                future = executor.submit(job_function, *args)
+            pending[future] = key
+            if len(pending) >= 2 * workers:
+                finished, executor = _wait_for_jobs(pending, executor)
+                yield from finished
+        while pending:
+            finished, executor = _wait_for_jobs(pending, executor)
+            yield from finished
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=not pending, cancel_futures=True)
 
 
 class GenericEtl(ABC, Generic[_T]):
     """A generic etl class. Child classes will need to create a JobSettings
     object that is json serializable. Child class will also need to implement
-    the run_job method, which returns a JobResponse object."""
+    the _extract and _transform methods. The run_job method returns a
+    JobResponse object."""
+
+    # Part of the extract cache key. Child classes need to bump it when the
+    # output of their _extract method changes for the same inputs.
+    _extract_cache_version = "1"
 
-    def __init__(self, job_settings: _T):
+    def __init__(
+        self,
+        job_settings: _T,
+        validation_mode: ValidationMode = ValidationMode.STRICT,
+        validation_sample_rate: int = 10,
+        output_stream: Optional[BinaryIO] = None,
+        write_mode: WriteMode = WriteMode.OVERWRITE,
+        result_cache: Optional[BaseCache] = None,
+        extract_cache: Optional[BaseCache] = None,
+        profile_memory: bool = False,
+        memory_report_path: Optional[Union[Path, str]] = None,
+        return_model: bool = False,
+        profile_path: Optional[Union[Path, str]] = None,
+        trace_path: Optional[Union[Path, str]] = None,
+        sink: Optional[BaseSink] = None,
+        staging_cache: Optional[BaseCache] = None,
+    ):
         """
         Class constructor for the GenericEtl class.
         Parameters
         ----------
         job_settings : _T
           Generic type that is bound by the BaseSettings class.
+        validation_mode : ValidationMode
+          How thoroughly to re-validate the model before loading it. Default
+          is STRICT.
+        validation_sample_rate : int
+          In SAMPLED mode, a STRICT check is run on a random 1 in this
+          many jobs. Needs to be at least 1. Default is 10.
+        output_stream : Optional[BinaryIO]
+          Writable binary stream, such as a file, pipe or socket file, to
+          serialize the model into. If set, it is used instead of the
+          output_directory and the model is not returned in the JobResponse.
+        write_mode : WriteMode
+          How the model is written to the output_directory. Default is
+          OVERWRITE. SKIP_UNCHANGED skips rewriting a file whose contents
+          have not changed and writes changed files atomically.
+        result_cache : Optional[BaseCache]
+          If set, the model is looked up in this cache by the job settings
+          and the inputs of the job, and extract and transform are skipped
+          on a hit. Default is None.
+        extract_cache : Optional[BaseCache]
+          If set, the output of _extract is looked up in this cache by the
+          job settings and the inputs of the job, and extract is skipped on
+          a hit. Entries are pickles, so a DiskCache needs to be in a
+          directory only trusted users can write to. Default is None.
+        profile_memory : bool
+          If True, run_job traces the memory allocated by each stage and
+          attaches the peak memory and the top allocation sites to the
+          metrics of the JobResponse. Tracing slows the job down. arun_job
+          does not profile, since concurrent jobs share the tracer. Default
+          is False.
+        memory_report_path : Optional[Union[Path, str]]
+          If set, run_job profiles memory and also writes the profile to
+          this file as json. Default is None.
+        return_model : bool
+          If True, the model itself is returned in the model field of the
+          JobResponse, so in-process callers do not need to parse and
+          validate the json again. Without an output_directory or
+          output_stream, the json is then only made if the JobResponse is
+          serialized, instead of into data. Default is False.
+        profile_path : Optional[Union[Path, str]]
+          If set, run_job profiles each stage with cProfile and writes the
+          stats to this file, along with a summary of the slowest functions
+          of each stage. Profiling slows the job down. Default is None.
+        trace_path : Optional[Union[Path, str]]
+          If set, run_job traces its stages and steps such as reading files
+          and writes the spans to this file in the Chrome trace event
+          format. Default is None.
+        sink : Optional[BaseSink]
+          If set, the model is written to this sink instead of its file in
+          the output_directory, under the name of that file. The sink is not
+          flushed by the job. Default is None.
+        staging_cache : Optional[BaseCache]
+          If set, run_job reads the input files in large blocks that are
+          kept in this cache, such as a DiskCache on a local ssd, and
+          attaches the hits and misses to the metrics of the JobResponse.
+          Default is None.
         """
         self.job_settings = job_settings
+        self.validation_mode = ValidationMode(validation_mode)
+        self.validation_sample_rate = _check_sample_rate(
+            validation_sample_rate
+        )
+        self.output_stream = output_stream
+        self.write_mode = WriteMode(write_mode)
+        self.result_cache = result_cache
+        self.extract_cache = extract_cache
+        self.profile_memory = profile_memory or memory_report_path is not None
+        self.memory_report_path = memory_report_path
+        self.return_model = return_model
+        self.profile_path = profile_path
+        self.trace_path = trace_path
+        self.sink = sink
+        self.staging_cache = staging_cache
 
     @staticmethod
     def _run_validation_check(
@@ -61,65 +790,476 @@ class GenericEtl(ABC, Generic[_T]):
             logging.debug("No validation errors detected.")
             return None
         except ValidationError as e:
-            logging.debug(f"Validation errors detected: {repr(e)}")
+            logging.debug("Validation errors detected: %r", e)
             return e
 
+    def _validate_output(
+        self, model_instance: AindCoreModel
+    ) -> Optional[ValidationError]:
+        """
+        Validate the model_instance according to self.validation_mode.
+        Parameters
+        ----------
+        model_instance : AindCoreModel
+          Model to validate.
+
+        Returns
+        -------
+        Optional[ValidationError]
+          None if no validation errors are detected or validation is off.
+          Else, returns the ValidationError object.
+
+        """
+        validation_mode = _resolve_validation_mode(
+            self.validation_mode, self.validation_sample_rate
+        )
+        if validation_mode == ValidationMode.STRICT:
+            return self._run_validation_check(model_instance)
+        elif validation_mode == ValidationMode.ONCE:
+            return _check_required_fields(model_instance)
+        else:
+            return None
+
     def _load(
-        self, output_model: AindCoreModel, output_directory: Optional[Path]
+        self,
+        output_model: AindCoreModel,
+        output_directory: Optional[Path],
+        metrics: Optional[JobMetrics] = None,
     ) -> JobResponse:
         """
-        Will write to an output directory if an output_directory is not None.
-        If output_directory is None, then the model will be returned as json
-        in the JobResponse object.
+        Will write to an output directory if an output_directory is not None,
+        according to self.write_mode. If output_directory is None, then the
+        model will be returned as json in the JobResponse object. If
+        self.output_stream is set, the model is
+        serialized into it instead and only its name and the number of bytes
+        written are returned in the JobResponse object. If self.sink is set,
+        the model is written to it under the name of its file in
+        output_directory, even if output_directory is None. If
+        self.return_model is set, the model itself is also returned, and it
+        replaces the json when it is not written anywhere.
         Parameters
         ----------
         output_model : AindCoreModel
           The final model that has been constructed.
         output_directory : Optional[Path]
           Path to write the model to.
+        metrics : Optional[JobMetrics]
+          If set, the validation and load times are recorded on it and it is
+          attached to the JobResponse.
 
         Returns
         -------
         JobResponse
           The JobResponse object with information about the model. The
-          status_codes are:
+          status_codes are the same in every validation_mode:
           200 - No validation errors on the model and written without errors
           406 - There were validation errors on the model
-          500 - There were errors writing the model to output_directory
+          500 - There were errors writing the model to output_directory,
+          output_stream or sink
 
         """
-        validation_errors = self._run_validation_check(output_model)
+        with measure_stage(metrics, "validation"):
+            validation_errors = self._validate_output(output_model)
         if validation_errors:
             validation_message = (
                 f"Validation errors detected: {repr(validation_errors)}"
             )
             status_code = 406
+        elif self.validation_mode == ValidationMode.OFF:
+            validation_message = "Validation skipped."
+            status_code = 200
         else:
             validation_message = "No validation errors detected."
             status_code = 200
-        if output_directory is None:
-            data = output_model.model_dump_json()
-            message = validation_message
-        else:
+        with measure_stage(metrics, "load"):
             data = None
-            try:
-                output_model.write_standard_file(
-                    output_directory=output_directory
+            data_reference = None
+            data_size = None
+            written = None
+            data_from_model = False
+            if (
+                output_directory is None
+                and self.output_stream is None
+                and self.sink is None
+            ):
+                data_from_model = self.return_model
+                if not data_from_model:
+                    data = output_model.model_dump_json()
+                message = validation_message
+            else:
+                destination = self._destination(output_directory)
+                try:
+                    written, data_size = self._write_output(
+                        output_model, output_directory
+                    )
+                    if self.output_stream is not None:
+                        data_reference = destination
+                    write_action = (
+                        "Write model to"
+                        if written
+                        else "Skip writing unchanged model to"
+                    )
+                    message = (
+                        f"{write_action} {destination}\n" + validation_message
+                    )
+                except Exception as e:
+                    message = (
+                        f"Error writing to {destination}: {repr(e)}\n"
+                        + validation_message
+                    )
+                    status_code = 500
+        job_response = JobResponse(
+            status_code=status_code,
+            message=message,
+            data=data,
+            data_reference=data_reference,
+            data_size=data_size,
+            written=written,
+            metrics=metrics,
+            model=output_model if self.return_model else None,
+        )
+        job_response._data_from_model = data_from_model
+        return job_response
+
+    def _destination(self, output_directory: Optional[Path]) -> str:
+        """Where _write_output writes the model, for messages."""
+        if self.output_stream is not None:
+            return str(
+                getattr(self.output_stream, "name", repr(self.output_stream))
+            )
+        elif self.sink is not None:
+            return self.sink.location
+        else:
+            return str(output_directory)
+
+    def _write_output(
+        self, output_model: AindCoreModel, output_directory: Optional[Path]
+    ) -> Tuple[bool, Optional[int]]:
+        """
+        Write the model to self.output_stream if it is set, else to
+        self.sink if it is set, else to its file in output_directory.
+        Parameters
+        ----------
+        output_model : AindCoreModel
+        output_directory : Optional[Path]
+
+        Returns
+        -------
+        Tuple[bool, Optional[int]]
+          Whether the model was written, and the number of bytes written to
+          the output_stream.
+
+        """
+        if self.output_stream is not None:
+            return True, self._stream_model(output_model)
+        elif self.sink is not None:
+            written = self.sink.write(
+                document_name(
+                    output_directory, output_model.default_filename()
+                ),
+                output_model.model_dump_json(indent=3).encode("utf-8"),
+            )
+            return written, None
+        else:
+            written = write_model(
+                output_model, output_directory, self.write_mode
+            )
+            return written, None
+
+    def _stream_model(self, output_model: AindCoreModel) -> int:
+        """
+        Serialize output_model straight into self.output_stream.
+        Parameters
+        ----------
+        output_model : AindCoreModel
+          The final model that has been constructed.
+
+        Returns
+        -------
+        int
+          The number of bytes written.
+
+        """
+        # Serialize to bytes directly, which skips the decode and encode
+        # copies that model_dump_json followed by a write would make.
+        contents = output_model.__pydantic_serializer__.to_json(output_model)
+        self.output_stream.write(contents)
+        self.output_stream.flush()
+        return len(contents)
+
+    @abstractmethod
+    def _extract(self) -> Any:
+        """
+        Extract the data from the sources defined in self.job_settings.
+        Returns
+        -------
+        Any
+          Whatever the _transform method expects.
+
+        """
+
+    @abstractmethod
+    def _transform(self, extracted_source: Any) -> AindCoreModel:
+        """
+        Transform the data extracted from the extract method.
+        Parameters
+        ----------
+        extracted_source : Any
+          Output from _extract method.
+
+        Returns
+        -------
+        AindCoreModel
+
+        """
+
+    async def _aextract(self) -> Any:
+        """
+        Async version of _extract. By default, _extract is run in a worker
+        thread so the event loop can keep other jobs' reads in flight. Child
+        classes that read several files can override this to issue the reads
+        concurrently.
+        Returns
+        -------
+        Any
+          Same as _extract.
+
+        """
+        return await asyncio.to_thread(self._extract)
+
+    def _input_files(self) -> List[Path]:
+        """
+        Files read by the extract and transform stages. They are
+        fingerprinted into the result cache key, so a changed input is not
+        served from the cache. By default, these are the paths in the job
+        settings other than the output_directory, where a directory stands
+        for the files directly inside it. Child classes that read other files
+        need to override this.
+        Returns
+        -------
+        List[Path]
+
+        """
+        return [
+            value
+            for name, value in self.job_settings
+            if isinstance(value, Path) and name != "output_directory"
+        ]
+
+    def _cache_settings(self) -> dict:
+        """Canonical json of the job settings, which is part of the cache
+        keys of the job. The output_directory is left out, since it does not
+        change what the job produces."""
+        return self.job_settings.model_dump(
+            mode="json", exclude={"output_directory"}
+        )
+
+    def _transform_and_load(
+        self,
+        extracted_source: Any,
+        metrics: Optional[JobMetrics] = None,
+        cache_key: Optional[str] = None,
+    ) -> JobResponse:
+        """
+        Transform the extracted data and load the resulting model.
+        Parameters
+        ----------
+        extracted_source : Any
+          Output from _extract method.
+        metrics : Optional[JobMetrics]
+          If set, the stage times are recorded on it and it is attached to
+          the JobResponse.
+        cache_key : Optional[str]
+          If set, the model is stored in the result cache under this key.
+
+        Returns
+        -------
+        JobResponse
+
+        """
+        with measure_stage(metrics, "transform"):
+            transformed = self._transform(extracted_source=extracted_source)
+        if cache_key is not None:
+            _write_cached(self.result_cache, cache_key, transformed)
+        return self._load(
+            transformed,
+            getattr(self.job_settings, "output_directory", None),
+            metrics=metrics,
+        )
+
+    def _load_cached(
+        self,
+        cache_key: Optional[str],
+        cached_model: Optional[AindCoreModel],
+        metrics: JobMetrics,
+    ) -> JobResponse:
+        """
+        Load a model from the result cache and mark the JobResponse as a
+        cache hit.
+        Parameters
+        ----------
+        cache_key : Optional[str]
+          Key the model was found under.
+        cached_model : Optional[AindCoreModel]
+          The model from the result cache.
+        metrics : JobMetrics
+          The validation and load times are recorded on it.
+
+        Returns
+        -------
+        JobResponse
+
+        """
+        job_response = self._load(
+            cached_model,
+            getattr(self.job_settings, "output_directory", None),
+            metrics=metrics,
+        )
+        logging.debug("Loaded model from result cache entry %s", cache_key)
+        job_response.cache_hit = True
+        return job_response
+
+    def run_job(self) -> JobResponse:
+        """Run the etl job and return a JobResponse. The time spent in each
+        stage and the bytes read and written are recorded in the metrics of
+        the JobResponse, along with the memory profile if profile_memory is
+        set. If profile_path is set, the cpu profile of the stages is written
+        to it, and if trace_path is set, their spans are written to it. If a
+        result cache is set and has the model, extract and transform are
+        skipped. If a staging cache is set, the inputs are read through it."""
+        metrics = JobMetrics(
+            memory=MemoryProfile() if self.profile_memory else None
+        )
+        io_start = read_io_counters()
+        with (
+            trace_to(self.trace_path),
+            span("run_job", etl=type(self).__name__),
+            trace_memory(metrics.memory),
+            profile_cpu(metrics, self.profile_path),
+            stage_inputs(self.staging_cache) as staging_stats,
+        ):
+            cache_key, cached_model = _check_result_cache(self)
+            if cached_model is not None:
+                job_response = self._load_cached(
+                    cache_key, cached_model, metrics
+                )
+            else:
+                with measure_stage(metrics, "extract"):
+                    extracted = _cached_extract(self)
+                job_response = self._transform_and_load(
+                    extracted, metrics, cache_key
                 )
-                message = (
-                    f"Write model to {output_directory}\n" + validation_message
+                if cache_key is not None:
+                    job_response.cache_hit = False
+        job_response.metrics.staging = staging_stats
+        record_io(job_response.metrics, io_start)
+        if self.memory_report_path is not None:
+            report_memory_profile(metrics.memory, self.memory_report_path)
+        return job_response
+
+    async def arun_job(
+        self, executor: Optional[Executor] = None
+    ) -> JobResponse:
+        """
+        Run the etl job from an event loop. The extract stage is awaited
+        through _aextract while the CPU-bound transform, validation and load
+        are run in an executor. The default executor of the event loop is
+        used for both, so it may need to be sized up with
+        loop.set_default_executor to keep hundreds of jobs in flight. Since
+        other jobs run at the same time, the extract cpu time and the byte
+        counters in the metrics are only approximate. If a staging cache is
+        set, the inputs are read through it.
+        Parameters
+        ----------
+        executor : Optional[Executor]
+          Executor to run the transform and load stages in. If None, the
+          default executor of the running event loop is used.
+
+        Returns
+        -------
+        JobResponse
+
+        """
+        metrics = JobMetrics()
+        io_start = read_io_counters()
+        loop = asyncio.get_running_loop()
+        cache_key, cached_model = await loop.run_in_executor(
+            executor, _check_result_cache, self
+        )
+        with stage_inputs(self.staging_cache) as staging_stats:
+            # The executor does not copy the context, which holds the stager
+            context = contextvars.copy_context()
+            if cached_model is not None:
+                job_response = await loop.run_in_executor(
+                    executor,
+                    self._load_cached,
+                    cache_key,
+                    cached_model,
+                    metrics,
                 )
-            except Exception as e:
-                message = (
-                    f"Error writing to {output_directory}: {repr(e)}\n"
-                    + validation_message
+            else:
+                with measure_stage(metrics, "extract"):
+                    extracted = await _acached_extract(self, executor)
+                job_response = await loop.run_in_executor(
+                    executor,
+                    context.run,
+                    self._transform_and_load,
+                    extracted,
+                    metrics,
+                    cache_key,
                 )
-                status_code = 500
-        return JobResponse(status_code=status_code, message=message, data=data)
+                if cache_key is not None:
+                    job_response.cache_hit = False
+        job_response.metrics.staging = staging_stats
+        record_io(job_response.metrics, io_start)
+        return job_response
 
-    @abstractmethod
-    def run_job(self) -> JobResponse:
-        """Abstract method that needs to be implemented by child classes."""
+    @classmethod
+    def run_many(
+        cls,
+        settings_iterable: Iterable[Union[_T, str]],
+        workers: Optional[int] = None,
+        max_tasks_per_worker: Optional[int] = 100,
+        **kwargs,
+    ) -> Iterator[JobResponse]:
+        """
+        Run one job per job settings over a pool of worker processes. The
+        workers import the package once and are reused across jobs, so a
+        batch does not pay interpreter startup for every session. If a sink
+        is passed, the workers send the documents back and they are written
+        to it in this process.
+        Parameters
+        ----------
+        settings_iterable : Iterable[Union[_T, str]]
+          Job settings, or json strings of job settings, one per job. It is
+          consumed lazily, so it can be a generator over a large backfill.
+        workers : Optional[int]
+          Number of worker processes. Defaults to the number of cpus.
+        max_tasks_per_worker : Optional[int]
+          Number of jobs a worker runs before it is replaced with a fresh
+          process, which bounds memory leaked by file readers. Default is
+          100. None means workers are never replaced.
+        **kwargs
+          Passed to the class constructor for every job, such as
+          validation_mode.
+
+        Returns
+        -------
+        Iterator[JobResponse]
+          One response per job, yielded as each job finishes. Jobs that raise
+          an error, or that are lost when a worker process dies, are
+          reported with a 500 status_code.
+
+        """
+        kwargs, sink = _collect_documents(kwargs)
+        tasks = (
+            (None, (cls, job_settings, kwargs))
+            for job_settings in settings_iterable
+        )
+        for _, job_response in _run_in_pool(
+            tasks, workers=workers, max_tasks_per_worker=max_tasks_per_worker
+        ):
+            yield _write_collected(job_response, sink)
 
 
 # TODO: Deprecated class
@@ -127,8 +1267,24 @@ class BaseEtl(ABC):
     """Base etl class. Defines interface for extracting, transforming, and
     loading input sources into a json file saved locally."""
 
+    # Part of the extract cache key. Child classes need to bump it when the
+    # output of their _extract method changes for the same inputs.
+    _extract_cache_version = "1"
+
     def __init__(
-        self, input_source: Union[PathLike, str], output_directory: Path
+        self,
+        input_source: Union[PathLike, str],
+        output_directory: Path,
+        validation_mode: ValidationMode = ValidationMode.STRICT,
+        validation_sample_rate: int = 10,
+        write_mode: WriteMode = WriteMode.OVERWRITE,
+        result_cache: Optional[BaseCache] = None,
+        extract_cache: Optional[BaseCache] = None,
+        profile_memory: bool = False,
+        memory_report_path: Optional[Union[Path, str]] = None,
+        profile_path: Optional[Union[Path, str]] = None,
+        trace_path: Optional[Union[Path, str]] = None,
+        staging_cache: Optional[BaseCache] = None,
     ):
         """
         Class constructor for Base etl class.
@@ -138,9 +1294,59 @@ class BaseEtl(ABC):
           Can be a string or a Path
         output_directory : Path
           The directory where to save the json files.
+        validation_mode : ValidationMode
+          How thoroughly to re-validate the model before loading it. Default
+          is STRICT.
+        validation_sample_rate : int
+          In SAMPLED mode, a STRICT check is run on a random 1 in this
+          many jobs. Needs to be at least 1. Default is 10.
+        write_mode : WriteMode
+          How the model is written to the output_directory. Default is
+          OVERWRITE. SKIP_UNCHANGED skips rewriting a file whose contents
+          have not changed and writes changed files atomically.
+        result_cache : Optional[BaseCache]
+          If set, the model is looked up in this cache by the attributes and
+          the inputs of the job, and extract and transform are skipped on a
+          hit. Default is None.
+        extract_cache : Optional[BaseCache]
+          If set, the output of _extract is looked up in this cache by the
+          attributes and the inputs of the job, and extract is skipped on a
+          hit. Entries are pickles, so a DiskCache needs to be in a
+          directory only trusted users can write to. Default is None.
+        profile_memory : bool
+          If True, run_job traces the memory allocated by each stage and
+          logs the peak memory and the top allocation sites. Tracing slows
+          the job down. Default is False.
+        memory_report_path : Optional[Union[Path, str]]
+          If set, run_job profiles memory and writes the profile to this
+          file as json instead of logging it. Default is None.
+        profile_path : Optional[Union[Path, str]]
+          If set, run_job profiles each stage with cProfile and writes the
+          stats to this file, along with a summary of the slowest functions
+          of each stage. Profiling slows the job down. Default is None.
+        trace_path : Optional[Union[Path, str]]
+          If set, run_job traces its stages and steps such as reading files
+          and writes the spans to this file in the Chrome trace event
+          format. Default is None.
+        staging_cache : Optional[BaseCache]
+          If set, run_job reads the input files in large blocks that are
+          kept in this cache, such as a DiskCache on a local ssd, and logs
+          the hits and misses. Default is None.
         """
         self.input_source = input_source
         self.output_directory = output_directory
+        self.validation_mode = ValidationMode(validation_mode)
+        self.validation_sample_rate = _check_sample_rate(
+            validation_sample_rate
+        )
+        self.write_mode = WriteMode(write_mode)
+        self.result_cache = result_cache
+        self.extract_cache = extract_cache
+        self.profile_memory = profile_memory or memory_report_path is not None
+        self.memory_report_path = memory_report_path
+        self.profile_path = profile_path
+        self.trace_path = trace_path
+        self.staging_cache = staging_cache
 
     @abstractmethod
     def _extract(self) -> Any:
@@ -181,9 +1387,13 @@ class BaseEtl(ABC):
         None
 
         """
-        transformed_data.write_standard_file(
-            output_directory=self.output_directory
+        written = write_model(
+            transformed_data, self.output_directory, self.write_mode
         )
+        if not written:
+            logging.info(
+                "Skipped writing unchanged model to %s", self.output_directory
+            )
 
     @staticmethod
     def _run_validation_check(model_instance: AindCoreModel) -> None:
@@ -206,18 +1416,193 @@ class BaseEtl(ABC):
                 exc_info=True,
             )
 
+    def _validate_output(self, model_instance: AindCoreModel) -> None:
+        """
+        Validate the model_instance according to self.validation_mode.
+        Parameters
+        ----------
+        model_instance : AindCoreModel
+          Model to validate.
+        """
+        validation_mode = _resolve_validation_mode(
+            self.validation_mode, self.validation_sample_rate
+        )
+        if validation_mode == ValidationMode.STRICT:
+            self._run_validation_check(model_instance)
+        elif validation_mode == ValidationMode.ONCE:
+            if _check_required_fields(model_instance) is not None:
+                logging.warning(
+                    "Validation errors were found. Required fields are "
+                    "missing from the model.",
+                )
+
+    async def _aextract(self) -> Any:
+        """
+        Async version of _extract. By default, _extract is run in a worker
+        thread. Child classes that read several files can override this to
+        issue the reads concurrently.
+        Returns
+        -------
+        Any
+          Same as _extract.
+
+        """
+        return await asyncio.to_thread(self._extract)
+
+    def _input_files(self) -> List[Path]:
+        """
+        Files read by the extract and transform stages. They are
+        fingerprinted into the result cache key, so a changed input is not
+        served from the cache. By default, this is the input_source, where a
+        directory stands for the files directly inside it. Child classes that
+        read other files need to override this.
+        Returns
+        -------
+        List[Path]
+
+        """
+        return [Path(self.input_source)] if self.input_source else []
+
+    def _cache_settings(self) -> dict:
+        """Attributes of the job other than its run options, which are part
+        of the cache keys of the job."""
+        return {
+            name: value
+            for name, value in vars(self).items()
+            if name not in _RUN_OPTION_ATTRIBUTES
+        }
+
+    def _transform_and_load(
+        self,
+        extracted_source: Any,
+        cache_key: Optional[str] = None,
+        metrics: Optional[JobMetrics] = None,
+    ) -> None:
+        """
+        Transform, validate and load the extracted data.
+        Parameters
+        ----------
+        extracted_source : Any
+          Output from _extract method.
+        cache_key : Optional[str]
+          If set, the model is stored in the result cache under this key.
+        metrics : Optional[JobMetrics]
+          If set, the stages are measured on it.
+
+        Returns
+        -------
+        None
+
+        """
+        with measure_stage(metrics, "transform"):
+            transformed = self._transform(extracted_source=extracted_source)
+        if cache_key is not None:
+            _write_cached(self.result_cache, cache_key, transformed)
+        self._validate_and_load(transformed, metrics)
+
+    def _validate_and_load(
+        self,
+        transformed_data: AindCoreModel,
+        metrics: Optional[JobMetrics] = None,
+    ) -> None:
+        """
+        Validate and load a model.
+        Parameters
+        ----------
+        transformed_data : AindCoreModel
+        metrics : Optional[JobMetrics]
+          If set, the stages are measured on it.
+
+        Returns
+        -------
+        None
+
+        """
+        with measure_stage(metrics, "validation"):
+            self._validate_output(transformed_data)
+        with measure_stage(metrics, "load"):
+            self._load(transformed_data)
+
     def run_job(self) -> None:
         """
-        Run the etl job
+        Run the etl job. If a result cache is set and has the model, extract
+        and transform are skipped. If profile_memory is set, the memory
+        profile of the stages is reported once the job finishes. If
+        profile_path is set, the cpu profile of the stages is written to it,
+        and if trace_path is set, their spans are written to it. If a
+        staging cache is set, the inputs are read through it.
+        Returns
+        -------
+        None
+
+        """
+        memory_profile = MemoryProfile() if self.profile_memory else None
+        metrics = (
+            JobMetrics(memory=memory_profile)
+            if self.profile_memory or self.profile_path is not None
+            else None
+        )
+        with (
+            trace_to(self.trace_path),
+            span("run_job", etl=type(self).__name__),
+            trace_memory(memory_profile),
+            profile_cpu(metrics, self.profile_path),
+            stage_inputs(self.staging_cache) as staging_stats,
+        ):
+            cache_key, cached_model = _check_result_cache(self)
+            if cached_model is not None:
+                logging.debug(
+                    "Loaded model from result cache entry %s", cache_key
+                )
+                self._validate_and_load(cached_model, metrics)
+            else:
+                with measure_stage(metrics, "extract"):
+                    extracted = _cached_extract(self)
+                self._transform_and_load(extracted, cache_key, metrics)
+        if staging_stats is not None:
+            logging.info("Staged inputs: %s", staging_stats)
+        report_memory_profile(memory_profile, self.memory_report_path)
+
+    async def arun_job(self, executor: Optional[Executor] = None) -> None:
+        """
+        Run the etl job from an event loop. The extract stage is awaited
+        through _aextract while the transform, validation and load stages
+        are run in an executor. If a staging cache is set, the inputs are
+        read through it.
+        Parameters
+        ----------
+        executor : Optional[Executor]
+          Executor to run the transform and load stages in. If None, the
+          default executor of the running event loop is used.
+
         Returns
         -------
         None
 
         """
-        extracted = self._extract()
-        transformed = self._transform(extracted_source=extracted)
-        self._run_validation_check(transformed)
-        self._load(transformed)
+        loop = asyncio.get_running_loop()
+        cache_key, cached_model = await loop.run_in_executor(
+            executor, _check_result_cache, self
+        )
+        if cached_model is not None:
+            logging.debug("Loaded model from result cache entry %s", cache_key)
+            await loop.run_in_executor(
+                executor, self._validate_and_load, cached_model
+            )
+            return
+        with stage_inputs(self.staging_cache) as staging_stats:
+            # The executor does not copy the context, which holds the stager
+            context = contextvars.copy_context()
+            extracted = await _acached_extract(self, executor)
+            await loop.run_in_executor(
+                executor,
+                context.run,
+                self._transform_and_load,
+                extracted,
+                cache_key,
+            )
+        if staging_stats is not None:
+            logging.info("Staged inputs: %s", staging_stats)
 
     @classmethod
     def from_args(cls, args: list):
@@ -248,9 +1633,12 @@ class BaseEtl(ABC):
                 "directory."
             ),
         )
+        add_profiling_arguments(parser)
         job_args = parser.parse_args(args)
 
         return cls(
             input_source=job_args.input_source,
             output_directory=Path(job_args.output_directory),
+            profile_path=job_args.profile,
+            trace_path=job_args.trace,
         )
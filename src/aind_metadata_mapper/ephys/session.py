@@ -29,6 +29,7 @@ class EphysEtl(BaseEtl):
         openephys_logs: [str],
         experiment_data: dict,
         input_source: str = "",
+        **kwargs,
     ):
         """
         Class constructor for Base etl class.
@@ -42,8 +43,10 @@ class EphysEtl(BaseEtl):
           stage logs of all ephys data streams in a session
         openephys_logs : List
           openephys logs of all ephys data streams in a session
+        **kwargs
+          Passed to BaseEtl, such as validation_mode
         """
-        super().__init__(input_source, output_directory)
+        super().__init__(input_source, output_directory, **kwargs)
         self.stage_logs = stage_logs
         self.openephys_logs = openephys_logs
         self.experiment_data = experiment_data
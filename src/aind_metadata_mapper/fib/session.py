@@ -1,6 +1,7 @@
 """Module to write valid OptoStim and Subject schemas"""
 
 import re
+import sys
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -20,7 +21,8 @@ from aind_data_schema.models.stimulus import OptoStimulation, PulseShape
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
-from aind_metadata_mapper.core import GenericEtl, JobResponse
+from aind_metadata_mapper import arguments
+from aind_metadata_mapper.core import GenericEtl
 
 
 class JobSettings(BaseSettings):
@@ -78,6 +80,7 @@ class FIBEtl(GenericEtl[JobSettings]):
     def __init__(
         self,
         job_settings: Union[JobSettings, str],
+        **kwargs,
     ):
         """
         Class constructor for Base etl class.
@@ -85,12 +88,14 @@ class FIBEtl(GenericEtl[JobSettings]):
         ----------
         job_settings: Union[JobSettings, str]
           Variables for a particular session
+        **kwargs
+          Passed to GenericEtl, such as validation_mode
         """
         if isinstance(job_settings, str):
             job_settings_model = JobSettings.model_validate_json(job_settings)
         else:
             job_settings_model = job_settings
-        super().__init__(job_settings=job_settings_model)
+        super().__init__(job_settings=job_settings_model, **kwargs)
 
     def _transform(self, extracted_source: ParsedMetadata) -> Session:
         """
@@ -234,11 +239,29 @@ class FIBEtl(GenericEtl[JobSettings]):
             teensy_str=tensy_str,
         )
 
-    def run_job(self) -> JobResponse:
-        """Run the etl job and return a JobResponse."""
-        extracted = self._extract()
-        transformed = self._transform(extracted_source=extracted)
-        job_response = self._load(
-            transformed, self.job_settings.output_directory
+    @classmethod
+    def from_args(cls, args: list):
+        """
+        Adds ability to construct settings from a list of arguments.
+        Parameters
+        ----------
+        args : list
+        A list of command line arguments to parse.
+        """
+
+        parser = arguments.fib_parser()
+        job_args = parser.parse_args(args)
+        job_settings_from_args = JobSettings.model_validate_json(
+            job_args.job_settings
+        )
+        return cls(
+            job_settings=job_settings_from_args,
+            profile_path=job_args.profile,
+            trace_path=job_args.trace,
         )
-        return job_response
+
+
+if __name__ == "__main__":
+    sys_args = sys.argv[1:]
+    etl = FIBEtl.from_args(sys_args)
+    etl.run_job()
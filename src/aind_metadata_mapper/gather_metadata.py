@@ -1,10 +1,25 @@
 """Module to gather metadata from different sources."""
 
-import argparse
-import json
+import asyncio
+import logging
 import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional, Tuple, Type
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
 import requests
 from aind_data_schema.base import AindCoreModel
@@ -24,18 +39,86 @@ from aind_data_schema.core.subject import Subject
 from aind_data_schema.models.modalities import Modality
 from aind_data_schema.models.organizations import Organization
 from aind_data_schema.models.pid_names import PIDName
-from pydantic import ValidationError
+from pydantic import Field, ValidationError
 from pydantic_settings import BaseSettings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+from aind_metadata_mapper import arguments, codec
+from aind_metadata_mapper.cache import BaseCache, make_cache_key
+from aind_metadata_mapper.metrics import (
+    CpuProfile,
+    MemoryProfile,
+    profile_cpu_stage,
+    profile_stage,
+    report_memory_profile,
+    trace_memory,
+)
+from aind_metadata_mapper.sinks import BaseSink, document_name
+from aind_metadata_mapper.tracing import span, trace_to
+
+# Responses of the metadata service that are worth retrying
+_RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+_RESPONSE_TTL = 3600.0
+
+_MAX_SHARED_RESPONSES = 1024
+
+# Validators of cached responses and the headers that send them back
+_CONDITIONAL_HEADERS = {
+    "ETag": "If-None-Match",
+    "Last-Modified": "If-Modified-Since",
+}
+
 
+class MetadataServiceSettings(BaseSettings):
+    """Fields needed to connect to the metadata service"""
 
-class SubjectSettings(BaseSettings):
+    connect_timeout: float = Field(
+        5.0, description="Seconds to wait for a connection to the service"
+    )
+    read_timeout: float = Field(
+        60.0, description="Seconds to wait between bytes of a response"
+    )
+    max_retries: int = Field(
+        3,
+        description=(
+            "Times to retry a request after a connection error, a timeout "
+            "or a 5xx response"
+        ),
+    )
+    backoff_factor: float = Field(
+        0.5,
+        description=(
+            "Retries wait backoff_factor * 2 ** (retry number - 1) seconds"
+        ),
+    )
+    backoff_jitter: float = Field(
+        0.5, description="Up to this many seconds are added to each wait"
+    )
+    pool_maxsize: int = Field(
+        10, description="Connections to keep open to the service"
+    )
+
+    def session_key(self) -> Tuple[int, int, float, float]:
+        """Requests with the same key can share a session."""
+        return (
+            self.pool_maxsize,
+            self.max_retries,
+            self.backoff_factor,
+            self.backoff_jitter,
+        )
+
+
+class SubjectSettings(MetadataServiceSettings):
     """Fields needed to retrieve subject metadata"""
 
     subject_id: str
     metadata_service_url: str
 
 
-class ProceduresSettings(BaseSettings):
+class ProceduresSettings(MetadataServiceSettings):
     """Fields needed to retrieve procedures metadata"""
 
     subject_id: str
@@ -84,24 +167,380 @@ class JobSettings(BaseSettings):
     directory_to_write_to: Path
 
 
+@contextmanager
+def _measure_file(
+    memory_profile: Optional[MemoryProfile],
+    cpu_profile: Optional[CpuProfile],
+    file_name: str,
+) -> Iterator[None]:
+    """Trace and profile gathering one metadata file as a stage named
+    file_name."""
+    with (
+        span(file_name),
+        profile_stage(memory_profile, file_name),
+        profile_cpu_stage(cpu_profile, file_name),
+    ):
+        yield
+
+
+def _make_session(
+    service_settings: MetadataServiceSettings,
+) -> requests.Session:
+    """Session whose connections to the metadata service are kept open and
+    whose failed requests are retried as set in service_settings."""
+    retry = Retry(
+        total=service_settings.max_retries,
+        backoff_factor=service_settings.backoff_factor,
+        backoff_jitter=service_settings.backoff_jitter,
+        status_forcelist=_RETRY_STATUS_CODES,
+        allowed_methods=["GET"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_maxsize=service_settings.pool_maxsize, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _cached_response(
+    url: str, info: dict, content: bytes
+) -> requests.Response:
+    """Rebuild a response of the metadata service from the response cache."""
+    response = requests.Response()
+    response.url = url
+    response.status_code = info["status_code"]
+    response.headers.update(info["headers"])
+    response._content = content
+    return response
+
+
+def _read_cached_response(
+    cache_key: str, entry: Optional[bytes]
+) -> Optional[Tuple[dict, bytes]]:
+    """
+    Split a response cache entry into its info and content.
+    Parameters
+    ----------
+    cache_key : str
+    entry : Optional[bytes]
+
+    Returns
+    -------
+    Optional[Tuple[dict, bytes]]
+      None if there is no entry, or if it is cut short or corrupt, which is
+      treated as a miss.
+
+    """
+    if entry is None:
+        return None
+    try:
+        info_json, content = entry.split(b"\n", 1)
+        info = codec.loads(info_json)
+        for field in ["status_code", "headers", "stored_at"]:
+            info[field]
+    except (ValueError, KeyError, TypeError) as e:
+        logging.warning(
+            "Ignoring unreadable response cache entry %s: %r", cache_key, e
+        )
+        return None
+    return info, content
+
+
+class _ServiceClient:
+    """Sends the requests of jobs to the metadata service on pooled
+    sessions. Requests with the same pool and retry settings share a
+    session, so their connections are reused."""
+
+    def __init__(
+        self,
+        share_responses: bool = False,
+        response_cache: Optional[BaseCache] = None,
+        response_ttl: float = _RESPONSE_TTL,
+        max_shared_responses: int = _MAX_SHARED_RESPONSES,
+    ):
+        """
+        Class constructor for _ServiceClient.
+        Parameters
+        ----------
+        share_responses : bool
+          If True, each url is only requested once, and the requests for a
+          url that was already requested wait for and return its response,
+          or raise its error. Default is False.
+        response_cache : Optional[BaseCache]
+          If set, the usable responses are kept in this cache. Default is
+          None.
+        response_ttl : float
+          Seconds a cached response is used without asking the service.
+          Default is one hour.
+        max_shared_responses : int
+          Number of shared responses kept in memory. Past it, the least
+          recently used ones are dropped and requested again if needed.
+          Default is 1024.
+        """
+        self._sessions: Dict[tuple, requests.Session] = {}
+        self._responses: Optional[OrderedDict[str, Future]] = (
+            OrderedDict() if share_responses else None
+        )
+        self._max_shared_responses = max_shared_responses
+        self._request_count = 0
+        self._response_cache = response_cache
+        self._response_ttl = response_ttl
+        self._lock = threading.Lock()
+
+    def _send(
+        self,
+        service_settings: MetadataServiceSettings,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        """Send a GET request on the session for service_settings. Requests
+        whose retries all ran out of read_timeout raise a ReadTimeout with
+        the url, rather than the ConnectionError requests raises for them."""
+        key = service_settings.session_key()
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = _make_session(service_settings)
+                self._sessions[key] = session
+        try:
+            return session.get(
+                url,
+                headers=headers,
+                timeout=(
+                    service_settings.connect_timeout,
+                    service_settings.read_timeout,
+                ),
+            )
+        except requests.ConnectionError as e:
+            reason = e.args[0] if e.args else None
+            if isinstance(reason, MaxRetryError) and isinstance(
+                reason.reason, ReadTimeoutError
+            ):
+                raise requests.ReadTimeout(
+                    f"Metadata service at {url} did not respond within "
+                    f"{service_settings.read_timeout} seconds",
+                    request=e.request,
+                ) from e
+            raise
+
+    def _fetch(
+        self, service_settings: MetadataServiceSettings, url: str
+    ) -> requests.Response:
+        """
+        Send a GET request through the response cache, if there is one.
+        Fresh cached responses are returned without asking the service.
+        Stale ones are revalidated with a conditional request if the service
+        sent an ETag or a Last-Modified date, and fetched again otherwise.
+        If the service answers with a 5xx, the stale response is returned.
+        Unreadable entries are fetched again.
+        Parameters
+        ----------
+        service_settings : MetadataServiceSettings
+        url : str
+
+        Returns
+        -------
+        requests.Response
+
+        """
+        if self._response_cache is None:
+            return self._send(service_settings, url)
+        key = make_cache_key("service_response", url)
+        cached = _read_cached_response(key, self._response_cache.get(key))
+        headers = {}
+        if cached is not None:
+            info, content = cached
+            if time.time() - info["stored_at"] < self._response_ttl:
+                return _cached_response(url, info, content)
+            for validator, header in _CONDITIONAL_HEADERS.items():
+                if validator in info["headers"]:
+                    headers[header] = info["headers"][validator]
+        response = self._send(service_settings, url, headers or None)
+        if response.status_code == 304 and headers:
+            response = _cached_response(url, info, content)
+        elif cached is not None and response.status_code >= 500:
+            logging.warning(
+                "Using the stale cached response for %s, since the service "
+                "responded with %d",
+                url,
+                response.status_code,
+            )
+            return _cached_response(url, info, content)
+        elif not (response.status_code < 300 or response.status_code == 406):
+            return response
+        info = {
+            "status_code": response.status_code,
+            "headers": {
+                validator: response.headers[validator]
+                for validator in _CONDITIONAL_HEADERS
+                if validator in response.headers
+            },
+            "stored_at": time.time(),
+        }
+        self._response_cache.set(
+            key, codec.dumps(info) + b"\n" + response.content
+        )
+        return response
+
+    def get(
+        self, service_settings: MetadataServiceSettings, url: str
+    ) -> requests.Response:
+        """
+        Send a GET request, or wait for the response to the same request if
+        responses are shared.
+        Parameters
+        ----------
+        service_settings : MetadataServiceSettings
+          Settings of the connection. Requests for a url that was already
+          requested share its response whatever their settings.
+        url : str
+
+        Returns
+        -------
+        requests.Response
+
+        """
+        if self._responses is None:
+            return self._fetch(service_settings, url)
+        with self._lock:
+            future = self._responses.get(url)
+            is_first_request = future is None
+            if is_first_request:
+                future = Future()
+                self._responses[url] = future
+                self._request_count += 1
+                if len(self._responses) > self._max_shared_responses:
+                    self._responses.popitem(last=False)
+            else:
+                self._responses.move_to_end(url)
+        if is_first_request:
+            try:
+                future.set_result(self._fetch(service_settings, url))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def request_count(self) -> int:
+        """Number of requests sent while responses are shared."""
+        return self._request_count
+
+    def close(self) -> None:
+        """Close the connections of the sessions."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
 class GatherMetadataJob:
     """Class to handle retrieving metadata"""
 
-    def __init__(self, settings: JobSettings):
+    def __init__(
+        self,
+        settings: Union[JobSettings, str],
+        profile_memory: bool = False,
+        memory_report_path: Optional[Union[Path, str]] = None,
+        profile_path: Optional[Union[Path, str]] = None,
+        trace_path: Optional[Union[Path, str]] = None,
+        sink: Optional[BaseSink] = None,
+        response_cache: Optional[BaseCache] = None,
+        response_ttl: float = _RESPONSE_TTL,
+        client: Optional[_ServiceClient] = None,
+    ):
         """
         Class constructor
         Parameters
         ----------
-        settings : JobSettings
+        settings : Union[JobSettings, str]
+          Job settings, or a json string of job settings
+        profile_memory : bool
+          If True, run_job traces the memory allocated while gathering each
+          file and logs the peak memory and the top allocation sites.
+          Tracing slows the job down. Default is False.
+        memory_report_path : Optional[Union[Path, str]]
+          If set, run_job profiles memory and writes the profile to this
+          file as json instead of logging it. Default is None.
+        profile_path : Optional[Union[Path, str]]
+          If set, run_job profiles gathering each file with cProfile and
+          writes the stats to this file, along with a summary of the slowest
+          functions of each file. Default is None.
+        trace_path : Optional[Union[Path, str]]
+          If set, run_job traces gathering each file, including its service
+          calls, and writes the spans to this file in the Chrome trace event
+          format. Default is None.
+        sink : Optional[BaseSink]
+          If set, the files are written to this sink instead of to
+          directory_to_write_to, under the names they would have there. The
+          sink is not flushed by the job. Default is None.
+        response_cache : Optional[BaseCache]
+          If set, the subject and procedures responses of the metadata
+          service are kept in this cache, such as a DiskCache, keyed by
+          their url. Responses with a 406 status are kept with it. The
+          least recently used ones are evicted past the size of the cache.
+          Default is None.
+        response_ttl : float
+          Seconds a cached response is used without asking the service.
+          Stale responses are revalidated with a conditional request when
+          the service sent an ETag or a Last-Modified date. Default is one
+          hour.
+        client : Optional[_ServiceClient]
+          Client that sends the requests to the metadata service, such as
+          one shared by the jobs of run_batch. It is not closed by the job,
+          and response_cache and response_ttl are ignored. Default is None,
+          in which case the job uses a client of its own.
         """
+        if isinstance(settings, str):
+            settings = JobSettings.model_validate_json(settings)
         self.settings = settings
+        self.profile_memory = profile_memory or memory_report_path is not None
+        self.memory_report_path = memory_report_path
+        self.profile_path = profile_path
+        self.trace_path = trace_path
+        self.sink = sink
+        self._owns_client = client is None
+        self._client = client or _ServiceClient(
+            response_cache=response_cache, response_ttl=response_ttl
+        )
+
+    def _service_get(
+        self, service_settings: MetadataServiceSettings, url: str
+    ) -> requests.Response:
+        """
+        Send a GET request to the metadata service. Requests are sent on
+        sessions owned by the job, which keep their connections open until
+        close is called.
+        Parameters
+        ----------
+        service_settings : MetadataServiceSettings
+        url : str
+
+        Returns
+        -------
+        requests.Response
+          The last response if the retries ran out on 5xx responses.
+
+        """
+        with span("http_get", url=url):
+            return self._client.get(service_settings, url)
+
+    def close(self) -> None:
+        """Close the connections to the metadata service. run_job closes
+        them once it finishes. A client passed to the constructor is left
+        open."""
+        if self._owns_client:
+            self._client.close()
 
     def get_subject(self) -> dict:
         """Get subject metadata"""
-        response = requests.get(
+        url = (
             self.settings.subject_settings.metadata_service_url
             + f"/subject/{self.settings.subject_settings.subject_id}"
         )
+        response = self._service_get(self.settings.subject_settings, url)
 
         if response.status_code < 300 or response.status_code == 406:
             json_content = response.json()
@@ -113,10 +552,11 @@ class GatherMetadataJob:
 
     def get_procedures(self) -> dict:
         """Get procedures metadata"""
-        response = requests.get(
+        url = (
             self.settings.procedures_settings.metadata_service_url
             + f"/procedures/{self.settings.procedures_settings.subject_id}"
         )
+        response = self._service_get(self.settings.procedures_settings, url)
 
         if response.status_code < 300 or response.status_code == 406:
             json_content = response.json()
@@ -133,7 +573,7 @@ class GatherMetadataJob:
         )
 
         try:
-            return json.loads(
+            return codec.loads(
                 RawDataDescription(
                     name=self.settings.data_description_settings.name,
                     institution=(
@@ -150,7 +590,7 @@ class GatherMetadataJob:
                 ).model_dump_json()
             )
         except ValidationError:
-            return json.loads(
+            return codec.loads(
                 RawDataDescription.model_construct(
                     name=self.settings.data_description_settings.name,
                     institution=(
@@ -175,79 +615,84 @@ class GatherMetadataJob:
                 self.settings.processing_settings.pipeline_process
             )
         )
-        return json.loads(processing_instance.model_dump_json())
+        return codec.loads(processing_instance.model_dump_json())
 
     def get_main_metadata(self) -> Metadata:
-        """Get main Metadata model"""
+        """Get main Metadata model. The files are loaded at the same time."""
 
         def load_model(
-            filepath: Optional[Path], model: Type[AindCoreModel]
-        ) -> Optional[AindCoreModel]:
+            filepath: Path, model: Type[AindCoreModel]
+        ) -> AindCoreModel:
             """
-            Validates contents of file with an AindCoreModel
+            Validates contents of file with an AindCoreModel. The file is
+            validated straight from its bytes, and only parsed into a dict
+            if it is not valid.
             Parameters
             ----------
-            filepath : Optional[Path]
+            filepath : Path
             model : Type[AindCoreModel]
 
             Returns
             -------
-            Optional[AindCodeModel]
+            AindCodeModel
 
             """
-            if filepath is not None:
-                with open(filepath, "r") as f:
-                    contents = json.load(f)
-                try:
-                    output = model.model_validate_json(json.dumps(contents))
-                except ValidationError:
-                    output = model.model_construct(**contents)
-
-                return output
-            else:
-                return None
-
-        subject = load_model(
-            self.settings.metadata_settings.subject_filepath, Subject
-        )
-        data_description = load_model(
-            self.settings.metadata_settings.data_description_filepath,
-            DataDescription,
-        )
-        procedures = load_model(
-            self.settings.metadata_settings.procedures_filepath, Procedures
-        )
-        session = load_model(
-            self.settings.metadata_settings.session_filepath, Session
-        )
-        rig = load_model(self.settings.metadata_settings.rig_filepath, Rig)
-        acquisition = load_model(
-            self.settings.metadata_settings.acquisition_filepath, Acquisition
-        )
-        instrument = load_model(
-            self.settings.metadata_settings.instrument_filepath, Instrument
-        )
-        processing = load_model(
-            self.settings.metadata_settings.processing_filepath, Processing
-        )
+            contents = Path(filepath).read_bytes()
+            try:
+                output = model.model_validate_json(contents)
+            except ValidationError:
+                output = model.model_construct(**codec.loads(contents))
+
+            return output
+
+        metadata_settings = self.settings.metadata_settings
+        model_files = {
+            "subject": (metadata_settings.subject_filepath, Subject),
+            "data_description": (
+                metadata_settings.data_description_filepath,
+                DataDescription,
+            ),
+            "procedures": (metadata_settings.procedures_filepath, Procedures),
+            "session": (metadata_settings.session_filepath, Session),
+            "rig": (metadata_settings.rig_filepath, Rig),
+            "acquisition": (
+                metadata_settings.acquisition_filepath,
+                Acquisition,
+            ),
+            "instrument": (metadata_settings.instrument_filepath, Instrument),
+            "processing": (metadata_settings.processing_filepath, Processing),
+        }
+        existing_files = {
+            field_name: (filepath, model)
+            for field_name, (filepath, model) in model_files.items()
+            if filepath is not None
+        }
+        models = dict.fromkeys(model_files)
+        # Only the files that are set are loaded, with a thread for each
+        if existing_files:
+            with ThreadPoolExecutor(
+                max_workers=len(existing_files)
+            ) as executor:
+                futures = {
+                    field_name: executor.submit(load_model, filepath, model)
+                    for field_name, (filepath, model) in existing_files.items()
+                }
+            models.update(
+                (field_name, future.result())
+                for field_name, future in futures.items()
+            )
 
         metadata = Metadata(
-            name=self.settings.metadata_settings.name,
-            location=self.settings.metadata_settings.location,
-            subject=subject,
-            data_description=data_description,
-            procedures=procedures,
-            session=session,
-            rig=rig,
-            processing=processing,
-            acquisition=acquisition,
-            instrument=instrument,
+            name=metadata_settings.name,
+            location=metadata_settings.location,
+            **models,
         )
         return metadata
 
     def _write_json_file(self, filename: str, contents: dict) -> None:
         """
-        Write a json file
+        Write a json file, or a document of the same name to self.sink if it
+        is set.
         Parameters
         ----------
         filename : str
@@ -260,55 +705,258 @@ class GatherMetadataJob:
         None
 
         """
+        if self.sink is not None:
+            self.sink.write(
+                document_name(self.settings.directory_to_write_to, filename),
+                codec.dumps(contents, indent=3),
+            )
+            return
         output_path = self.settings.directory_to_write_to / filename
-        with open(output_path, "w") as f:
-            json.dump(contents, f, indent=3)
+        output_path.write_bytes(codec.dumps(contents, indent=3))
 
     def run_job(self) -> None:
-        """Run job"""
+        """Run job. Connections to the metadata service are closed once it
+        finishes. If profile_memory is set, the memory profile of gathering
+        each file is reported once the job finishes. If profile_path is set,
+        the cpu profile of gathering each file is written to it, and if
+        trace_path is set, the spans of gathering each file are written to
+        it."""
+        memory_profile = MemoryProfile() if self.profile_memory else None
+        cpu_profile = CpuProfile() if self.profile_path is not None else None
+        with (
+            trace_to(self.trace_path),
+            span("run_job", etl=type(self).__name__),
+            trace_memory(memory_profile),
+        ):
+            try:
+                self._gather_files(memory_profile, cpu_profile)
+            finally:
+                self.close()
+        report_memory_profile(memory_profile, self.memory_report_path)
+        if cpu_profile is not None:
+            cpu_profile.write(self.profile_path)
+
+    def _gather_files(
+        self,
+        memory_profile: Optional[MemoryProfile],
+        cpu_profile: Optional[CpuProfile] = None,
+    ) -> None:
+        """
+        Gather and write each requested metadata file.
+        Parameters
+        ----------
+        memory_profile : Optional[MemoryProfile]
+          If set, the memory allocated for each file is profiled on it.
+        cpu_profile : Optional[CpuProfile]
+          If set, the function calls made for each file are profiled on it.
+
+        Returns
+        -------
+        None
+
+        """
+        service_files = []
         if self.settings.subject_settings is not None:
-            contents = self.get_subject()
-            self._write_json_file(
-                filename=Subject.default_filename(), contents=contents
+            service_files.append(
+                ("subject", self.get_subject, Subject.default_filename())
             )
         if self.settings.procedures_settings is not None:
-            contents = self.get_procedures()
-            self._write_json_file(
-                filename=Procedures.default_filename(), contents=contents
+            service_files.append(
+                (
+                    "procedures",
+                    self.get_procedures,
+                    Procedures.default_filename(),
+                )
             )
+        self._gather_service_files(service_files, memory_profile, cpu_profile)
         if self.settings.data_description_settings is not None:
-            contents = self.get_raw_data_description()
-            self._write_json_file(
-                filename=DataDescription.default_filename(), contents=contents
-            )
+            with _measure_file(
+                memory_profile, cpu_profile, "data_description"
+            ):
+                contents = self.get_raw_data_description()
+                self._write_json_file(
+                    filename=DataDescription.default_filename(),
+                    contents=contents,
+                )
         if self.settings.processing_settings is not None:
-            contents = self.get_processing_metadata()
-            self._write_json_file(
-                filename=Processing.default_filename(), contents=contents
-            )
+            with _measure_file(memory_profile, cpu_profile, "processing"):
+                contents = self.get_processing_metadata()
+                self._write_json_file(
+                    filename=Processing.default_filename(), contents=contents
+                )
         if self.settings.metadata_settings is not None:
-            metadata = self.get_main_metadata()
-            metadata.write_standard_file(
-                output_directory=self.settings.directory_to_write_to
-            )
+            with _measure_file(memory_profile, cpu_profile, "metadata"):
+                metadata = self.get_main_metadata()
+                if self.sink is not None:
+                    self.sink.write(
+                        document_name(
+                            self.settings.directory_to_write_to,
+                            metadata.default_filename(),
+                        ),
+                        metadata.model_dump_json(indent=3).encode("utf-8"),
+                    )
+                else:
+                    metadata.write_standard_file(
+                        output_directory=self.settings.directory_to_write_to
+                    )
+
+    def _gather_service_files(
+        self,
+        service_files: List[Tuple[str, Callable[[], dict], str]],
+        memory_profile: Optional[MemoryProfile],
+        cpu_profile: Optional[CpuProfile],
+    ) -> None:
+        """
+        Fetch files from the metadata service and write each one as soon as
+        it arrives. The requests are independent, so they are sent at the
+        same time and the job waits about as long as the slowest one. They
+        are sent one after the other while profiling, so that the stages of
+        the profiles do not overlap.
+        Parameters
+        ----------
+        service_files : List[Tuple[str, Callable[[], dict], str]]
+          (stage name, method that fetches the contents, filename) of each
+          file.
+        memory_profile : Optional[MemoryProfile]
+        cpu_profile : Optional[CpuProfile]
+
+        Raises
+        ------
+        AssertionError
+          Once every request has finished, if the service answered one with
+          an error. The error of the first of those files in service_files
+          is raised, with the same message as when fetched alone.
+
+        """
+
+        def gather_file(
+            stage_name: str, get_contents: Callable[[], dict], filename: str
+        ) -> None:
+            """Fetch one file and write it."""
+            with _measure_file(memory_profile, cpu_profile, stage_name):
+                contents = get_contents()
+                self._write_json_file(filename=filename, contents=contents)
+
+        if (
+            len(service_files) < 2
+            or memory_profile is not None
+            or cpu_profile is not None
+        ):
+            for service_file in service_files:
+                gather_file(*service_file)
+            return
+        with ThreadPoolExecutor(max_workers=len(service_files)) as executor:
+            futures = [
+                executor.submit(gather_file, *service_file)
+                for service_file in service_files
+            ]
+        for future in futures:
+            future.result()
+
+    async def arun_job(self) -> None:
+        """Run job in a worker thread so that an event loop can keep many
+        jobs' service calls in flight"""
+        await asyncio.to_thread(self.run_job)
+
+    @classmethod
+    def from_args(cls, args: list):
+        """
+        Adds ability to construct settings from a list of arguments.
+        Parameters
+        ----------
+        args : list
+        A list of command line arguments to parse.
+        """
+        parser = arguments.gather_metadata_parser()
+        cli_args = parser.parse_args(args)
+        main_job_settings = JobSettings.model_validate_json(
+            cli_args.job_settings
+        )
+        return cls(
+            settings=main_job_settings,
+            profile_path=cli_args.profile,
+            trace_path=cli_args.trace,
+        )
+
+
+def run_batch(
+    settings: Iterable[Union[JobSettings, str]],
+    max_workers: int = 8,
+    sink: Optional[BaseSink] = None,
+    response_cache: Optional[BaseCache] = None,
+    response_ttl: float = _RESPONSE_TTL,
+    max_shared_responses: int = _MAX_SHARED_RESPONSES,
+) -> List[Optional[Exception]]:
+    """
+    Gather the metadata of many jobs, such as the sessions of a day, which
+    often share subjects. Each subject and procedures file is fetched from
+    the metadata service once per service url and subject id, as long as
+    its response is among the max_shared_responses last used ones, and
+    written to the directory of every job that requests it. The requests share
+    pooled connections.
+    Parameters
+    ----------
+    settings : Iterable[Union[JobSettings, str]]
+      Settings of each job, or json strings of them.
+    max_workers : int
+      Jobs gathered at the same time. Each job fetches its subject and
+      procedures at the same time, so at most twice as many requests are
+      in flight. Default is 8.
+    sink : Optional[BaseSink]
+      If set, the files of every job are written to this sink instead of
+      to their directories. Default is None.
+    response_cache : Optional[BaseCache]
+      If set, the responses of the metadata service are kept in this cache,
+      as with the response_cache of GatherMetadataJob. Default is None.
+    response_ttl : float
+      Seconds a cached response is used without asking the service. Default
+      is one hour.
+    max_shared_responses : int
+      Number of responses kept in memory for the jobs that share them. Past
+      it, the least recently used ones are dropped and fetched again by the
+      jobs that still need them, so order the settings by subject to fetch
+      each file once. Default is 1024.
+
+    Returns
+    -------
+    List[Optional[Exception]]
+      The error raised by each job, in the order of settings, or None if
+      the job succeeded. Jobs that share a failed request get its error.
+
+    """
+    client = _ServiceClient(
+        share_responses=True,
+        response_cache=response_cache,
+        response_ttl=response_ttl,
+        max_shared_responses=max_shared_responses,
+    )
+    jobs = [
+        GatherMetadataJob(settings=job_settings, sink=sink, client=client)
+        for job_settings in settings
+    ]
+
+    def gather(job: GatherMetadataJob) -> Optional[Exception]:
+        """Gather the files of one job."""
+        try:
+            job._gather_files(None)
+        except Exception as e:
+            return e
+        return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            errors = list(executor.map(gather, jobs))
+    finally:
+        client.close()
+    logging.info(
+        "Gathered %d jobs with %d requests to the metadata service",
+        len(jobs),
+        client.request_count(),
+    )
+    return errors
 
 
 if __name__ == "__main__":
     sys_args = sys.argv[1:]
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "-j",
-        "--job-settings",
-        required=True,
-        type=str,
-        help=(
-            r"""
-            Instead of init args the job settings can optionally be passed in
-            as a json string in the command line.
-            """
-        ),
-    )
-    cli_args = parser.parse_args(sys_args)
-    main_job_settings = JobSettings.model_validate_json(cli_args.job_settings)
-    job = GatherMetadataJob(settings=main_job_settings)
+    job = GatherMetadataJob.from_args(sys_args)
     job.run_job()
@@ -0,0 +1,315 @@
+"""Run the jobs listed in a jsonl manifest, resuming where a previous run
+stopped."""
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, TextIO, Tuple, Union
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+from aind_metadata_mapper.cache import make_cache_key
+from aind_metadata_mapper.cli import ETL_REGISTRY, run_registered_job
+from aind_metadata_mapper.core import JobResponse, _run_in_pool
+
+
+class ManifestEntry(BaseModel):
+    """One line of a manifest."""
+
+    model_config = ConfigDict(extra="forbid")
+    etl: str = Field(..., description="One of the keys of ETL_REGISTRY")
+    job_settings: dict
+    id: Optional[str] = Field(
+        None,
+        description=(
+            "Identifies the job in the progress log. Defaults to a hash of "
+            "the etl and the job settings, so it does not change when "
+            "entries are added or reordered."
+        ),
+    )
+
+
+class ManifestRecord(BaseModel):
+    """One line of a progress log."""
+
+    model_config = ConfigDict(extra="forbid")
+    id: str
+    etl: str
+    response: JobResponse
+
+
+class ManifestSummary(BaseModel):
+    """Counts of the jobs of a manifest run."""
+
+    total: int = Field(0, description="Number of entries in the manifest")
+    skipped: int = Field(
+        0, description="Entries already completed by a previous run"
+    )
+    succeeded: int = Field(0, description="Jobs with a status_code below 500")
+    failed: int = Field(0, description="Jobs with a status_code of 500")
+
+
+def _read_manifest(
+    manifest_path: Path,
+) -> Iterator[Tuple[str, ManifestEntry]]:
+    """
+    Lazily read the entries of a manifest.
+    Parameters
+    ----------
+    manifest_path : Path
+
+    Returns
+    -------
+    Iterator[Tuple[str, ManifestEntry]]
+      Pairs of (id, entry). Entries without an id get a hash of their etl
+      and job settings. Blank lines are skipped.
+
+    Raises
+    ------
+    ValueError
+      If a line is not a valid entry or names an unknown etl.
+
+    """
+    with open(manifest_path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = ManifestEntry.model_validate_json(line)
+            except ValidationError as e:
+                raise ValueError(
+                    f"Invalid manifest entry on line {line_number}: {e}"
+                )
+            if entry.etl not in ETL_REGISTRY:
+                raise ValueError(
+                    f"Unknown etl {entry.etl} on line {line_number}"
+                )
+            yield entry.id or make_cache_key(
+                entry.etl, entry.job_settings
+            ), entry
+
+
+def read_completed(progress_log_path: Path) -> Set[str]:
+    """
+    Read the ids of the jobs that completed in previous runs. Jobs that
+    responded with a 500 status_code are not completed, so they are retried.
+    Parameters
+    ----------
+    progress_log_path : Path
+
+    Returns
+    -------
+    Set[str]
+      Empty if the progress log does not exist yet.
+
+    """
+    completed = set()
+    if not progress_log_path.exists():
+        return completed
+    with open(progress_log_path, "r") as f:
+        for line in f:
+            try:
+                record = ManifestRecord.model_validate_json(line)
+            except ValidationError:
+                # The last line may be cut short if the process was killed
+                # while writing it
+                continue
+            if record.response.status_code < 500:
+                completed.add(record.id)
+            else:
+                completed.discard(record.id)
+    return completed
+
+
+def _open_progress_log(progress_log_path: Path) -> TextIO:
+    """
+    Open the progress log to append to it. If the last line was cut short,
+    it is ended first so that the next record starts on its own line.
+    Parameters
+    ----------
+    progress_log_path : Path
+
+    Returns
+    -------
+    TextIO
+
+    """
+    progress_log = open(progress_log_path, "a+b")
+    if progress_log.tell() > 0:
+        progress_log.seek(-1, os.SEEK_END)
+        if progress_log.read(1) != b"\n":
+            progress_log.write(b"\n")
+    return io.TextIOWrapper(progress_log, encoding="utf-8")
+
+
+def _log_progress(
+    summary: ManifestSummary, pending: int, start_time: float
+) -> None:
+    """
+    Log the number of finished jobs, the throughput and the ETA.
+    Parameters
+    ----------
+    summary : ManifestSummary
+    pending : int
+      Number of jobs this run needs to run in total.
+    start_time : float
+      time.monotonic() when this run started.
+
+    """
+    finished = summary.succeeded + summary.failed
+    elapsed = time.monotonic() - start_time
+    throughput = finished / elapsed if elapsed > 0 else 0.0
+    eta = (
+        timedelta(seconds=round((pending - finished) / throughput))
+        if throughput > 0
+        else "unknown"
+    )
+    logging.info(
+        "Finished %d/%d jobs (%d failed), %.2f jobs/s, ETA %s",
+        finished,
+        pending,
+        summary.failed,
+        throughput,
+        eta,
+    )
+
+
+def run_manifest(
+    manifest_path: Union[Path, str],
+    progress_log_path: Union[Path, str],
+    workers: Optional[int] = None,
+    max_tasks_per_worker: Optional[int] = 100,
+    progress_interval: float = 10.0,
+) -> ManifestSummary:
+    """
+    Run every job of a manifest that has not completed yet over a pool of
+    worker processes. Each response is appended to the progress log as soon
+    as its job finishes, without the data of the model, so a killed run can
+    be restarted with the same arguments and only runs the remaining jobs.
+    Parameters
+    ----------
+    manifest_path : Union[Path, str]
+      Jsonl file with one ManifestEntry per line.
+    progress_log_path : Union[Path, str]
+      Jsonl file that ManifestRecords are appended to. Created if it does
+      not exist.
+    workers : Optional[int]
+      Number of worker processes. Defaults to the number of cpus.
+    max_tasks_per_worker : Optional[int]
+      Number of jobs a worker runs before it is replaced with a fresh
+      process. Default is 100.
+    progress_interval : float
+      Seconds between progress reports. Default is 10.
+
+    Returns
+    -------
+    ManifestSummary
+
+    """
+    manifest_path = Path(manifest_path)
+    progress_log_path = Path(progress_log_path)
+    completed = read_completed(progress_log_path)
+    summary = ManifestSummary()
+    # The manifest is read twice so that the entries do not have to be held
+    # in memory. The first pass validates it and counts the pending jobs.
+    for job_id, _ in _read_manifest(manifest_path):
+        summary.total += 1
+        summary.skipped += job_id in completed
+    pending = summary.total - summary.skipped
+    logging.info(
+        "Running %d jobs, skipping %d completed", pending, summary.skipped
+    )
+    tasks = (
+        ((job_id, entry.etl), (entry.etl, json.dumps(entry.job_settings)))
+        for job_id, entry in _read_manifest(manifest_path)
+        if job_id not in completed
+    )
+    start_time = time.monotonic()
+    last_report = start_time
+    with _open_progress_log(progress_log_path) as progress_log:
+        for (job_id, etl_name), job_response in _run_in_pool(
+            tasks,
+            workers=workers,
+            max_tasks_per_worker=max_tasks_per_worker,
+            job_function=run_registered_job,
+        ):
+            record = ManifestRecord(
+                id=job_id, etl=etl_name, response=job_response
+            )
+            progress_log.write(
+                record.model_dump_json(exclude={"response": {"data"}}) + "\n"
+            )
+            progress_log.flush()
+            if job_response.status_code < 500:
+                summary.succeeded += 1
+            else:
+                summary.failed += 1
+            if time.monotonic() - last_report >= progress_interval:
+                _log_progress(summary, pending, start_time)
+                last_report = time.monotonic()
+    _log_progress(summary, pending, start_time)
+    return summary
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Run a manifest from the command line.
+    Parameters
+    ----------
+    args : Optional[List[str]]
+      Command line arguments. Defaults to sys.argv[1:].
+
+    Returns
+    -------
+    int
+      Exit code. 1 if any job failed, else 0.
+
+    """
+    parser = argparse.ArgumentParser(prog="aind-metadata-mapper manifest")
+    parser.add_argument(
+        "manifest",
+        type=str,
+        help=(r"""
+            Jsonl file with one job per line. For example:
+             {"etl": "fib", "id": "session_1", "job_settings": {...}}
+            """),
+    )
+    parser.add_argument(
+        "-p",
+        "--progress-log",
+        required=True,
+        type=str,
+        help="Jsonl file the responses are appended to.",
+    )
+    parser.add_argument(
+        "--workers",
+        default=None,
+        type=int,
+        help="Number of worker processes. Defaults to the number of cpus.",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        default=10.0,
+        type=float,
+        help="Seconds between progress reports. Defaults to 10.",
+    )
+    cli_args = parser.parse_args(args)
+    logging.basicConfig(level=logging.INFO)
+    summary = run_manifest(
+        cli_args.manifest,
+        cli_args.progress_log,
+        workers=cli_args.workers,
+        progress_interval=cli_args.progress_interval,
+    )
+    print(summary.model_dump_json())
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
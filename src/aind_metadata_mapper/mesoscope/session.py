@@ -1,21 +1,24 @@
 """Mesoscope ETL"""
 
-import argparse
-import json
+import asyncio
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import List, Union
+from typing import Dict, List, Union
 
-import tifffile
 from aind_data_schema.core.session import FieldOfView, Session, Stream
 from aind_data_schema.models.modalities import Modality
-from PIL import Image
-from PIL.TiffTags import TAGS
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
+from aind_metadata_mapper import arguments, codec, staging
 from aind_metadata_mapper.core import GenericEtl
+from aind_metadata_mapper.tracing import span
+
+# Heavy dependencies imported by the job once it reads its inputs. They are
+# imported lazily so that the command line starts quickly, and preloaded by
+# the workers of the server.
+LAZY_IMPORTS = ("tifffile", "PIL.Image", "PIL.TiffTags")
 
 
 class JobSettings(BaseSettings):
@@ -59,13 +62,15 @@ class MesoscopeEtl(GenericEtl[JobSettings]):
     def __init__(
         self,
         job_settings: Union[JobSettings, str],
+        **kwargs,
     ):
-        """Class constructor for Mesoscope etl job"""
+        """Class constructor for Mesoscope etl job. Any kwargs, such as
+        validation_mode, are passed to GenericEtl."""
         if isinstance(job_settings, str):
             job_settings_model = JobSettings.model_validate_json(job_settings)
         else:
             job_settings_model = job_settings
-        super().__init__(job_settings=job_settings_model)
+        super().__init__(job_settings=job_settings_model, **kwargs)
 
     def _read_metadata(self, tiff_path: Path):
         """
@@ -73,32 +78,37 @@ class MesoscopeEtl(GenericEtl[JobSettings]):
         path and returns teh result. This method was factored
         out so that it could be easily mocked in unit tests.
         """
+        # tifffile and PIL pull in numpy, so they are imported on first use
+        # to keep the cli fast to start
+        import tifffile
+
         if not tiff_path.is_file():
             raise ValueError(
                 f"{tiff_path.resolve().absolute()} " "is not a file"
             )
-        with open(tiff_path, "rb") as tiff:
+        with (
+            span("tiff_open", path=tiff_path),
+            staging.open_input(tiff_path) as tiff,
+        ):
             file_handle = tifffile.FileHandle(tiff)
             file_contents = tifffile.read_scanimage_metadata(file_handle)
         return file_contents
 
-    def _extract(self) -> dict:
-        """extract data from the platform json file and tiff file (in the
-        future).
-        If input source is a file, will extract the data from the file.
-        The input source is a directory, will extract the data from the
-        directory.
+    def _get_extract_sources(self) -> Dict[str, Path]:
+        """Find the camera json files in the behavior source and the platform
+        json file in the input source.
 
         Returns
         -------
-        dict
-            The extracted data from the platform json file.
+        Dict[str, Path]
+            The json files keyed by the name their contents are stored under
+            in the extracted data.
         """
         # The pydantic models will validate that the user inputs a Path.
         # We can add validators there if we want to coerce strings to Paths.
         input_source = self.job_settings.input_source
         behavior_source = self.job_settings.behavior_source
-        session_metadata = {}
+        sources = {}
         if behavior_source.is_dir():
             # deterministic order
             for ftype in sorted(list(behavior_source.glob("*json"))):
@@ -107,8 +117,7 @@ class MesoscopeEtl(GenericEtl[JobSettings]):
                     or "Eye" in ftype.stem
                     or "Face" in ftype.stem
                 ):
-                    with open(ftype, "r") as f:
-                        session_metadata[ftype.stem] = json.load(f)
+                    sources[ftype.stem] = ftype
         else:
             raise ValueError("Behavior source must be a directory")
         if input_source.is_dir():
@@ -117,9 +126,47 @@ class MesoscopeEtl(GenericEtl[JobSettings]):
                 isinstance(input_source, str) and input_source == ""
             ) or not input_source.exists():
                 raise ValueError("No platform json file found in directory")
-        with open(input_source, "r") as f:
-            session_metadata["platform"] = json.load(f)
-        return session_metadata
+        sources["platform"] = input_source
+        return sources
+
+    @staticmethod
+    def _read_json(json_path: Path) -> dict:
+        """Read the contents of a json file."""
+        return codec.loads(staging.read_input(json_path))
+
+    def _extract(self) -> dict:
+        """extract data from the platform json file and tiff file (in the
+        future).
+        If input source is a file, will extract the data from the file.
+        The input source is a directory, will extract the data from the
+        directory.
+
+        Returns
+        -------
+        dict
+            The extracted data from the platform json file.
+        """
+        return {
+            name: self._read_json(json_path)
+            for name, json_path in self._get_extract_sources().items()
+        }
+
+    async def _aextract(self) -> dict:
+        """Same as _extract, but the json files are read concurrently.
+
+        Returns
+        -------
+        dict
+            The extracted data from the platform json file.
+        """
+        sources = await asyncio.to_thread(self._get_extract_sources)
+        contents = await asyncio.gather(
+            *[
+                asyncio.to_thread(self._read_json, json_path)
+                for json_path in sources.values()
+            ]
+        )
+        return dict(zip(sources.keys(), contents))
 
     def _transform(self, extracted_source: dict) -> Session:
         """Transform the platform data into a session object
@@ -133,6 +180,9 @@ class MesoscopeEtl(GenericEtl[JobSettings]):
         Session
             The session object
         """
+        from PIL import Image
+        from PIL.TiffTags import TAGS
+
         imaging_plane_groups = extracted_source["platform"][
             "imaging_plane_groups"
         ]
@@ -198,7 +248,11 @@ class MesoscopeEtl(GenericEtl[JobSettings]):
         # Derived from
         # https://stackoverflow.com/questions/46477712/
         #   reading-tiff-image-metadata-in-python
-        with Image.open(vasculature_fp) as img:
+        with (
+            span("tiff_open", path=vasculature_fp),
+            staging.input_file(vasculature_fp) as vasculature_file,
+            Image.open(vasculature_file) as img,
+        ):
             vasculature_dt = [
                 img.tag[key]
                 for key in img.tag.keys()
@@ -230,19 +284,6 @@ class MesoscopeEtl(GenericEtl[JobSettings]):
             active_mouse_platform=True,
         )
 
-    def run_job(self) -> None:
-        """
-        Run the etl job
-        Returns
-        -------
-        None
-        """
-        extracted = self._extract()
-        transformed = self._transform(extracted_source=extracted)
-        transformed.write_standard_file(
-            output_directory=self.job_settings.output_directory
-        )
-
     @classmethod
     def from_args(cls, args: list):
         """
@@ -253,28 +294,13 @@ class MesoscopeEtl(GenericEtl[JobSettings]):
         A list of command line arguments to parse.
         """
 
-        parser = argparse.ArgumentParser()
-        parser.add_argument(
-            "-u",
-            "--job-settings",
-            required=True,
-            type=json.loads,
-            help=(
-                r"""
-                Custom settings defined by the user defined as a json
-                 string. For example: -u
-                 '{"experimenter_full_name":["John Smith","Jane Smith"],
-                 "subject_id":"12345",
-                 "session_start_time":"2023-10-10T10:10:10",
-                 "session_end_time":"2023-10-10T18:10:10",
-                 "project":"my_project"}
-                """
-            ),
-        )
+        parser = arguments.mesoscope_parser()
         job_args = parser.parse_args(args)
         job_settings_from_args = JobSettings(**job_args.job_settings)
         return cls(
             job_settings=job_settings_from_args,
+            profile_path=job_args.profile,
+            trace_path=job_args.trace,
         )
 
 
@@ -0,0 +1,403 @@
+"""Models and helpers to record per-stage metrics of etl jobs."""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+from aind_metadata_mapper.staging import StagingStats
+from aind_metadata_mapper.tracing import span
+
+# Number of allocation sites kept for each stage of a memory profile
+_TOP_ALLOCATION_SITES = 10
+# Number of functions listed for each stage in a cpu profile summary
+_TOP_FUNCTIONS = 25
+
+
+class StageMetrics(BaseModel):
+    """Time spent in one stage of an etl job."""
+
+    model_config = ConfigDict(extra="forbid")
+    wall_time: float = Field(0.0, description="Wall clock time in seconds")
+    cpu_time: float = Field(
+        0.0, description="CPU time of the thread running the stage in seconds"
+    )
+
+
+class AllocationSite(BaseModel):
+    """Memory allocated at one line of code during a stage."""
+
+    model_config = ConfigDict(extra="forbid")
+    location: str = Field(..., description="File and line number")
+    size: int = Field(
+        ...,
+        description=(
+            "Bytes allocated at the location during the stage and still held "
+            "when it ended"
+        ),
+    )
+    count: int = Field(..., description="Number of those allocations")
+
+
+class StageMemory(BaseModel):
+    """Memory allocated by one stage of an etl job."""
+
+    model_config = ConfigDict(extra="forbid")
+    peak_memory: int = Field(
+        0,
+        description=(
+            "Peak traced memory during the stage in bytes, above the memory "
+            "traced when it started"
+        ),
+    )
+    top_allocations: List[AllocationSite] = Field(
+        default_factory=list,
+        description="Locations that allocated the most memory, largest first",
+    )
+
+
+class MemoryProfile(BaseModel):
+    """Peak memory and top allocation sites of each stage of an etl job, as
+    traced by tracemalloc. Only Python allocations are traced, which
+    includes the buffers of numpy arrays but not of every C extension."""
+
+    model_config = ConfigDict(extra="forbid")
+    peak_memory: int = Field(
+        0,
+        description=(
+            "Peak traced memory during the job in bytes, above the memory "
+            "traced when it started"
+        ),
+    )
+    stages: Dict[str, StageMemory] = Field(default_factory=dict)
+    _start_memory: int = PrivateAttr(0)
+
+
+class CpuProfile:
+    """Deterministic profile of each stage of an etl job, as recorded by
+    cProfile. Only the thread that runs a stage is profiled."""
+
+    def __init__(self):
+        """Class constructor"""
+        self.stages: Dict[str, cProfile.Profile] = {}
+
+    def write(
+        self, profile_path: Union[Path, str], top_n: int = _TOP_FUNCTIONS
+    ) -> Path:
+        """
+        Write the stats of all the stages to profile_path, which can be read
+        with pstats or snakeviz, and a summary of the top_n functions of each
+        stage by cumulative time to profile_path with .txt appended.
+        Parameters
+        ----------
+        profile_path : Union[Path, str]
+        top_n : int
+          Number of functions listed for each stage. Default is 25.
+
+        Returns
+        -------
+        Path
+          Path of the summary.
+
+        """
+        profile_path = Path(profile_path)
+        summary_path = profile_path.with_name(profile_path.name + ".txt")
+        summary = io.StringIO()
+        for stage_name, profile in self.stages.items():
+            summary.write(f"Stage {stage_name}\n")
+            pstats.Stats(profile, stream=summary).sort_stats(
+                pstats.SortKey.CUMULATIVE
+            ).print_stats(top_n)
+        pstats.Stats(*self.stages.values()).dump_stats(profile_path)
+        summary_path.write_text(summary.getvalue())
+        logging.info(
+            "Wrote cpu profile to %s and its summary to %s",
+            profile_path,
+            summary_path,
+        )
+        return summary_path
+
+
+class JobMetrics(BaseModel):
+    """Per-stage timing and byte counters of an etl job."""
+
+    model_config = ConfigDict(extra="forbid")
+    extract: StageMetrics = Field(default_factory=StageMetrics)
+    transform: StageMetrics = Field(default_factory=StageMetrics)
+    validation: StageMetrics = Field(default_factory=StageMetrics)
+    load: StageMetrics = Field(default_factory=StageMetrics)
+    bytes_read: Optional[int] = Field(
+        None,
+        description=(
+            "Bytes read by the process while the job ran. None if the "
+            "platform does not expose io counters."
+        ),
+    )
+    bytes_written: Optional[int] = Field(
+        None,
+        description=(
+            "Bytes written by the process while the job ran. None if the "
+            "platform does not expose io counters."
+        ),
+    )
+    memory: Optional[MemoryProfile] = Field(
+        None, description="Set if the job ran with memory profiling"
+    )
+    staging: Optional[StagingStats] = Field(
+        None,
+        description="Set if the job read its inputs through a staging cache",
+    )
+    # Set by profile_cpu while the job runs. It is not kept afterwards, since
+    # cProfile profiles cannot be serialized.
+    _cpu_profile: Optional[CpuProfile] = PrivateAttr(None)
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    """Snapshot of the traced memory, without the allocations of tracemalloc
+    itself."""
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+
+
+@contextmanager
+def trace_memory(memory_profile: Optional[MemoryProfile]) -> Iterator[None]:
+    """
+    Trace the memory allocated in the body of the with statement and record
+    its peak on memory_profile. Does nothing if memory_profile is None.
+    Tracing is started if it is not running yet and stopped afterwards.
+    Parameters
+    ----------
+    memory_profile : Optional[MemoryProfile]
+      Profile to update.
+
+    """
+    if memory_profile is None:
+        yield
+        return
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    memory_profile._start_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        memory_profile.peak_memory = max(
+            memory_profile.peak_memory,
+            tracemalloc.get_traced_memory()[1] - memory_profile._start_memory,
+        )
+        if started_tracing:
+            tracemalloc.stop()
+
+
+@contextmanager
+def profile_stage(
+    memory_profile: Optional[MemoryProfile], stage_name: str
+) -> Iterator[None]:
+    """
+    Record the peak memory and the top allocation sites of the body of the
+    with statement as a stage of memory_profile. Does nothing if
+    memory_profile is None or memory is not being traced. Snapshots are
+    taken before and after the stage, which is slow, so this is only meant
+    for profiling runs.
+    Parameters
+    ----------
+    memory_profile : Optional[MemoryProfile]
+      Profile to update.
+    stage_name : str
+
+    """
+    if memory_profile is None or not tracemalloc.is_tracing():
+        yield
+        return
+    start_snapshot = _take_snapshot()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        statistics = _take_snapshot().compare_to(start_snapshot, "lineno")
+        memory_profile.stages[stage_name] = StageMemory(
+            peak_memory=peak_memory - start_memory,
+            top_allocations=[
+                AllocationSite(
+                    location=(
+                        f"{statistic.traceback[0].filename}:"
+                        f"{statistic.traceback[0].lineno}"
+                    ),
+                    size=statistic.size_diff,
+                    count=statistic.count_diff,
+                )
+                for statistic in statistics[:_TOP_ALLOCATION_SITES]
+                if statistic.size_diff > 0
+            ],
+        )
+        memory_profile.peak_memory = max(
+            memory_profile.peak_memory,
+            peak_memory - memory_profile._start_memory,
+        )
+
+
+@contextmanager
+def profile_cpu_stage(
+    cpu_profile: Optional[CpuProfile], stage_name: str
+) -> Iterator[None]:
+    """
+    Profile the body of the with statement with cProfile as a stage of
+    cpu_profile. Does nothing if cpu_profile is None.
+    Parameters
+    ----------
+    cpu_profile : Optional[CpuProfile]
+      Profile to update.
+    stage_name : str
+
+    """
+    if cpu_profile is None:
+        yield
+        return
+    if stage_name not in cpu_profile.stages:
+        cpu_profile.stages[stage_name] = cProfile.Profile()
+    profile = cpu_profile.stages[stage_name]
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+
+
+@contextmanager
+def profile_cpu(
+    metrics: Optional[JobMetrics], profile_path: Optional[Union[Path, str]]
+) -> Iterator[None]:
+    """
+    Profile the stages measured on metrics in the body of the with statement
+    with cProfile, then write the profile to profile_path. Does nothing if
+    metrics or profile_path is None.
+    Parameters
+    ----------
+    metrics : Optional[JobMetrics]
+    profile_path : Optional[Union[Path, str]]
+
+    """
+    if metrics is None or profile_path is None:
+        yield
+        return
+    cpu_profile = CpuProfile()
+    metrics._cpu_profile = cpu_profile
+    try:
+        yield
+    finally:
+        metrics._cpu_profile = None
+        cpu_profile.write(profile_path)
+
+
+def report_memory_profile(
+    memory_profile: Optional[MemoryProfile],
+    report_path: Optional[Union[Path, str]],
+) -> None:
+    """
+    Write a memory profile to a report file as json, or log it if there is
+    no report file. Does nothing if memory_profile is None.
+    Parameters
+    ----------
+    memory_profile : Optional[MemoryProfile]
+    report_path : Optional[Union[Path, str]]
+
+    """
+    if memory_profile is None:
+        return
+    if report_path is None:
+        logging.info("Memory profile: %s", memory_profile.model_dump_json())
+    else:
+        Path(report_path).write_text(memory_profile.model_dump_json(indent=3))
+
+
+@contextmanager
+def measure_stage(
+    metrics: Optional[JobMetrics], stage_name: str
+) -> Iterator[None]:
+    """
+    Add the wall and cpu time spent in the body of the with statement to a
+    stage of metrics. If metrics has a memory profile, the memory allocated
+    by the stage is profiled too, and so are its function calls while
+    profile_cpu is running. The stage is traced as a span either way.
+    Metrics are not updated if they are None.
+    Parameters
+    ----------
+    metrics : Optional[JobMetrics]
+      Metrics to update.
+    stage_name : str
+      One of extract, transform, validation or load.
+
+    """
+    memory_profile = metrics.memory if metrics is not None else None
+    cpu_profile = metrics._cpu_profile if metrics is not None else None
+    with (
+        span(stage_name),
+        profile_stage(memory_profile, stage_name),
+        profile_cpu_stage(cpu_profile, stage_name),
+    ):
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            if metrics is not None:
+                stage_metrics = getattr(metrics, stage_name)
+                stage_metrics.wall_time += time.perf_counter() - wall_start
+                stage_metrics.cpu_time += time.thread_time() - cpu_start
+
+
+def read_io_counters() -> Optional[Tuple[int, int]]:
+    """
+    Read the number of bytes read and written by this process so far. The
+    counters are process wide, so they are only exact for a job when it is
+    the only one running in the process.
+    Returns
+    -------
+    Optional[Tuple[int, int]]
+      (bytes read, bytes written), or None if the platform does not expose
+      /proc/self/io.
+
+    """
+    try:
+        fd = os.open("/proc/self/io", os.O_RDONLY)
+        try:
+            contents = os.read(fd, 4096)
+        finally:
+            os.close(fd)
+        counters = dict(line.split(b": ", 1) for line in contents.splitlines())
+        return int(counters[b"rchar"]), int(counters[b"wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def record_io(
+    metrics: Optional[JobMetrics],
+    io_start: Optional[Tuple[int, int]],
+) -> None:
+    """
+    Set the bytes read and written since io_start on metrics.
+    Parameters
+    ----------
+    metrics : Optional[JobMetrics]
+      Metrics to update. Does nothing if None.
+    io_start : Optional[Tuple[int, int]]
+      Counters from read_io_counters when the job started.
+
+    """
+    io_end = read_io_counters()
+    if metrics is None or io_start is None or io_end is None:
+        return
+    metrics.bytes_read = io_end[0] - io_start[0]
+    metrics.bytes_written = io_end[1] - io_start[1]
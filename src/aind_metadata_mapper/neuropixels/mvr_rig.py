@@ -38,6 +38,10 @@ class MvrRigEtl(NeuropixelsRigEtl):
         self.mvr_mapping = mvr_mapping
         self.mvr_config_source = mvr_config_source
 
+    def _input_files(self) -> List[Path]:
+        """Rig file and MVR config file read by the etl job."""
+        return super()._input_files() + [self.mvr_config_source]
+
     def _extract(self) -> ExtractContext:
         """Extracts MVR-related camera information from config file."""
         mvr_config = utils.load_config(self.mvr_config_source)
@@ -8,6 +8,7 @@ from typing import Optional
 from aind_data_schema.core.rig import Rig  # type: ignore
 from pydantic import BaseModel
 
+from aind_metadata_mapper import staging
 from aind_metadata_mapper.core import BaseEtl
 
 logger = logging.getLogger(__name__)
@@ -28,6 +29,7 @@ class NeuropixelsRigEtl(BaseEtl):
         self,
         input_source: Path,
         output_directory: Path,
+        **kwargs,
     ):
         """Class constructor for Neuropixels rig etl class.
 
@@ -37,14 +39,16 @@ class NeuropixelsRigEtl(BaseEtl):
           Can be a string or a Path
         output_directory : Path
           The directory where to save the json files.
+        **kwargs
+          Passed to BaseEtl, such as validation_mode
         """
+        super().__init__(input_source, output_directory, **kwargs)
         self.input_source: Path = input_source
-        self.output_directory = output_directory
 
     def _extract(self) -> Rig:
         """Extracts rig-related information from config files."""
         return Rig.model_validate_json(
-            self.input_source.read_text(),
+            staging.read_input(self.input_source),
         )
 
     def _transform(self, extracted_source: Rig) -> Rig:
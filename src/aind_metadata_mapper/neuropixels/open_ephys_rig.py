@@ -1,5 +1,6 @@
 """ETL for the Open Ephys config."""
 
+import asyncio
 import logging
 from datetime import date
 from pathlib import Path
@@ -54,13 +55,38 @@ class OpenEphysRigEtl(NeuropixelsRigEtl):
         )
         self.modification_date = modification_date
 
+    def _input_files(self) -> List[Path]:
+        """Rig file and Open Ephys settings files read by the etl job."""
+        return super()._input_files() + list(self.open_ephys_settings_sources)
+
     def _extract(self) -> ExtractContext:
         """Extracts Open Ephys-related probe information from config files."""
         current = super()._extract()
+        parsed_settings = [
+            utils.load_xml(source)
+            for source in self.open_ephys_settings_sources
+        ]
+        return self._build_extract_context(current, parsed_settings)
+
+    async def _aextract(self) -> ExtractContext:
+        """Same as _extract, but the rig and config files are read
+        concurrently."""
+        current, *parsed_settings = await asyncio.gather(
+            asyncio.to_thread(super()._extract),
+            *[
+                asyncio.to_thread(utils.load_xml, source)
+                for source in self.open_ephys_settings_sources
+            ],
+        )
+        return self._build_extract_context(current, parsed_settings)
+
+    def _build_extract_context(
+        self, current: Rig, parsed_settings: List[ElementTree.Element]
+    ) -> ExtractContext:
+        """Extracts probe information from the parsed config files."""
         versions = []
         probes = []
-        for source in self.open_ephys_settings_sources:
-            parsed = utils.load_xml(source)
+        for parsed in parsed_settings:
             versions.append(self._extract_version(parsed))
             probes.extend(
                 self._extract_probes(
@@ -1,6 +1,7 @@
 """ETL for the Sync config."""
 
 from pathlib import Path
+from typing import List
 
 from aind_data_schema.core.rig import Rig  # type: ignore
 from aind_data_schema.models.devices import DAQChannel  # type: ignore
@@ -44,6 +45,10 @@ class SyncRigEtl(NeuropixelsRigEtl):
         self.config_source = config_source
         self.sync_daq_name = sync_daq_name
 
+    def _input_files(self) -> List[Path]:
+        """Rig file and Sync config file read by the etl job."""
+        return super()._input_files() + [self.config_source]
+
     def _extract(self) -> ExtractContext:
         """Extracts Sync-related daq information from config files."""
         config = utils.load_yaml(self.config_source)
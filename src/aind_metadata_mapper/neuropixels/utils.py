@@ -8,6 +8,9 @@ from xml.etree import ElementTree
 
 import yaml  # type: ignore
 
+from aind_metadata_mapper import staging
+from aind_metadata_mapper.tracing import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,7 +31,8 @@ def find_elements(
 
 def load_xml(xml_path: Path) -> ElementTree.Element:
     """Load xml file from path."""
-    return ElementTree.fromstring(xml_path.read_text())
+    with span("xml_parse", path=xml_path):
+        return ElementTree.fromstring(staging.read_input(xml_path))
 
 
 def load_config(config_path: Path) -> ConfigParser:
@@ -40,7 +44,7 @@ def load_config(config_path: Path) -> ConfigParser:
 
 def load_yaml(yaml_path: Path) -> dict:
     """Load yaml file from path."""
-    return yaml.safe_load(yaml_path.read_text())
+    return yaml.safe_load(staging.read_input(yaml_path))
 
 
 def find_update(
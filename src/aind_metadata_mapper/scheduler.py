@@ -0,0 +1,342 @@
+"""Pipelined batch runs of etl jobs. The extract stage of most jobs is
+I/O-bound, such as reading tiff headers or xml files on network storage,
+while transform and validation are CPU-bound. The scheduler runs extract in
+a pool of threads and transform, validation and load in a pool of worker
+processes, connected by a bounded queue, so that the reads of the next jobs
+overlap the validation of the previous ones."""
+
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Iterable, Iterator, Optional, Tuple, Type, Union
+
+from aind_data_schema.base import AindCoreModel
+from pydantic_settings import BaseSettings
+
+from aind_metadata_mapper.core import (
+    GenericEtl,
+    JobResponse,
+    _attach_documents,
+    _cached_extract,
+    _check_result_cache,
+    _collect_documents,
+    _error_response,
+    _process_pool,
+    _write_collected,
+)
+from aind_metadata_mapper.metrics import JobMetrics, measure_stage
+from aind_metadata_mapper.staging import stage_inputs
+
+# Put on the queues when a stage has no more work.
+_DONE = object()
+
+# How long a blocked stage waits before checking if the run was stopped.
+_POLL_SECONDS = 0.1
+
+_ExtractedJob = Tuple[
+    GenericEtl, Any, JobMetrics, Optional[str], Optional[AindCoreModel]
+]
+
+
+def _extract_job(
+    etl_class: Type[GenericEtl],
+    job_settings: Union[BaseSettings, str],
+    etl_kwargs: dict,
+) -> _ExtractedJob:
+    """
+    Construct an etl job and run its extract stage, unless its model is in
+    the result cache. Runs in the extract threads.
+    Parameters
+    ----------
+    etl_class : Type[GenericEtl]
+    job_settings : Union[BaseSettings, str]
+      Settings passed to the etl class constructor.
+    etl_kwargs : dict
+      Extra keyword arguments passed to the etl class constructor.
+
+    Returns
+    -------
+    Tuple[GenericEtl, Any, JobMetrics, Optional[str], Optional[AindCoreModel]]
+      The etl job, the extracted data, the metrics with the extract time,
+      the result cache key and the cached model. The extracted data is None
+      if the model was cached.
+
+    """
+    etl = etl_class(job_settings=job_settings, **etl_kwargs)
+    metrics = JobMetrics()
+    cache_key, cached_model = _check_result_cache(etl)
+    extracted = None
+    if cached_model is None:
+        with (
+            measure_stage(metrics, "extract"),
+            stage_inputs(etl.staging_cache) as staging_stats,
+        ):
+            extracted = _cached_extract(etl)
+        metrics.staging = staging_stats
+    return etl, extracted, metrics, cache_key, cached_model
+
+
+def _finish_job(
+    etl: GenericEtl,
+    extracted: Any,
+    metrics: JobMetrics,
+    cache_key: Optional[str],
+    cached_model: Optional[AindCoreModel],
+) -> JobResponse:
+    """
+    Run the transform, validation and load stages of an extracted job. This
+    is the unit of work sent to the worker processes, so it needs to be a
+    module level function. Inputs read by the transform stage are staged
+    like those of the extract stage, and counted in the same stats.
+    Parameters
+    ----------
+    etl : GenericEtl
+    extracted : Any
+      Output of the extract stage.
+    metrics : JobMetrics
+      Metrics of the job, with the extract time already recorded.
+    cache_key : Optional[str]
+      Result cache key of the job, if a result cache is used.
+    cached_model : Optional[AindCoreModel]
+      The model from the result cache, which is loaded instead.
+
+    Returns
+    -------
+    JobResponse
+
+    """
+    if cached_model is not None:
+        job_response = etl._load_cached(cache_key, cached_model, metrics)
+    else:
+        with stage_inputs(etl.staging_cache, stats=metrics.staging):
+            job_response = etl._transform_and_load(
+                extracted, metrics, cache_key
+            )
+        if cache_key is not None:
+            job_response.cache_hit = False
+    return _attach_documents(etl, job_response)
+
+
+def _acquire(slots: threading.Semaphore, stop: threading.Event) -> bool:
+    """Acquire one of the slots, unless the run is stopped first."""
+    while not slots.acquire(timeout=_POLL_SECONDS):
+        if stop.is_set():
+            return False
+    return True
+
+
+class _Pipeline:
+    """State shared by the threads of one pipelined run."""
+
+    def __init__(
+        self,
+        etl_class: Type[GenericEtl],
+        settings_iterable: Iterable[Union[BaseSettings, str]],
+        etl_kwargs: dict,
+        extract_workers: int,
+        transform_workers: int,
+        queue_size: int,
+        max_tasks_per_worker: Optional[int] = None,
+    ):
+        """
+        Class constructor for _Pipeline.
+        Parameters
+        ----------
+        etl_class : Type[GenericEtl]
+        settings_iterable : Iterable[Union[BaseSettings, str]]
+        etl_kwargs : dict
+        extract_workers : int
+          Number of extract threads.
+        transform_workers : int
+          Number of worker processes.
+        queue_size : int
+          Number of extracted jobs that can wait for a worker process.
+        max_tasks_per_worker : Optional[int]
+          Number of jobs a worker runs before it is replaced with a fresh
+          process. None means workers live as long as the pool.
+        """
+        self.etl_class = etl_class
+        self.etl_kwargs, self.sink = _collect_documents(etl_kwargs)
+        self.extract_workers = extract_workers
+        self.transform_workers = transform_workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.max_in_flight = 2 * transform_workers
+        self.extracted = queue.Queue(maxsize=queue_size)
+        # Each response on this queue holds a slot until the consumer takes
+        # the next one, so at most max_in_flight responses wait here
+        self.finished = queue.Queue()
+        self.stop = threading.Event()
+        self._settings = iter(settings_iterable)
+        self._settings_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+
+    def _next_settings(self) -> Any:
+        """Take the settings of the next job, or _DONE if there are none
+        left or the run is stopped."""
+        with self._settings_lock:
+            if self.stop.is_set():
+                return _DONE
+            return next(self._settings, _DONE)
+
+    def _put_extracted(self, item: Any) -> None:
+        """Put an item on the bounded queue, which blocks the extract thread
+        while the worker processes are behind."""
+        while not self.stop.is_set():
+            try:
+                self.extracted.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def extract(self) -> None:
+        """Run the extract stage of jobs until the settings run out."""
+        try:
+            while (job_settings := self._next_settings()) is not _DONE:
+                try:
+                    item = _extract_job(
+                        self.etl_class, job_settings, self.etl_kwargs
+                    )
+                except Exception as e:
+                    if _acquire(self._slots, self.stop):
+                        self.finished.put(_error_response(e))
+                    continue
+                self._put_extracted(item)
+        finally:
+            self._put_extracted(_DONE)
+
+    def release_slot(self) -> None:
+        """Free the slot of a response once the consumer is done with it."""
+        self._slots.release()
+
+    def _on_finished(self, future: Future) -> None:
+        """Hand over the response of a job, or a 500 if it raised an error
+        or was lost with a worker that died."""
+        try:
+            job_response = future.result()
+        except Exception as e:
+            job_response = _error_response(e)
+        self.finished.put(_write_collected(job_response, self.sink))
+
+    def _submit(self, item: _ExtractedJob) -> None:
+        """Send an extracted job to the worker processes. A pool that broke
+        when a worker died is replaced with a new one."""
+        if self.executor is None:
+            self.executor = _process_pool(
+                self.transform_workers, self.max_tasks_per_worker
+            )
+        try:
+            future = self.executor.submit(_finish_job, *item)
+        except BrokenProcessPool:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+            return self._submit(item)
+        future.add_done_callback(self._on_finished)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes, dropping the jobs that did not start."""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    def dispatch(self) -> None:
+        """Send extracted jobs to the worker processes, with at most
+        2 * transform_workers in flight or waiting for the consumer, then
+        wait for them to finish."""
+        running_extractors = self.extract_workers
+        while running_extractors and not self.stop.is_set():
+            try:
+                item = self.extracted.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                running_extractors -= 1
+            elif _acquire(self._slots, self.stop):
+                self._submit(item)
+        for _ in range(self.max_in_flight):
+            if not _acquire(self._slots, self.stop):
+                return
+        self.finished.put(_DONE)
+
+
+def run_pipelined(
+    etl_class: Type[GenericEtl],
+    settings_iterable: Iterable[Union[BaseSettings, str]],
+    extract_workers: int = 4,
+    transform_workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    max_tasks_per_worker: Optional[int] = 100,
+    **kwargs,
+) -> Iterator[JobResponse]:
+    """
+    Run one job per job settings, with the extract stage in a pool of
+    threads and the transform, validation and load stages in a pool of
+    worker processes. Extracted jobs wait for a worker in a bounded queue,
+    so when the workers fall behind the extract threads block and at most
+    extract_workers + queue_size + 2 * transform_workers extracted jobs are
+    held in memory. A job keeps its place among the 2 * transform_workers
+    in flight until its response is consumed, so the same holds when the
+    consumer falls behind. The etl jobs, their kwargs and their extracted
+    data are sent to the workers, so they need to be picklable, except for
+    a sink, which is written to in this process with the documents the
+    workers send back. If a staging cache is set, the inputs are read
+    through it in both stages, so it needs to be a cache the processes can
+    share, such as a DiskCache. Memory profiling, cpu profiling and tracing
+    are not run, as they are per job options of run_job.
+    Parameters
+    ----------
+    etl_class : Type[GenericEtl]
+      The etl class to construct.
+    settings_iterable : Iterable[Union[BaseSettings, str]]
+      Job settings, or json strings of job settings, one per job. It is
+      consumed lazily, so it can be a generator over a large backfill.
+    extract_workers : int
+      Number of extract threads. Default is 4.
+    transform_workers : Optional[int]
+      Number of worker processes. Defaults to the number of cpus.
+    queue_size : Optional[int]
+      Number of extracted jobs that can wait for a worker process. Defaults
+      to 2 * transform_workers.
+    max_tasks_per_worker : Optional[int]
+      Number of jobs a worker runs before it is replaced with a fresh
+      process. Default is 100. None means workers are never replaced.
+      Ignored before Python 3.11.
+    **kwargs
+      Passed to the class constructor for every job, such as
+      validation_mode.
+
+    Returns
+    -------
+    Iterator[JobResponse]
+      One response per job, yielded as each job finishes. Jobs that raise
+      an error, or that are lost with a worker process that dies, are
+      reported with a 500 status_code.
+
+    """
+    transform_workers = transform_workers or os.cpu_count() or 1
+    pipeline = _Pipeline(
+        etl_class,
+        settings_iterable,
+        kwargs,
+        extract_workers=extract_workers,
+        transform_workers=transform_workers,
+        queue_size=queue_size or 2 * transform_workers,
+        max_tasks_per_worker=max_tasks_per_worker,
+    )
+    threads = [
+        threading.Thread(target=pipeline.extract, daemon=True)
+        for _ in range(extract_workers)
+    ]
+    threads.append(threading.Thread(target=pipeline.dispatch, daemon=True))
+    for thread in threads:
+        thread.start()
+    try:
+        while (job_response := pipeline.finished.get()) is not _DONE:
+            yield job_response
+            pipeline.release_slot()
+    finally:
+        pipeline.stop.set()
+        for thread in threads:
+            thread.join()
+        pipeline.shutdown()
@@ -0,0 +1,344 @@
+"""Long-running server that runs etl jobs on a pool of warm workers."""
+
+import argparse
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import socketserver
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.context import BaseContext
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+
+from aind_metadata_mapper.cli import ETL_REGISTRY, run_registered_job
+from aind_metadata_mapper.core import (
+    JobResponse,
+    _error_response,
+    _process_pool,
+)
+
+_JOBS_PATH_PREFIX = "/jobs/"
+
+
+def _etl_module_names() -> Iterator[str]:
+    """Every registered etl module, followed by the heavy dependencies it
+    imports lazily, listed in its LAZY_IMPORTS."""
+    for module_name, _ in ETL_REGISTRY.values():
+        yield module_name
+        module = importlib.import_module(module_name)
+        yield from getattr(module, "LAZY_IMPORTS", ())
+
+
+def _preload_etl_modules() -> None:
+    """Import every registered etl module, along with aind_data_schema, the
+    pydantic validators of its models and the heavy dependencies it imports
+    lazily, so that jobs do not pay for it. Run in the server before the
+    workers are started and again in each worker in case they are spawned
+    cold."""
+    for module_name in _etl_module_names():
+        importlib.import_module(module_name)
+
+
+def _preloaded_context() -> Optional[BaseContext]:
+    """
+    Context that forks workers from a forkserver that imported the etl
+    modules, so that workers replaced after max_tasks_per_worker jobs or
+    after a crash start warm instead of importing everything again.
+    Returns
+    -------
+    Optional[BaseContext]
+      None where forkserver is not available, such as on Windows.
+
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return None  # pragma: no cover
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(list(_etl_module_names()))
+    return context
+
+
+def _warm_up() -> None:
+    """No-op job sent to each worker so that it starts with the pool."""
+
+
+class WorkerPool:
+    """Pool of worker processes that run the jobs sent to the server. Every
+    worker is started and warmed with the pool. If a worker dies, such as
+    when it is killed for running out of memory, the jobs it took down are
+    answered with a 500 and the pool is replaced."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_tasks_per_worker: Optional[int] = None,
+        job_function: Callable[..., JobResponse] = run_registered_job,
+    ):
+        """
+        Class constructor for WorkerPool.
+        Parameters
+        ----------
+        workers : Optional[int]
+          Number of worker processes. Defaults to the number of cpus.
+        max_tasks_per_worker : Optional[int]
+          Number of jobs a worker runs before it is replaced with a fresh
+          process. None means workers live as long as the pool.
+        job_function : Callable[..., JobResponse]
+          Module level function that runs one job. Default is
+          run_registered_job.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.job_function = job_function
+        self._lock = threading.Lock()
+        self._executor = self._start()
+
+    def _start(self) -> ProcessPoolExecutor:
+        """Start the worker processes and wait until they are warm, rather
+        than starting them on the first requests."""
+        executor = _process_pool(
+            self.workers,
+            self.max_tasks_per_worker,
+            initializer=_preload_etl_modules,
+            mp_context=_preloaded_context(),
+        )
+        wait([executor.submit(_warm_up) for _ in range(self.workers)])
+        return executor
+
+    def _replace(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Replace a broken pool, unless another request already did."""
+        with self._lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False)
+                self._executor = self._start()
+            return self._executor
+
+    def run(self, *args) -> JobResponse:
+        """
+        Run a job on a worker and wait for its response.
+        Parameters
+        ----------
+        *args
+          Passed to job_function, such as the etl name and the json of the
+          job settings.
+
+        Returns
+        -------
+        JobResponse
+          A 500 response if the worker died while running the job.
+
+        """
+        executor = self._executor
+        try:
+            future = executor.submit(self.job_function, *args)
+        except BrokenProcessPool:
+            # A worker died between jobs, so this job never started
+            executor = self._replace(executor)
+            future = executor.submit(self.job_function, *args)
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            self._replace(executor)
+            return _error_response(e)
+
+    def shutdown(self) -> None:
+        """Stop the workers once their jobs finish."""
+        self._executor.shutdown()
+
+    def __enter__(self) -> "WorkerPool":
+        """Use the pool for the body of a with statement."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Shut the pool down."""
+        self.shutdown()
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """Handles GET /health and POST /jobs/<etl>, where the body of the POST
+    is the json of the job settings. The JobResponse is sent back as json
+    with its status_code as the http status."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status_code: int, body: bytes) -> None:
+        """
+        Send a json response.
+        Parameters
+        ----------
+        status_code : int
+        body : bytes
+
+        """
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        """Report that the server is up and which etls it can run."""
+        if self.path != "/health":
+            self._send_json(404, b'{"message": "Not found"}')
+            return
+        body = json.dumps({"status": "ok", "etls": sorted(ETL_REGISTRY)})
+        self._send_json(200, body.encode("utf-8"))
+
+    def do_POST(self) -> None:
+        """Run a job on the worker pool and send back its JobResponse."""
+        content_length = int(self.headers.get("Content-Length", 0))
+        job_settings = self.rfile.read(content_length).decode("utf-8")
+        etl_name = self.path.removeprefix(_JOBS_PATH_PREFIX)
+        if (
+            not self.path.startswith(_JOBS_PATH_PREFIX)
+            or etl_name not in ETL_REGISTRY
+        ):
+            self._send_json(404, b'{"message": "Not found"}')
+            return
+        job_response = self.server.pool.run(etl_name, job_settings)
+        self._send_json(
+            job_response.status_code,
+            job_response.model_dump_json().encode("utf-8"),
+        )
+
+    def address_string(self) -> str:
+        """Client address for the logs. Unix socket clients have none."""
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return "unix-socket"
+
+    def log_message(self, format: str, *args) -> None:
+        """Send request logs through logging instead of stderr."""
+        logging.info("%s - " + format, self.address_string(), *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    """Http server listening on a Unix socket. Each request is handled in its
+    own thread."""
+
+    daemon_threads = True
+
+
+def make_server(
+    pool: WorkerPool,
+    address: Union[Tuple[str, int], Path, str],
+) -> socketserver.BaseServer:
+    """
+    Create a server that runs the jobs it receives on pool.
+    Parameters
+    ----------
+    pool : WorkerPool
+      Worker pool to run the jobs on.
+    address : Union[Tuple[str, int], Path, str]
+      (host, port) to listen on over TCP, or the path of a Unix socket.
+
+    Returns
+    -------
+    socketserver.BaseServer
+      Call serve_forever to start handling requests.
+
+    """
+    if isinstance(address, tuple):
+        server = ThreadingHTTPServer(address, JobRequestHandler)
+    else:
+        server = UnixHTTPServer(str(address), JobRequestHandler)
+    server.pool = pool
+    return server
+
+
+def create_pool(
+    workers: Optional[int] = None,
+    max_tasks_per_worker: Optional[int] = None,
+) -> WorkerPool:
+    """
+    Import the etl modules, then start a pool of workers that already have
+    them loaded.
+    Parameters
+    ----------
+    workers : Optional[int]
+      Number of worker processes. Defaults to the number of cpus.
+    max_tasks_per_worker : Optional[int]
+      Number of jobs a worker runs before it is replaced with a fresh
+      process. None means workers live as long as the pool.
+
+    Returns
+    -------
+    WorkerPool
+
+    """
+    _preload_etl_modules()
+    return WorkerPool(workers, max_tasks_per_worker)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Serve jobs until interrupted.
+    Parameters
+    ----------
+    args : Optional[List[str]]
+      Command line arguments. Defaults to sys.argv[1:].
+
+    Returns
+    -------
+    int
+      Exit code.
+
+    """
+    parser = argparse.ArgumentParser(prog="aind-metadata-mapper serve")
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        type=str,
+        help="Host to listen on. Defaults to 127.0.0.1.",
+    )
+    parser.add_argument(
+        "--port",
+        default=8000,
+        type=int,
+        help="Port to listen on. Defaults to 8000.",
+    )
+    parser.add_argument(
+        "--socket",
+        default=None,
+        type=str,
+        help="Path of a Unix socket to listen on instead of host and port.",
+    )
+    parser.add_argument(
+        "--workers",
+        default=None,
+        type=int,
+        help="Number of worker processes. Defaults to the number of cpus.",
+    )
+    parser.add_argument(
+        "--max-tasks-per-worker",
+        default=None,
+        type=int,
+        help="Number of jobs a worker runs before it is replaced.",
+    )
+    cli_args = parser.parse_args(args)
+    address = (
+        cli_args.socket
+        if cli_args.socket is not None
+        else (cli_args.host, cli_args.port)
+    )
+    with (
+        create_pool(cli_args.workers, cli_args.max_tasks_per_worker) as pool,
+        make_server(pool, address) as server,
+    ):
+        logging.info("Serving etl jobs on %s", address)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    if cli_args.socket is not None:
+        Path(cli_args.socket).unlink(missing_ok=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
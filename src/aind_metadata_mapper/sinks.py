@@ -0,0 +1,397 @@
+"""Destinations of the metadata documents written by etl jobs. Besides one
+file per document, documents can be appended in batches to a SQLite
+database, a tar archive or a zip archive, which turns the many small writes
+of a batch run into a few large ones."""
+
+import io
+import sqlite3
+import tarfile
+import threading
+import time
+import warnings
+import zipfile
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from aind_metadata_mapper.writers import WriteMode, write_file
+
+
+def document_name(directory: Optional[Union[Path, str]], filename: str) -> str:
+    """
+    Name of a document in a sink, which is the path it would have as a file.
+    Parameters
+    ----------
+    directory : Optional[Union[Path, str]]
+      Output directory of the job. None for the current directory.
+    filename : str
+      Standard filename of the document, such as session.json.
+
+    Returns
+    -------
+    str
+
+    """
+    if directory is None:
+        return filename
+    return (Path(directory) / filename).as_posix()
+
+
+class BaseSink(ABC):
+    """Interface of a destination of documents. A sink can be shared by the
+    jobs run in the process that owns it, and it is used as a context
+    manager so that buffered documents are written when the batch ends."""
+
+    @property
+    @abstractmethod
+    def location(self) -> str:
+        """Where the documents are written, for messages."""
+
+    @abstractmethod
+    def write(self, name: str, contents: bytes) -> bool:
+        """
+        Write a document, or buffer it until the next flush.
+        Parameters
+        ----------
+        name : str
+          Name of the document, from document_name.
+        contents : bytes
+
+        Returns
+        -------
+        bool
+          False if the write was skipped because the document was unchanged.
+
+        """
+
+    def flush(self) -> None:
+        """Write any buffered documents."""
+
+    def close(self) -> None:
+        """Flush the sink and release its resources."""
+        self.flush()
+
+    def __enter__(self) -> "BaseSink":
+        """Use the sink for the body of a with statement."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the sink."""
+        self.close()
+
+
+class DirectorySink(BaseSink):
+    """Writes each document to its own file, as jobs do without a sink."""
+
+    def __init__(
+        self,
+        root: Optional[Union[Path, str]] = None,
+        write_mode: WriteMode = WriteMode.OVERWRITE,
+    ):
+        """
+        Class constructor for DirectorySink.
+        Parameters
+        ----------
+        root : Optional[Union[Path, str]]
+          Directory that relative document names are resolved against.
+          Defaults to the current working directory.
+        write_mode : WriteMode
+          How each file is written. Default is OVERWRITE.
+        """
+        self.root = Path(root) if root is not None else None
+        self.write_mode = WriteMode(write_mode)
+
+    @property
+    def location(self) -> str:
+        """Root directory of the documents."""
+        return str(self.root or ".")
+
+    def write(self, name: str, contents: bytes) -> bool:
+        """
+        Write a document to its file, creating its directory if needed.
+        Parameters
+        ----------
+        name : str
+        contents : bytes
+
+        Returns
+        -------
+        bool
+          False if the write was skipped because the file was unchanged.
+
+        """
+        path = self.root / name if self.root is not None else Path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return write_file(path, contents, self.write_mode)
+
+
+class CollectingSink(BaseSink):
+    """Keeps the documents in a list. Process pool runners give one to the
+    jobs they send to worker processes in place of a sink that cannot be
+    pickled, such as a batch sink, and write the documents the jobs
+    collected to that sink in the parent process."""
+
+    def __init__(self, location: str):
+        """
+        Class constructor for CollectingSink.
+        Parameters
+        ----------
+        location : str
+          Location of the sink the documents are bound for, for messages.
+        """
+        self._location = location
+        self.documents: List[Tuple[str, bytes]] = []
+
+    @property
+    def location(self) -> str:
+        """Location of the sink the documents are bound for."""
+        return self._location
+
+    def write(self, name: str, contents: bytes) -> bool:
+        """
+        Keep a document.
+        Parameters
+        ----------
+        name : str
+        contents : bytes
+
+        Returns
+        -------
+        bool
+          Always True.
+
+        """
+        self.documents.append((name, contents))
+        return True
+
+
+class BatchSink(BaseSink):
+    """Buffers documents in memory and appends them in batches. Documents
+    are never overwritten, so a name written twice is stored twice and
+    readers should take its last version."""
+
+    def __init__(self, batch_size: int):
+        """
+        Class constructor for BatchSink.
+        Parameters
+        ----------
+        batch_size : int
+          Number of documents buffered before they are written.
+        """
+        self.batch_size = batch_size
+        self._batch: List[Tuple[str, bytes]] = []
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _write_batch(self, documents: List[Tuple[str, bytes]]) -> None:
+        """
+        Append documents to the destination in one write.
+        Parameters
+        ----------
+        documents : List[Tuple[str, bytes]]
+          Pairs of (name, contents).
+
+        """
+
+    def write(self, name: str, contents: bytes) -> bool:
+        """
+        Buffer a document, then write the batch if it is full.
+        Parameters
+        ----------
+        name : str
+        contents : bytes
+
+        Returns
+        -------
+        bool
+          Always True.
+
+        """
+        with self._lock:
+            self._batch.append((name, contents))
+            if len(self._batch) >= self.batch_size:
+                self._flush_batch()
+        return True
+
+    def flush(self) -> None:
+        """Write the buffered documents."""
+        with self._lock:
+            self._flush_batch()
+
+    def _flush_batch(self) -> None:
+        """Write the buffered documents while holding the lock. They stay
+        buffered if the write fails."""
+        if self._batch:
+            self._write_batch(self._batch)
+            self._batch = []
+
+
+class SqliteSink(BatchSink):
+    """Appends documents to the documents table of a SQLite database, with
+    one transaction per batch."""
+
+    def __init__(self, path: Union[Path, str], batch_size: int = 500):
+        """
+        Class constructor for SqliteSink.
+        Parameters
+        ----------
+        path : Union[Path, str]
+          Database file. Created if it does not exist.
+        batch_size : int
+          Number of documents per transaction. Default is 500.
+        """
+        super().__init__(batch_size=batch_size)
+        self.path = Path(path)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+                "contents BLOB NOT NULL, written_at TEXT NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS documents_name "
+                "ON documents (name)"
+            )
+
+    @property
+    def location(self) -> str:
+        """Path of the database."""
+        return str(self.path)
+
+    def _write_batch(self, documents: List[Tuple[str, bytes]]) -> None:
+        """
+        Insert documents in one transaction.
+        Parameters
+        ----------
+        documents : List[Tuple[str, bytes]]
+
+        """
+        written_at = datetime.now(timezone.utc).isoformat()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO documents (name, contents, written_at) "
+                "VALUES (?, ?, ?)",
+                [(name, contents, written_at) for name, contents in documents],
+            )
+
+    def close(self) -> None:
+        """Flush the sink and close the database."""
+        super().close()
+        self._connection.close()
+
+
+class TarSink(BatchSink):
+    """Appends documents to an uncompressed tar archive, which is opened on
+    the first batch and kept open until the sink is closed. The archive is
+    only complete once the sink is closed. Names are stored without a
+    leading slash."""
+
+    def __init__(self, path: Union[Path, str], batch_size: int = 500):
+        """
+        Class constructor for TarSink.
+        Parameters
+        ----------
+        path : Union[Path, str]
+          Archive file. Created if it does not exist.
+        batch_size : int
+          Number of documents per append. Default is 500.
+        """
+        super().__init__(batch_size=batch_size)
+        self.path = Path(path)
+        self._archive: Optional[tarfile.TarFile] = None
+
+    @property
+    def location(self) -> str:
+        """Path of the archive."""
+        return str(self.path)
+
+    def _write_batch(self, documents: List[Tuple[str, bytes]]) -> None:
+        """
+        Append documents to the archive.
+        Parameters
+        ----------
+        documents : List[Tuple[str, bytes]]
+
+        """
+        if self._archive is None:
+            # Opening for appending reads every header, so only open once
+            self._archive = tarfile.open(self.path, "a")
+        mtime = time.time()
+        for name, contents in documents:
+            member = tarfile.TarInfo(name.lstrip("/"))
+            member.size = len(contents)
+            member.mtime = mtime
+            self._archive.addfile(member, io.BytesIO(contents))
+        self._archive.fileobj.flush()
+
+    def close(self) -> None:
+        """Flush the sink and close the archive."""
+        super().close()
+        with self._lock:
+            if self._archive is not None:
+                self._archive.close()
+                self._archive = None
+
+
+class ZipSink(BatchSink):
+    """Appends documents to a zip archive, which is opened on the first
+    batch and kept open until the sink is closed. The archive is only
+    complete once the sink is closed, since its central directory is written
+    then. Names are stored without a leading slash."""
+
+    def __init__(
+        self,
+        path: Union[Path, str],
+        batch_size: int = 500,
+        compression: int = zipfile.ZIP_DEFLATED,
+    ):
+        """
+        Class constructor for ZipSink.
+        Parameters
+        ----------
+        path : Union[Path, str]
+          Archive file. Created if it does not exist.
+        batch_size : int
+          Number of documents per append. Default is 500.
+        compression : int
+          Compression method of zipfile. Default is ZIP_DEFLATED.
+        """
+        super().__init__(batch_size=batch_size)
+        self.path = Path(path)
+        self.compression = compression
+        self._archive: Optional[zipfile.ZipFile] = None
+
+    @property
+    def location(self) -> str:
+        """Path of the archive."""
+        return str(self.path)
+
+    def _write_batch(self, documents: List[Tuple[str, bytes]]) -> None:
+        """
+        Append documents to the archive.
+        Parameters
+        ----------
+        documents : List[Tuple[str, bytes]]
+
+        """
+        if self._archive is None:
+            # Opening for appending reads the central directory, so only
+            # open once
+            self._archive = zipfile.ZipFile(
+                self.path, "a", compression=self.compression
+            )
+        with warnings.catch_warnings():
+            # Documents are appended, so rewritten names are expected
+            warnings.filterwarnings("ignore", "Duplicate name", UserWarning)
+            for name, contents in documents:
+                self._archive.writestr(name.lstrip("/"), contents)
+
+    def close(self) -> None:
+        """Flush the sink and write the central directory of the archive."""
+        super().close()
+        with self._lock:
+            if self._archive is not None:
+                self._archive.close()
+                self._archive = None
@@ -0,0 +1,369 @@
+"""Staging of the raw inputs of etl jobs on local disk. Raw data often sits
+on network storage with a high latency, where every small read that a file
+reader makes costs a round trip. While staging is on, inputs are read in
+large aligned blocks, which are kept in a cache such as a DiskCache on a
+local ssd. Blocks are keyed by the path, size and modification time of
+their file, so repeated and overlapping reads of the same headers are served
+from the local copy until the file changes."""
+
+import io
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from aind_metadata_mapper.cache import BaseCache, make_cache_key
+
+_BLOCK_SIZE = 1024**2
+
+# Blocks an open file keeps in memory, so that the many small reads of a
+# file reader into the same block do not each go back to the cache.
+_OPEN_BLOCKS = 4
+
+
+class StagingStats(BaseModel):
+    """Block reads of the inputs staged while a job ran."""
+
+    model_config = ConfigDict(extra="forbid")
+    hits: int = Field(0, description="Blocks read from the staging cache")
+    misses: int = Field(0, description="Blocks fetched from the input files")
+    bytes_fetched: int = Field(
+        0, description="Bytes read from the input files"
+    )
+
+
+class _Stager:
+    """Reads the blocks of input files through a cache and counts the hits
+    and misses."""
+
+    def __init__(
+        self,
+        cache: BaseCache,
+        block_size: int,
+        stats: Optional[StagingStats] = None,
+    ):
+        """
+        Class constructor for _Stager.
+        Parameters
+        ----------
+        cache : BaseCache
+          Where the blocks are kept.
+        block_size : int
+          Size of the blocks in bytes. Blocks start at multiples of it.
+        stats : Optional[StagingStats]
+          Stats to add the hits and misses to. Defaults to new stats.
+        """
+        self.cache = cache
+        self.block_size = block_size
+        self.stats = stats if stats is not None else StagingStats()
+        self._lock = threading.Lock()
+
+    def read_blocks(
+        self, staged_file: "StagedFile", indices: List[int]
+    ) -> Dict[int, bytes]:
+        """
+        Read blocks of a file from the cache, and fetch the missing ones from
+        the file. Each run of consecutive missing blocks is fetched with one
+        read.
+        Parameters
+        ----------
+        staged_file : StagedFile
+        indices : List[int]
+          Block numbers, in increasing order.
+
+        Returns
+        -------
+        Dict[int, bytes]
+          The contents of each block. The last block of a file is shorter.
+
+        """
+        blocks = {}
+        for index in indices:
+            contents = self.cache.get(staged_file.block_key(index))
+            if contents is not None:
+                blocks[index] = contents
+        missing = [index for index in indices if index not in blocks]
+        bytes_fetched = 0
+        for _, run in itertools.groupby(
+            enumerate(missing), lambda pair: pair[1] - pair[0]
+        ):
+            run_indices = [index for _, index in run]
+            data = staged_file.fetch(
+                run_indices[0] * self.block_size,
+                len(run_indices) * self.block_size,
+            )
+            bytes_fetched += len(data)
+            for i, index in enumerate(run_indices):
+                block_start = i * self.block_size
+                block_end = block_start + self.block_size
+                contents = data[block_start:block_end]
+                self.cache.set(staged_file.block_key(index), contents)
+                blocks[index] = contents
+        with self._lock:
+            self.stats.hits += len(indices) - len(missing)
+            self.stats.misses += len(missing)
+            self.stats.bytes_fetched += bytes_fetched
+        return blocks
+
+
+class StagedFile(io.RawIOBase):
+    """Read-only binary file whose reads are served from the blocks of a
+    stager. Its file is only opened if a block is missing from the cache."""
+
+    def __init__(self, stager: _Stager, path: Union[Path, str]):
+        """
+        Class constructor for StagedFile.
+        Parameters
+        ----------
+        stager : _Stager
+        path : Union[Path, str]
+        """
+        super().__init__()
+        self.name = str(path)
+        self._stager = stager
+        stat_result = os.stat(path)
+        self._size = stat_result.st_size
+        self._version = (
+            str(Path(path).absolute()),
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+            stager.block_size,
+        )
+        self._position = 0
+        self._source: Optional[BinaryIO] = None
+        # Kept in least recently used first order
+        self._blocks: Dict[int, bytes] = OrderedDict()
+
+    def block_key(self, index: int) -> str:
+        """Cache key of a block of this version of the file."""
+        return make_cache_key("staged_block", *self._version, index)
+
+    def fetch(self, offset: int, size: int) -> bytes:
+        """
+        Read bytes from the file itself.
+        Parameters
+        ----------
+        offset : int
+        size : int
+
+        Returns
+        -------
+        bytes
+          Shorter than size at the end of the file.
+
+        """
+        if self._source is None:
+            self._source = open(self.name, "rb")
+        self._source.seek(offset)
+        return self._source.read(size)
+
+    def readable(self) -> bool:
+        """Staged files can be read."""
+        return True
+
+    def seekable(self) -> bool:
+        """Staged files can be seeked."""
+        return True
+
+    def tell(self) -> int:
+        """Current position in the file."""
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """
+        Change the position in the file.
+        Parameters
+        ----------
+        offset : int
+        whence : int
+          io.SEEK_SET, io.SEEK_CUR or io.SEEK_END. Default is io.SEEK_SET.
+
+        Returns
+        -------
+        int
+          The new position.
+
+        """
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def _read(self, start: int, end: int) -> bytes:
+        """Read the bytes from start to end, which is at most the size of
+        the file, through the blocks."""
+        block_size = self._stager.block_size
+        first, last = start // block_size, (end - 1) // block_size
+        indices = range(first, last + 1)
+        missing = [index for index in indices if index not in self._blocks]
+        if missing:
+            self._blocks.update(self._stager.read_blocks(self, missing))
+        for index in indices:
+            self._blocks.move_to_end(index)
+        data_start = start - first * block_size
+        data_end = end - first * block_size
+        if first == last:
+            data = self._blocks[first][data_start:data_end]
+        else:
+            data = b"".join(self._blocks[index] for index in indices)
+            data = data[data_start:data_end]
+        while len(self._blocks) > max(_OPEN_BLOCKS, len(indices)):
+            self._blocks.popitem(last=False)
+        return data
+
+    def readinto(self, buffer) -> int:
+        """
+        Read into a writable buffer from the current position.
+        Parameters
+        ----------
+        buffer
+          Writable bytes-like object.
+
+        Returns
+        -------
+        int
+          Number of bytes read. 0 at the end of the file.
+
+        """
+        view = memoryview(buffer).cast("B")
+        end = min(self._position + len(view), self._size)
+        if end <= self._position:
+            return 0
+        data = self._read(self._position, end)
+        view[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def readall(self) -> bytes:
+        """Read from the current position to the end of the file."""
+        if self._position >= self._size:
+            return b""
+        data = self._read(self._position, self._size)
+        self._position = self._size
+        return data
+
+    def close(self) -> None:
+        """Close the file, and its source file if it was opened."""
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+        self._blocks.clear()
+        super().close()
+
+
+# Stager of the job running in the current thread or asyncio task. Threads
+# and tasks each see their own, so concurrent jobs do not share a cache.
+_stager: ContextVar[Optional[_Stager]] = ContextVar("_stager", default=None)
+
+
+@contextmanager
+def stage_inputs(
+    cache: Optional[BaseCache],
+    block_size: int = _BLOCK_SIZE,
+    stats: Optional[StagingStats] = None,
+) -> Iterator[Optional[StagingStats]]:
+    """
+    Stage the files opened with open_input or read with read_input in the
+    body of the with statement through cache. Staging is on for the current
+    thread or asyncio task, and for the tasks and threads started from it
+    with a copy of its context, such as with asyncio.to_thread. Does nothing
+    if cache is None. If staging is already on, such as for an enclosing
+    job, its cache keeps serving the reads.
+    Parameters
+    ----------
+    cache : Optional[BaseCache]
+      Where the blocks are kept, such as a DiskCache on a local ssd.
+    block_size : int
+      Size of the blocks in bytes. Default is 1 MiB.
+    stats : Optional[StagingStats]
+      Stats to add the hits and misses to, such as those of an earlier
+      stage of the same job. Defaults to new stats.
+
+    Returns
+    -------
+    Iterator[Optional[StagingStats]]
+      The hits and misses of the reads in the body, which are updated as it
+      runs. None if staging was already on or cache is None.
+
+    """
+    if cache is None or _stager.get() is not None:
+        yield None
+        return
+    stager = _Stager(cache, block_size, stats)
+    token = _stager.set(stager)
+    try:
+        yield stager.stats
+    finally:
+        _stager.reset(token)
+
+
+def open_input(path: Union[Path, str]) -> BinaryIO:
+    """
+    Open an input file for binary reading, through the staging cache if
+    staging is on.
+    Parameters
+    ----------
+    path : Union[Path, str]
+
+    Returns
+    -------
+    BinaryIO
+
+    """
+    stager = _stager.get()
+    if stager is None:
+        return open(path, "rb")
+    return StagedFile(stager, path)
+
+
+@contextmanager
+def input_file(path: Union[Path, str]) -> Iterator[Union[Path, str, BinaryIO]]:
+    """
+    Prepare an input for a file reader that takes either a path or a binary
+    file, such as PIL.Image.open. For example:
+      with input_file(tif_path) as tif, Image.open(tif) as img:
+    Parameters
+    ----------
+    path : Union[Path, str]
+
+    Returns
+    -------
+    Iterator[Union[Path, str, BinaryIO]]
+      The path itself while staging is off, so the reader opens the file as
+      usual. Otherwise a staged file, which is closed at the end of the with
+      statement.
+
+    """
+    stager = _stager.get()
+    if stager is None:
+        yield path
+        return
+    with StagedFile(stager, path) as staged_file:
+        yield staged_file
+
+
+def read_input(path: Union[Path, str]) -> bytes:
+    """
+    Read the contents of an input file, through the staging cache if
+    staging is on.
+    Parameters
+    ----------
+    path : Union[Path, str]
+
+    Returns
+    -------
+    bytes
+
+    """
+    with open_input(path) as f:
+        return f.read()
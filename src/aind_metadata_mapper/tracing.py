@@ -0,0 +1,119 @@
+"""Low-overhead tracing of the stages and notable steps of etl jobs. While
+tracing is off, a span costs a global lookup. While it is on, spans are
+recorded as complete events of the Chrome trace event format, so the trace
+file can be opened in chrome://tracing or https://ui.perfetto.dev."""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Union
+
+# Returned by span while tracing is off. nullcontext holds no state, so one
+# instance can be shared by all threads.
+_NO_SPAN = nullcontext()
+
+
+class Tracer:
+    """Collects the spans of every thread of the process."""
+
+    def __init__(self):
+        """Class constructor"""
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._start = time.perf_counter_ns()
+
+    @contextmanager
+    def span(self, name: str, attributes: Dict[str, Any]) -> Iterator[None]:
+        """
+        Record the body of the with statement as a span.
+        Parameters
+        ----------
+        name : str
+        attributes : Dict[str, Any]
+          Shown as the args of the span. Values that are not json are
+          converted with str when the trace is written.
+
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._start) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+            if attributes:
+                event["args"] = attributes
+            with self._lock:
+                self.events.append(event)
+
+    def write(self, trace_path: Union[Path, str]) -> None:
+        """
+        Write the spans to a trace file as json.
+        Parameters
+        ----------
+        trace_path : Union[Path, str]
+
+        """
+        with self._lock:
+            trace = {"traceEvents": list(self.events)}
+        Path(trace_path).write_text(json.dumps(trace, default=str))
+
+
+_tracer: Optional[Tracer] = None
+
+
+def span(name: str, **attributes: Any) -> ContextManager[None]:
+    """
+    Trace the body of a with statement as a span. Does nothing unless
+    trace_to is running. For example:
+      with span("xml_parse", path=xml_path):
+    Parameters
+    ----------
+    name : str
+    **attributes : Any
+      Shown as the args of the span. They are only converted to strings if
+      the trace is written, so they are cheap to pass.
+
+    Returns
+    -------
+    ContextManager[None]
+
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.span(name, attributes)
+
+
+@contextmanager
+def trace_to(trace_path: Optional[Union[Path, str]]) -> Iterator[None]:
+    """
+    Trace the spans of all threads in the body of the with statement and
+    write them to trace_path. Does nothing if trace_path is None. If tracing
+    is already on, such as for an enclosing job, its tracer keeps recording
+    the spans and trace_path is not written.
+    Parameters
+    ----------
+    trace_path : Optional[Union[Path, str]]
+
+    """
+    global _tracer
+    if trace_path is None or _tracer is not None:
+        yield
+        return
+    tracer = Tracer()
+    _tracer = tracer
+    try:
+        yield
+    finally:
+        _tracer = None
+        tracer.write(trace_path)
@@ -0,0 +1,152 @@
+"""Helpers to write models to their standard files."""
+
+import hashlib
+import os
+import uuid
+from enum import Enum
+from pathlib import Path
+from typing import Optional, Union
+
+from aind_data_schema.base import AindCoreModel
+
+
+class WriteMode(str, Enum):
+    """How a model is written to its standard file.
+
+    OVERWRITE always rewrites the file through write_standard_file (default).
+    SKIP_UNCHANGED compares a hash of the new contents with the file on disk
+    and skips the write if they match. Otherwise, the file is replaced
+    atomically through a temporary file and a rename.
+    """
+
+    OVERWRITE = "overwrite"
+    SKIP_UNCHANGED = "skip_unchanged"
+
+
+def _hash_file(path: Path, chunk_size: int = 1024 * 1024) -> bytes:
+    """
+    Compute the sha256 digest of a file without reading it all at once.
+    Parameters
+    ----------
+    path : Path
+    chunk_size : int
+      Number of bytes read at a time. Default is 1 MiB.
+
+    Returns
+    -------
+    bytes
+
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def file_matches(path: Path, contents: bytes) -> bool:
+    """
+    Check whether the file at path already holds exactly contents. The file
+    sizes are compared first so that changed files are rarely hashed.
+    Parameters
+    ----------
+    path : Path
+    contents : bytes
+
+    Returns
+    -------
+    bool
+      True if the file exists and its contents match.
+
+    """
+    try:
+        if path.stat().st_size != len(contents):
+            return False
+    except FileNotFoundError:
+        return False
+    return _hash_file(path) == hashlib.sha256(contents).digest()
+
+
+def atomic_write(path: Path, contents: bytes) -> None:
+    """
+    Write contents to a temporary file next to path and rename it over path,
+    so readers never see a partially written file.
+    Parameters
+    ----------
+    path : Path
+    contents : bytes
+
+    """
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temp_path, "xb") as f:
+            f.write(contents)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_file(
+    path: Path,
+    contents: bytes,
+    write_mode: WriteMode = WriteMode.OVERWRITE,
+) -> bool:
+    """
+    Write contents to path according to write_mode.
+    Parameters
+    ----------
+    path : Path
+    contents : bytes
+    write_mode : WriteMode
+      Default is OVERWRITE.
+
+    Returns
+    -------
+    bool
+      True if the file was written. False if the write was skipped because
+      the file was unchanged.
+
+    """
+    if write_mode == WriteMode.SKIP_UNCHANGED:
+        if file_matches(path, contents):
+            return False
+        atomic_write(path, contents)
+    else:
+        with open(path, "wb") as f:
+            f.write(contents)
+    return True
+
+
+def write_model(
+    model: AindCoreModel,
+    output_directory: Optional[Union[Path, str]],
+    write_mode: WriteMode = WriteMode.OVERWRITE,
+) -> bool:
+    """
+    Write model to its standard file in output_directory.
+    Parameters
+    ----------
+    model : AindCoreModel
+    output_directory : Optional[Union[Path, str]]
+      Directory to write the file to. The current working directory is used
+      if None.
+    write_mode : WriteMode
+      Default is OVERWRITE, which writes through write_standard_file.
+
+    Returns
+    -------
+    bool
+      True if the file was written. False if the write was skipped because
+      the file was unchanged.
+
+    """
+    if write_mode == WriteMode.OVERWRITE:
+        model.write_standard_file(output_directory=output_directory)
+        return True
+    # Same contents as write_standard_file writes
+    contents = model.model_dump_json(indent=3).encode("utf-8")
+    path = Path(output_directory or ".") / model.default_filename()
+    return write_file(path, contents, write_mode)
@@ -0,0 +1,174 @@
+"""Smoke tests of the benchmark suite at tiny sizes."""
+
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from benchmarks.run import (
+    BenchmarkReport,
+    BenchmarkResult,
+    find_regressions,
+    main,
+)
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Tests the benchmark runner"""
+
+    @patch("logging.error")
+    def test_main(self, mock_log_error):
+        """Tests every case runs without errors and a rerun compares with
+        the baseline."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            baseline_path = Path(temp_dir) / "baseline.json"
+            with patch("sys.stdout", new_callable=io.StringIO) as mock_stdout:
+                exit_code = main(
+                    [
+                        "--scale",
+                        "0.001",
+                        "--repeats",
+                        "1",
+                        "--save-baseline",
+                        str(baseline_path),
+                    ]
+                )
+            report = BenchmarkReport.model_validate_json(
+                mock_stdout.getvalue()
+            )
+            self.assertEqual(0, exit_code)
+            mock_log_error.assert_not_called()
+            self.assertEqual(
+                [
+                    "bergamo",
+                    "ephys",
+                    "fib",
+                    "gather-metadata",
+                    "mesoscope",
+                    "mvr-rig",
+                    "open-ephys-rig",
+                    "sync-rig",
+                ],
+                [result.name for result in report.results],
+            )
+            self.assertTrue(all(r.peak_memory > 0 for r in report.results))
+            self.assertEqual(
+                report,
+                BenchmarkReport.model_validate_json(baseline_path.read_text()),
+            )
+            with patch("sys.stdout", new_callable=io.StringIO):
+                exit_code = main(
+                    [
+                        "--cases",
+                        "fib",
+                        "--scale",
+                        "0.001",
+                        "--repeats",
+                        "1",
+                        "--baseline",
+                        str(baseline_path),
+                        "--tolerance",
+                        "1000",
+                    ]
+                )
+            self.assertEqual(0, exit_code)
+
+    @patch("logging.warning")
+    @patch("benchmarks.run.run_case")
+    def test_main_first_baseline(self, mock_run_case, mock_log_warning):
+        """Tests the first run against a missing baseline saves it."""
+        mock_run_case.return_value = BenchmarkResult(
+            name="fib",
+            size=10,
+            repeats=1,
+            best_time=1.0,
+            mean_time=1.0,
+            peak_memory=100,
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            baseline_path = Path(temp_dir) / "baseline.json"
+            with patch("sys.stdout", new_callable=io.StringIO):
+                exit_codes = [
+                    main(["--cases", "fib", "--baseline", str(baseline_path)])
+                    for _ in range(2)
+                ]
+            baseline = BenchmarkReport.model_validate_json(
+                baseline_path.read_text()
+            )
+        self.assertEqual([0, 0], exit_codes)
+        self.assertEqual([mock_run_case.return_value], baseline.results)
+        mock_log_warning.assert_called_once()
+
+    @patch("logging.warning")
+    @patch("benchmarks.run.run_case")
+    def test_main_regression(self, mock_run_case, mock_log_warning):
+        """Tests main exits with 1 when a case regressed."""
+        mock_run_case.return_value = BenchmarkResult(
+            name="fib",
+            size=10,
+            repeats=1,
+            best_time=2.0,
+            mean_time=2.0,
+            peak_memory=100,
+        )
+        baseline = BenchmarkReport(
+            results=[
+                mock_run_case.return_value.model_copy(
+                    update={"best_time": 1.0}
+                )
+            ]
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            baseline_path = Path(temp_dir) / "baseline.json"
+            baseline_path.write_text(baseline.model_dump_json())
+            with patch("sys.stdout", new_callable=io.StringIO):
+                exit_code = main(
+                    [
+                        "--cases",
+                        "fib",
+                        "--scale",
+                        "0.001",
+                        "--baseline",
+                        str(baseline_path),
+                    ]
+                )
+        self.assertEqual(1, exit_code)
+        mock_log_warning.assert_called_once()
+
+    def test_find_regressions(self):
+        """Tests time and memory regressions beyond the tolerance are found
+        and cases missing from the baseline are skipped."""
+        baseline = BenchmarkReport(
+            results=[
+                BenchmarkResult(
+                    name="fib",
+                    size=10,
+                    repeats=1,
+                    best_time=1.0,
+                    mean_time=1.0,
+                    peak_memory=100,
+                )
+            ]
+        )
+        report = BenchmarkReport(
+            results=[
+                baseline.results[0].model_copy(
+                    update={"best_time": 1.2, "peak_memory": 200}
+                ),
+                baseline.results[0].model_copy(update={"size": 20}),
+            ]
+        )
+        regressions = find_regressions(report, baseline, tolerance=0.25)
+        self.assertEqual(
+            [
+                "fib (size 10): peak_memory 200 is more than 25% over the "
+                "baseline 100"
+            ],
+            regressions,
+        )
+        self.assertEqual([], find_regressions(baseline, baseline, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
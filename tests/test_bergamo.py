@@ -2,6 +2,7 @@
 import gzip
 import json
 import os
+import tempfile
 import unittest
 from datetime import datetime, timezone
 from pathlib import Path
@@ -75,7 +76,7 @@ class TestBergamoEtl(unittest.TestCase):
         )
         self.assertEqual(settings1, etl_job1.job_settings)
 
-    @patch("aind_metadata_mapper.bergamo.session.ScanImageTiffReader")
+    @patch("ScanImageTiffReader.ScanImageTiffReader")
     def test_extract(self, mock_reader: MagicMock):
         """Tests that the raw image info is extracted correcetly."""
         mock_context = mock_reader.return_value.__enter__.return_value
@@ -126,6 +127,24 @@ class TestBergamoEtl(unittest.TestCase):
             "Directory must contain tif or tiff file!", str(e.exception)
         )
 
+    def test_input_files(self):
+        """Tests only the ScanImage file the metadata is read from is
+        fingerprinted for the caches, rather than every tiff"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for name in ["neuron_00002.tif", "neuron_00001.tif", "notes.txt"]:
+                (Path(temp_dir) / name).touch()
+            settings = self.example_job_settings.model_copy(deep=True)
+            settings.input_source = Path(temp_dir)
+            self.assertEqual(
+                [Path(temp_dir) / "neuron_00001.tif"],
+                BergamoEtl(job_settings=settings)._input_files(),
+            )
+        settings.input_source = EXAMPLE_IMG_PATH
+        self.assertEqual(
+            [EXAMPLE_IMG_PATH],
+            BergamoEtl(job_settings=settings)._input_files(),
+        )
+
     def test_flat_dict_to_nested(self):
         """Test util method to convert dictionaries from flat to nested."""
         original_input = {
@@ -227,7 +246,7 @@ class TestBergamoEtl(unittest.TestCase):
         )
 
     @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
-    @patch("aind_metadata_mapper.bergamo.session.ScanImageTiffReader")
+    @patch("ScanImageTiffReader.ScanImageTiffReader")
     @patch("logging.error")
     @patch("logging.debug")
     def test_run_job(
@@ -259,7 +278,7 @@ class TestBergamoEtl(unittest.TestCase):
         self.assertEqual(200, response.status_code)
 
     @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
-    @patch("aind_metadata_mapper.bergamo.session.ScanImageTiffReader")
+    @patch("ScanImageTiffReader.ScanImageTiffReader")
     @patch("logging.error")
     @patch("logging.debug")
     def test_run_job_write_error(
@@ -296,7 +315,7 @@ class TestBergamoEtl(unittest.TestCase):
         self.assertEqual(500, response.status_code)
 
     @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
-    @patch("aind_metadata_mapper.bergamo.session.ScanImageTiffReader")
+    @patch("ScanImageTiffReader.ScanImageTiffReader")
     @patch("logging.error")
     @patch("logging.debug")
     def test_run_job_no_output_directory(
@@ -0,0 +1,198 @@
+"""Tests cache module"""
+
+import os
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from aind_metadata_mapper.cache import (
+    DiskCache,
+    MemoryCache,
+    fingerprint_files,
+    make_cache_key,
+)
+
+
+class TestFingerprints(unittest.TestCase):
+    """Tests fingerprint_files and make_cache_key"""
+
+    def test_fingerprint_files(self):
+        """Tests files, directories and missing paths are fingerprinted"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory = Path(temp_dir)
+            (directory / "b.json").write_bytes(b"{}")
+            (directory / "a.json").write_bytes(b"[1]")
+            (directory / "sub").mkdir()
+            os.utime(directory / "a.json", ns=(0, 1000))
+            fingerprints = fingerprint_files(
+                [directory, directory / "missing.json"]
+            )
+            hashed_fingerprints = fingerprint_files(
+                [directory / "b.json"], content_hash=True
+            )
+        self.assertEqual(
+            [
+                (str(directory / "a.json"), 3, 1000),
+                (str(directory / "b.json"), 2, fingerprints[1][2]),
+                (str(directory / "missing.json"), None, None),
+            ],
+            fingerprints,
+        )
+        self.assertEqual(
+            [
+                (
+                    str(directory / "b.json"),
+                    2,
+                    "44136fa355b3678a1146ad16f7e8649e"
+                    "94fb4fc21fe77e8310c060f61caaff8a",
+                )
+            ],
+            hashed_fingerprints,
+        )
+
+    def test_make_cache_key(self):
+        """Tests keys do not depend on dict order and do depend on values"""
+        self.assertEqual(
+            make_cache_key({"a": 1, "b": Path("c")}),
+            make_cache_key({"b": Path("c"), "a": 1}),
+        )
+        self.assertNotEqual(make_cache_key({"a": 1}), make_cache_key({"a": 2}))
+
+
+class TestDiskCache(unittest.TestCase):
+    """Tests DiskCache class"""
+
+    def setUp(self):
+        """Create a cache in a temporary directory"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = DiskCache(Path(self.temp_dir.name) / "cache", max_size=8)
+
+    def tearDown(self):
+        """Remove the temporary directory"""
+        self.temp_dir.cleanup()
+
+    def test_get_and_set(self):
+        """Tests entries can be written, read and deleted"""
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", b"1234")
+        self.assertEqual(b"1234", self.cache.get("a"))
+        self.assertEqual(4, self.cache.size())
+        self.cache.delete("a")
+        self.cache.delete("a")
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_eviction(self):
+        """Tests least recently used entries are evicted first"""
+        self.cache.set("a", b"1234")
+        os.utime(self.cache._entry_path("a"), ns=(0, 0))
+        self.cache.set("b", b"1234")
+        os.utime(self.cache._entry_path("b"), ns=(0, 10**9))
+        # Reading a marks it as the most recently used entry
+        self.cache.get("a")
+        self.cache.set("c", b"12")
+        self.assertEqual(
+            {"a", "c"}, {entry.key for entry in self.cache.entries()}
+        )
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(6, self.cache.size())
+
+    def test_clear(self):
+        """Tests clear removes every entry"""
+        self.cache.set("a", b"12")
+        self.cache.set("b", b"34")
+        self.cache.clear()
+        self.assertEqual([], self.cache.entries())
+        self.assertEqual(0, self.cache.size())
+
+    def test_running_size(self):
+        """Tests set only scans the directory when the cache is too large"""
+        self.cache.set("a", b"12")
+        reopened = DiskCache(self.cache.directory, max_size=8)
+        self.assertEqual(2, reopened._size)
+        with patch.object(
+            DiskCache, "entries", wraps=reopened.entries
+        ) as mock_entries:
+            reopened.set("a", b"1234")
+            reopened.set("b", b"12")
+            mock_entries.assert_not_called()
+            self.assertEqual(6, reopened._size)
+            reopened.set("c", b"123")
+            mock_entries.assert_called_once()
+        self.assertEqual(5, reopened._size)
+        self.assertEqual(reopened.size(), reopened._size)
+        reopened.delete("c")
+        self.assertEqual(2, reopened._size)
+
+    def test_eviction_corrects_running_size(self):
+        """Tests eviction corrects the total for entries removed by another
+        process"""
+        self.cache.set("a", b"1234")
+        self.cache._entry_path("a").unlink()
+        self.cache.set("b", b"12345")
+        self.assertEqual(5, self.cache._size)
+        self.assertEqual({"b"}, {entry.key for entry in self.cache.entries()})
+
+    def test_pickle(self):
+        """Tests the cache can be sent to worker processes"""
+        self.cache.set("a", b"12")
+        cache = pickle.loads(pickle.dumps(self.cache))
+        self.assertEqual(b"12", cache.get("a"))
+        self.assertEqual(2, cache._size)
+        cache.set("b", b"34")
+        self.assertEqual(4, cache._size)
+
+    def test_entries_skips_evicted(self):
+        """Tests entries removed while listing are skipped"""
+        with patch(
+            "pathlib.Path.glob",
+            return_value=[self.cache._entry_path("removed")],
+        ):
+            self.assertEqual([], self.cache.entries())
+
+
+class TestMemoryCache(unittest.TestCase):
+    """Tests MemoryCache class"""
+
+    def test_get_set_and_evict(self):
+        """Tests entries can be written and read, and that the least
+        recently used entries are evicted first"""
+        cache = MemoryCache(max_size=8)
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", b"1234")
+        cache.set("b", b"1234")
+        # Reading a marks it as the most recently used entry
+        self.assertEqual(b"1234", cache.get("a"))
+        cache.set("c", b"12")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(["a", "c"], [entry.key for entry in cache.entries()])
+        self.assertEqual(6, cache.size())
+        cache.clear()
+        self.assertEqual([], cache.entries())
+        self.assertEqual(0, cache.size())
+
+    def test_set_does_not_list_entries(self):
+        """Tests set keeps a running size instead of listing the entries"""
+        cache = MemoryCache(max_size=8)
+        with patch.object(MemoryCache, "entries") as mock_entries:
+            cache.set("a", b"1234")
+            cache.set("a", b"123456")
+            self.assertEqual(6, cache.size())
+            cache.set("b", b"123")
+            mock_entries.assert_not_called()
+        self.assertEqual(["b"], [entry.key for entry in cache.entries()])
+        self.assertEqual(3, cache.size())
+        cache.set("d", b"12")
+        cache.max_size = 2
+        cache.evict()
+        self.assertEqual(["d"], [entry.key for entry in cache.entries()])
+        self.assertEqual(2, cache.size())
+        # An entry larger than the cache is not kept
+        cache.set("c", b"123456789")
+        self.assertEqual([], cache.entries())
+        self.assertEqual(0, cache.size())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+"""Tests the command line entry point."""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from aind_metadata_mapper.arguments import PARSERS
+from aind_metadata_mapper.cli import (
+    ETL_REGISTRY,
+    load_etl_class,
+    main,
+    run_registered_job,
+)
+from aind_metadata_mapper.core import JobResponse
+
+RESOURCES_DIR = (
+    Path(os.path.dirname(os.path.realpath(__file__))) / "resources" / "fib"
+)
+
+# Modules that take long to import and are only needed once an etl reads
+# its input files.
+HEAVY_MODULES = ["numpy", "tifffile", "PIL", "ScanImageTiffReader"]
+
+
+def fib_job_settings() -> dict:
+    """Job settings of a FIBEtl job that returns a valid session."""
+    with open(RESOURCES_DIR / "example_from_teensy.txt", "r") as f:
+        raw_md_contents = f.read()
+    return {
+        "string_to_parse": raw_md_contents,
+        "experimenter_full_name": ["Don Key"],
+        "session_start_time": "1999-10-04T00:00:00Z",
+        "notes": "brabrabrabra....",
+        "labtracks_id": "000000",
+        "iacuc_protocol": "2115",
+        "light_source_list": [
+            {
+                "name": "470nm LED",
+                "excitation_power": 0.020,
+                "excitation_power_unit": "milliwatt",
+            }
+        ],
+        "detector_list": [
+            {
+                "name": "Hamamatsu Camera",
+                "exposure_time": 10,
+                "trigger_type": "Internal",
+            }
+        ],
+        "fiber_connections_list": [
+            {
+                "patch_cord_name": "Patch Cord A",
+                "patch_cord_output_power": 40,
+                "output_power_unit": "microwatt",
+                "fiber_name": "Fiber A",
+            }
+        ],
+    }
+
+
+class TestCli(unittest.TestCase):
+    """Tests methods in the cli module."""
+
+    def test_load_etl_class(self):
+        """Tests every registered etl can be loaded and parse arguments."""
+        for etl_name in ETL_REGISTRY:
+            with self.subTest(etl_name=etl_name):
+                self.assertTrue(hasattr(load_etl_class(etl_name), "from_args"))
+
+    def test_main(self):
+        """Tests main runs the chosen etl and prints its response."""
+        with patch("sys.stdout", new_callable=io.StringIO) as mock_stdout:
+            exit_code = main(["fib", "-j", json.dumps(fib_job_settings())])
+        job_response = JobResponse.model_validate_json(mock_stdout.getvalue())
+        self.assertEqual(0, exit_code)
+        self.assertEqual("000000", json.loads(job_response.data)["subject_id"])
+
+    def test_main_profile(self):
+        """Tests the --profile option of an etl writes its cpu profile."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profile_path = Path(temp_dir) / "fib.prof"
+            with patch("sys.stdout", new_callable=io.StringIO):
+                exit_code = main(
+                    [
+                        "fib",
+                        "-j",
+                        json.dumps(fib_job_settings()),
+                        "--profile",
+                        str(profile_path),
+                    ]
+                )
+            summary = Path(temp_dir, "fib.prof.txt").read_text()
+            self.assertTrue(profile_path.exists())
+        self.assertEqual(0, exit_code)
+        self.assertIn("Stage transform\n", summary)
+
+    @patch("aind_metadata_mapper.cli.load_etl_class")
+    def test_main_exit_codes(self, mock_load_etl_class: MagicMock):
+        """Tests main exits with 1 only when the job errors."""
+        mock_run_job = mock_load_etl_class.return_value.from_args.return_value
+        mock_run_job.run_job.side_effect = [
+            None,
+            JobResponse(status_code=406),
+            JobResponse(status_code=500),
+        ]
+        with patch("sys.stdout", new_callable=io.StringIO):
+            exit_codes = [
+                main(["gather-metadata", "-j", "{}"]) for _ in range(3)
+            ]
+        self.assertEqual([0, 0, 1], exit_codes)
+        mock_load_etl_class.return_value.from_args.assert_called_with(
+            ["-j", "{}"]
+        )
+
+    def test_run_registered_job(self):
+        """Tests jobs return their response, jobs without a response get
+        one, and errors become 500s"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            finished_response = run_registered_job(
+                "gather-metadata",
+                json.dumps({"directory_to_write_to": temp_dir}),
+            )
+        error_response = run_registered_job("gather-metadata", "{}")
+        fib_response = run_registered_job(
+            "fib", json.dumps(fib_job_settings())
+        )
+        self.assertEqual(
+            JobResponse(status_code=200, message="Job finished."),
+            finished_response,
+        )
+        self.assertEqual(500, error_response.status_code)
+        self.assertEqual(200, fib_response.status_code)
+
+    @patch("aind_metadata_mapper.server.main")
+    def test_main_serve(self, mock_serve: MagicMock):
+        """Tests the serve command starts the server."""
+        mock_serve.return_value = 0
+        self.assertEqual(0, main(["serve", "--port", "8001"]))
+        mock_serve.assert_called_once_with(["--port", "8001"])
+
+    def test_lazy_imports(self):
+        """Tests importing the cli and the etl modules does not import heavy
+        dependencies."""
+        script = (
+            "import sys\n"
+            "from aind_metadata_mapper import cli\n"
+            "print(int('aind_data_schema' in sys.modules))\n"
+            "for etl_name in cli.ETL_REGISTRY:\n"
+            "    cli.load_etl_class(etl_name)\n"
+            f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        schema_imported, heavy_modules = result.stdout.splitlines()
+        self.assertEqual("0", schema_imported)
+        self.assertEqual("[]", heavy_modules)
+
+    def test_help_without_etl_module(self):
+        """Tests <etl> --help lists the arguments of the etl without
+        importing its module or aind_data_schema."""
+        self.assertEqual(set(ETL_REGISTRY), set(PARSERS))
+        script = (
+            "import sys\n"
+            "from aind_metadata_mapper import cli\n"
+            "try:\n"
+            "    cli.main([sys.argv[1], '--help'])\n"
+            "except SystemExit as e:\n"
+            "    print(e.code)\n"
+            "print(int('aind_data_schema' in sys.modules))\n"
+        )
+        for etl_name in ETL_REGISTRY:
+            with self.subTest(etl_name=etl_name):
+                result = subprocess.run(
+                    [sys.executable, "-c", script, etl_name],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                *help_lines, exit_code, schema_imported = (
+                    result.stdout.splitlines()
+                )
+                self.assertIn(
+                    f"usage: aind-metadata-mapper {etl_name}", help_lines[0]
+                )
+                self.assertIn("--profile", "\n".join(help_lines))
+                self.assertEqual("0", exit_code)
+                self.assertEqual("0", schema_imported)
+
+    def test_parsers(self):
+        """Tests the parser of each etl names it and takes its options"""
+        for etl_name, etl_parser in PARSERS.items():
+            with self.subTest(etl_name=etl_name):
+                parser = etl_parser(f"aind-metadata-mapper {etl_name}")
+                job_settings_flag = parser._actions[1].option_strings[0]
+                job_args = parser.parse_args(
+                    [job_settings_flag, "{}", "--profile", "job.prof"]
+                )
+                self.assertEqual(
+                    f"aind-metadata-mapper {etl_name}", parser.prog
+                )
+                self.assertEqual("job.prof", job_args.profile)
+                self.assertIsNone(job_args.trace)
+
+    def test_main_usage_error(self):
+        """Tests main exits on bad etl arguments before loading the etl"""
+        with (
+            patch(
+                "aind_metadata_mapper.cli.load_etl_class"
+            ) as mock_load_etl_class,
+            patch("sys.stderr", new_callable=io.StringIO),
+        ):
+            with self.assertRaises(SystemExit):
+                main(["fib", "--unknown"])
+        mock_load_etl_class.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
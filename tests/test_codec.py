@@ -0,0 +1,69 @@
+"""Tests the codec module."""
+
+import json
+import math
+import tempfile
+import unittest
+from pathlib import Path
+
+from aind_metadata_mapper import codec
+
+DOCUMENT = {
+    "subject_id": "632269",
+    "notes": "café ☃",
+    "weights": [1.5, -2, 0.1, 1e-7],
+    "nested": {"a": None, "b": True, "c": {}},
+}
+
+
+class TestCodec(unittest.TestCase):
+    """Tests methods in the codec module."""
+
+    def tearDown(self):
+        """Restore the default backend"""
+        codec.set_backend(codec.available_backends()[0])
+
+    def test_backends(self):
+        """Tests the fastest available backend is used by default and that
+        unknown backends are rejected"""
+        self.assertEqual(["orjson", "json"], codec.available_backends())
+        self.assertEqual("orjson", codec.backend())
+        codec.set_backend("json")
+        self.assertEqual("json", codec.backend())
+        with self.assertRaises(ValueError) as e:
+            codec.set_backend("simdjson")
+        self.assertIn("Unknown json backend simdjson", str(e.exception))
+
+    def test_loads(self):
+        """Tests every backend parses bytes and strings the same way as the
+        json module"""
+        text = json.dumps(DOCUMENT)
+        for backend in codec.available_backends():
+            codec.set_backend(backend)
+            self.assertEqual(DOCUMENT, codec.loads(text))
+            self.assertEqual(DOCUMENT, codec.loads(text.encode("utf-8")))
+
+    def test_loads_fallback(self):
+        """Tests documents that only the json module accepts are parsed, and
+        invalid documents raise the error of the json module"""
+        self.assertEqual([2**70], codec.loads(b"[1180591620717411303424]"))
+        self.assertTrue(math.isnan(codec.loads("NaN")))
+        with self.assertRaises(json.JSONDecodeError) as e:
+            codec.loads("{")
+        self.assertIn("Expecting property name", str(e.exception))
+
+    def test_load_and_dumps(self):
+        """Tests files are parsed and documents are serialized exactly as
+        the json module does"""
+        for indent in [None, 3]:
+            expected = json.dumps(DOCUMENT, indent=indent).encode("utf-8")
+            self.assertEqual(expected, codec.dumps(DOCUMENT, indent=indent))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "subject.json"
+            path.write_bytes(codec.dumps(DOCUMENT, indent=3))
+            self.assertEqual(DOCUMENT, codec.load(path))
+            self.assertEqual(DOCUMENT, codec.load(str(path)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,827 @@
+"""Tests methods in the GenericEtl class."""
+
+import asyncio
+import io
+import json
+import os
+import pickle
+import pstats
+import sqlite3
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+from unittest import TestCase
+from unittest import main as unittest_main
+from unittest.mock import MagicMock, patch
+
+from aind_data_schema.core.subject import BreedingInfo, Housing, Sex, Subject
+from aind_data_schema.models.organizations import Organization
+from aind_data_schema.models.species import Species
+from pydantic_settings import BaseSettings
+
+from aind_metadata_mapper import __version__
+from aind_metadata_mapper.cache import DiskCache, MemoryCache
+from aind_metadata_mapper.core import (
+    GenericEtl,
+    JobResponse,
+    ValidationMode,
+    _etl_cache_key,
+    _resolve_validation_mode,
+    _run_etl_job,
+    _run_in_pool,
+)
+from aind_metadata_mapper.metrics import (
+    JobMetrics,
+    MemoryProfile,
+    profile_stage,
+    read_io_counters,
+)
+from aind_metadata_mapper.sinks import SqliteSink
+from aind_metadata_mapper.staging import StagingStats, read_input
+
+
+class ExampleJobSettings(BaseSettings):
+    """Job settings for the ExampleEtl class"""
+
+    valid: bool = True
+    input_source: Optional[Path] = None
+    output_directory: Optional[Path] = None
+
+
+class ExampleEtl(GenericEtl[ExampleJobSettings]):
+    """Mock a child class"""
+
+    def _extract(self) -> None:
+        """Mocked extract method"""
+        return None
+
+    def _transform(self, extracted_source: Any = None) -> Subject:
+        """Mocked transform method to return an invalid or valid subject
+        model"""
+        if not self.job_settings.valid:
+            return Subject.model_construct()
+        else:
+            t = datetime(2022, 11, 22, 8, 43, 00)
+            return Subject(
+                species=Species.MUS_MUSCULUS,
+                subject_id="12345",
+                sex=Sex.MALE,
+                date_of_birth=t.date(),
+                source=Organization.AI,
+                breeding_info=BreedingInfo(
+                    breeding_group="Emx1-IRES-Cre(ND)",
+                    maternal_id="546543",
+                    maternal_genotype=(
+                        "Emx1-IRES-Cre/wt; Camk2a-tTa/Camk2a-tTA"
+                    ),
+                    paternal_id="232323",
+                    paternal_genotype="Ai93(TITL-GCaMP6f)/wt",
+                ),
+                genotype=(
+                    "Emx1-IRES-Cre/wt;Camk2a-tTA/wt;Ai93(TITL-GCaMP6f)/wt"
+                ),
+                housing=Housing(
+                    home_cage_enrichment=["Running wheel"], cage_id="123"
+                ),
+                background_strain="C57BL/6J",
+            )
+
+
+class StagedInputEtl(ExampleEtl):
+    """Mock a child class that reads its input in extract and transform"""
+
+    def _extract(self) -> bytes:
+        """Mocked extract method that reads the input source"""
+        return read_input(self.job_settings.input_source)
+
+    def _transform(self, extracted_source: Any = None) -> Subject:
+        """Mocked transform method that reads the input source again"""
+        read_input(self.job_settings.input_source)
+        return super()._transform(extracted_source)
+
+
+def _job_that_kills_its_worker(job_index: int) -> JobResponse:
+    """Job function whose worker process dies on job 2, as if it was killed
+    for running out of memory"""
+    if job_index == 2:
+        os._exit(1)  # pragma: no cover
+    return JobResponse(status_code=200, message=str(job_index))
+
+
+class TestValidationModes(TestCase):
+    """Tests the validation modes of GenericEtl._load"""
+
+    def test_default_mode_is_strict(self):
+        """Tests that jobs re-validate the model by default"""
+        etl = ExampleEtl(ExampleJobSettings())
+        self.assertEqual(ValidationMode.STRICT, etl.validation_mode)
+
+    @patch("aind_metadata_mapper.core.GenericEtl._run_validation_check")
+    def test_once_mode(self, mock_validation_check: MagicMock):
+        """Tests that ONCE mode skips the full re-validation and still
+        returns a 406 if required fields are missing"""
+        valid_response = ExampleEtl(
+            ExampleJobSettings(), validation_mode="once"
+        ).run_job()
+        invalid_response = ExampleEtl(
+            ExampleJobSettings(valid=False), validation_mode="once"
+        ).run_job()
+        mock_validation_check.assert_not_called()
+        self.assertEqual(200, valid_response.status_code)
+        self.assertEqual(406, invalid_response.status_code)
+        self.assertIn("subject_id", invalid_response.message)
+        self.assertIn("Field required", invalid_response.message)
+
+    @patch("aind_metadata_mapper.core.GenericEtl._run_validation_check")
+    def test_off_mode(self, mock_validation_check: MagicMock):
+        """Tests that OFF mode never validates"""
+        response = ExampleEtl(
+            ExampleJobSettings(valid=False),
+            validation_mode=ValidationMode.OFF,
+        ).run_job()
+        mock_validation_check.assert_not_called()
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("Validation skipped.", response.message)
+
+    @patch("aind_metadata_mapper.core.random.random")
+    @patch("aind_metadata_mapper.core.GenericEtl._run_validation_check")
+    def test_sampled_mode(
+        self, mock_validation_check: MagicMock, mock_random: MagicMock
+    ):
+        """Tests that SAMPLED mode fully validates 1 in N jobs"""
+        mock_random.side_effect = [0.1, 0.5, 0.9, 0.3, 0.34, 0.99]
+        mock_validation_check.return_value = None
+        responses = [
+            ExampleEtl(
+                ExampleJobSettings(),
+                validation_mode=ValidationMode.SAMPLED,
+                validation_sample_rate=3,
+            ).run_job()
+            for _ in range(6)
+        ]
+        self.assertEqual(2, mock_validation_check.call_count)
+        self.assertEqual(
+            [200] * 6, [response.status_code for response in responses]
+        )
+
+    def test_sampled_rate(self):
+        """Tests that SAMPLED mode picks about 1 in N jobs without keeping
+        count, so the rate holds in every worker process"""
+        modes = [
+            _resolve_validation_mode(ValidationMode.SAMPLED, 10)
+            for _ in range(10000)
+        ]
+        self.assertLess(800, modes.count(ValidationMode.STRICT))
+        self.assertLess(modes.count(ValidationMode.STRICT), 1200)
+        self.assertEqual(
+            ValidationMode.OFF,
+            _resolve_validation_mode(ValidationMode.OFF, 10),
+        )
+
+    def test_invalid_sample_rate(self):
+        """Tests that sample rates below 1 are rejected"""
+        for validation_sample_rate in [0, -1]:
+            with self.assertRaises(ValueError) as e:
+                ExampleEtl(
+                    ExampleJobSettings(),
+                    validation_mode=ValidationMode.SAMPLED,
+                    validation_sample_rate=validation_sample_rate,
+                )
+            self.assertIn(
+                f"at least 1, got {validation_sample_rate}", str(e.exception)
+            )
+
+    def test_strict_mode_invalid_model(self):
+        """Tests that STRICT mode returns a 406 on an invalid model"""
+        response = ExampleEtl(ExampleJobSettings(valid=False)).run_job()
+        self.assertEqual(406, response.status_code)
+
+
+class TestRunMany(TestCase):
+    """Tests the process-pool batch runner"""
+
+    def test_run_many(self):
+        """Tests that every job is run and a response yielded for each"""
+        settings = (ExampleJobSettings(valid=i % 2 == 0) for i in range(5))
+        responses = list(
+            ExampleEtl.run_many(settings, workers=2, max_tasks_per_worker=1)
+        )
+        self.assertEqual(5, len(responses))
+        self.assertEqual(
+            [200, 200, 200, 406, 406],
+            sorted(response.status_code for response in responses),
+        )
+
+    def test_run_many_passes_kwargs(self):
+        """Tests that extra kwargs are passed to every job"""
+        settings = [ExampleJobSettings(valid=False)] * 2
+        responses = list(
+            ExampleEtl.run_many(settings, workers=1, validation_mode="off")
+        )
+        self.assertEqual(
+            [200, 200], [response.status_code for response in responses]
+        )
+
+    def test_run_many_job_error(self):
+        """Tests that a job that raises an error is reported as a 500"""
+        responses = list(ExampleEtl.run_many(["not json"], workers=1))
+        self.assertEqual(1, len(responses))
+        self.assertEqual(500, responses[0].status_code)
+
+    def test_run_many_unpicklable_job(self):
+        """Tests that a job that cannot be sent to a worker is reported as a
+        500"""
+        responses = list(
+            ExampleEtl.run_many(
+                [ExampleJobSettings()], workers=1, unpicklable=lambda: None
+            )
+        )
+        self.assertEqual(1, len(responses))
+        self.assertEqual(500, responses[0].status_code)
+
+    def test_run_in_pool_worker_dies(self):
+        """Tests that the jobs lost with a worker process that died are
+        reported as 500s and that the remaining jobs still run"""
+        self.assertEqual("0", _job_that_kills_its_worker(job_index=0).message)
+        for max_tasks_per_worker in [None, 2]:
+            responses = dict(
+                _run_in_pool(
+                    ((i, (i,)) for i in range(6)),
+                    workers=1,
+                    max_tasks_per_worker=max_tasks_per_worker,
+                    job_function=_job_that_kills_its_worker,
+                )
+            )
+            self.assertEqual(list(range(6)), sorted(responses))
+            self.assertEqual(500, responses[2].status_code)
+            self.assertIn("BrokenProcessPool", responses[2].message)
+            self.assertEqual(200, responses[5].status_code)
+
+    def test_run_in_pool_submit_to_broken_pool(self):
+        """Tests that jobs submitted to a pool that broke in the meantime
+        are run in a new pool"""
+        broken_pool = MagicMock()
+        broken_pool.submit.side_effect = BrokenProcessPool()
+        with patch(
+            "aind_metadata_mapper.core._process_pool",
+            side_effect=[broken_pool, ThreadPoolExecutor(max_workers=1)],
+        ):
+            responses = list(
+                _run_in_pool(
+                    [(0, (0,))], job_function=_job_that_kills_its_worker
+                )
+            )
+        broken_pool.shutdown.assert_called_once_with(wait=False)
+        self.assertEqual(200, responses[0][1].status_code)
+
+    def test_run_etl_job_error(self):
+        """Tests that _run_etl_job catches errors raised by the job"""
+        response = _run_etl_job(ExampleEtl, ExampleJobSettings(), {"a": 1})
+        self.assertEqual(500, response.status_code)
+        self.assertIn("unexpected keyword argument", response.message)
+
+
+class TestAsyncRunJob(TestCase):
+    """Tests the asyncio entry point"""
+
+    def test_arun_job(self):
+        """Tests that arun_job returns the same response as run_job"""
+        etl = ExampleEtl(ExampleJobSettings())
+        response = asyncio.run(etl.arun_job())
+        expected_response = etl.run_job()
+        self.assertEqual(expected_response.status_code, response.status_code)
+        self.assertEqual(expected_response.data, response.data)
+        self.assertIsNotNone(response.metrics)
+
+    def test_arun_job_many(self):
+        """Tests that many jobs can be run concurrently on one loop"""
+
+        async def run_all():
+            """Run several jobs concurrently"""
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                return await asyncio.gather(
+                    *[
+                        ExampleEtl(
+                            ExampleJobSettings(valid=i % 2 == 0)
+                        ).arun_job(executor=executor)
+                        for i in range(4)
+                    ]
+                )
+
+        responses = asyncio.run(run_all())
+        self.assertEqual(
+            [200, 406, 200, 406],
+            [response.status_code for response in responses],
+        )
+
+
+class TestJobMetrics(TestCase):
+    """Tests the metrics attached to the JobResponse"""
+
+    def test_run_job_metrics(self):
+        """Tests that run_job fills the metrics for every stage"""
+        response = ExampleEtl(ExampleJobSettings()).run_job()
+        metrics = response.metrics
+        self.assertIsInstance(metrics, JobMetrics)
+        for stage in [
+            metrics.extract,
+            metrics.transform,
+            metrics.validation,
+            metrics.load,
+        ]:
+            self.assertGreaterEqual(stage.wall_time, 0)
+            self.assertGreaterEqual(stage.cpu_time, 0)
+        self.assertGreater(metrics.transform.wall_time, 0)
+        self.assertGreater(metrics.validation.wall_time, 0)
+        self.assertGreaterEqual(metrics.bytes_read, 0)
+        self.assertGreaterEqual(metrics.bytes_written, 0)
+
+    def test_metrics_json_round_trip(self):
+        """Tests that the metrics are serialized with the response"""
+        response = ExampleEtl(ExampleJobSettings()).run_job()
+        response_json = json.loads(response.model_dump_json())
+        self.assertEqual(
+            response.metrics, JobMetrics(**response_json["metrics"])
+        )
+
+    def test_load_without_metrics(self):
+        """Tests that _load does not attach metrics unless asked to"""
+        etl = ExampleEtl(ExampleJobSettings())
+        response = etl._load(etl._transform(None), None)
+        self.assertIsNone(response.metrics)
+
+    def test_run_job_memory_profile(self):
+        """Tests that run_job profiles the memory of every stage only if
+        asked to, and writes the profile to a report file"""
+        self.assertIsNone(
+            ExampleEtl(ExampleJobSettings()).run_job().metrics.memory
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            report_path = Path(temp_dir) / "memory.json"
+            response = ExampleEtl(
+                ExampleJobSettings(), memory_report_path=report_path
+            ).run_job()
+            memory_profile = response.metrics.memory
+            self.assertEqual(
+                memory_profile,
+                MemoryProfile.model_validate_json(report_path.read_text()),
+            )
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(
+            ["extract", "transform", "validation", "load"],
+            list(memory_profile.stages),
+        )
+        transform_memory = memory_profile.stages["transform"]
+        self.assertGreater(transform_memory.peak_memory, 0)
+        self.assertGreaterEqual(
+            memory_profile.peak_memory, transform_memory.peak_memory
+        )
+        for allocation_site in transform_memory.top_allocations:
+            self.assertGreater(allocation_site.size, 0)
+            self.assertRegex(allocation_site.location, r".+:\d+$")
+
+    def test_run_job_cpu_profile(self):
+        """Tests that run_job writes the cpu profile of every stage and a
+        summary of it, and that the response can still be pickled"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profile_path = Path(temp_dir) / "job.prof"
+            response = ExampleEtl(
+                ExampleJobSettings(), profile_path=profile_path
+            ).run_job()
+            stats = pstats.Stats(str(profile_path))
+            summary = Path(temp_dir, "job.prof.txt").read_text()
+        profiled_functions = {function for _, _, function in stats.stats}
+        self.assertIn("_transform", profiled_functions)
+        self.assertIn("_run_validation_check", profiled_functions)
+        for stage_name in ["extract", "transform", "validation", "load"]:
+            self.assertIn(f"Stage {stage_name}\n", summary)
+        self.assertIsNone(response.metrics._cpu_profile)
+        self.assertEqual(response, pickle.loads(pickle.dumps(response)))
+
+    def test_run_job_trace(self):
+        """Tests that run_job writes the spans of its stages to a trace
+        file"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            trace_path = Path(temp_dir) / "trace.json"
+            ExampleEtl(ExampleJobSettings(), trace_path=trace_path).run_job()
+            trace = json.loads(trace_path.read_text())
+        self.assertEqual(
+            ["extract", "transform", "validation", "load", "run_job"],
+            [event["name"] for event in trace["traceEvents"]],
+        )
+        self.assertEqual(
+            {"etl": "ExampleEtl"}, trace["traceEvents"][-1]["args"]
+        )
+
+    def test_run_job_staging(self):
+        """Tests that run_job reads its inputs through the staging cache and
+        attaches the hits and misses to the metrics"""
+        self.assertIsNone(
+            ExampleEtl(ExampleJobSettings()).run_job().metrics.staging
+        )
+        staging_cache = MemoryCache()
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            patch.object(
+                ExampleEtl,
+                "_extract",
+                lambda self: read_input(self.job_settings.input_source),
+            ),
+        ):
+            input_source = Path(temp_dir) / "input.json"
+            input_source.write_text("{}")
+            settings = ExampleJobSettings(input_source=input_source)
+            responses = [
+                ExampleEtl(settings, staging_cache=staging_cache).run_job()
+                for _ in range(2)
+            ]
+        self.assertEqual(
+            [
+                StagingStats(hits=0, misses=1, bytes_fetched=2),
+                StagingStats(hits=1, misses=0, bytes_fetched=0),
+            ],
+            [response.metrics.staging for response in responses],
+        )
+
+    def test_arun_job_staging(self):
+        """Tests that arun_job reads its inputs through the staging cache in
+        both the extract and transform stages"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_source = Path(temp_dir) / "input.json"
+            input_source.write_text("{}")
+            etl = StagedInputEtl(
+                ExampleJobSettings(input_source=input_source),
+                staging_cache=MemoryCache(),
+            )
+            response = asyncio.run(etl.arun_job())
+        self.assertEqual(
+            StagingStats(hits=1, misses=1, bytes_fetched=2),
+            response.metrics.staging,
+        )
+
+    def test_memory_profile_while_tracing(self):
+        """Tests that tracing started by the caller is left running and that
+        stages are not profiled without tracing"""
+        memory_profile = MemoryProfile()
+        with profile_stage(memory_profile, "extract"):
+            pass
+        self.assertEqual({}, memory_profile.stages)
+        tracemalloc.start()
+        try:
+            response = ExampleEtl(
+                ExampleJobSettings(), profile_memory=True
+            ).run_job()
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(4, len(response.metrics.memory.stages))
+
+    @patch("os.open")
+    def test_io_counters_not_available(self, mock_open: MagicMock):
+        """Tests that the byte counters are None if /proc/self/io can not
+        be read"""
+        mock_open.side_effect = FileNotFoundError()
+        self.assertIsNone(read_io_counters())
+        response = ExampleEtl(ExampleJobSettings()).run_job()
+        self.assertIsNone(response.metrics.bytes_read)
+        self.assertIsNone(response.metrics.bytes_written)
+
+
+class TestOutputStream(TestCase):
+    """Tests serializing the model into an output stream"""
+
+    def test_stream_to_file(self):
+        """Tests that the model is written to the stream and only a reference
+        is returned"""
+        with tempfile.TemporaryFile() as f:
+            response = ExampleEtl(
+                ExampleJobSettings(), output_stream=f
+            ).run_job()
+            f.seek(0)
+            contents = f.read()
+        expected_json = ExampleEtl(ExampleJobSettings()).run_job().data
+        self.assertEqual(200, response.status_code)
+        self.assertIsNone(response.data)
+        self.assertEqual(str(f.name), response.data_reference)
+        self.assertEqual(len(contents), response.data_size)
+        self.assertEqual(expected_json.encode("utf-8"), contents)
+
+    def test_stream_takes_precedence(self):
+        """Tests that the stream is used even if an output_directory is set
+        and that validation errors are still reported"""
+        stream = io.BytesIO()
+        response = ExampleEtl(
+            ExampleJobSettings(valid=False, output_directory=Path("out")),
+            output_stream=stream,
+        ).run_job()
+        self.assertEqual(406, response.status_code)
+        self.assertEqual(len(stream.getvalue()), response.data_size)
+        self.assertIn("BytesIO", response.data_reference)
+
+    def test_stream_error(self):
+        """Tests that an error writing to the stream returns a 500"""
+        stream = io.BytesIO()
+        stream.close()
+        response = ExampleEtl(
+            ExampleJobSettings(), output_stream=stream
+        ).run_job()
+        self.assertEqual(500, response.status_code)
+        self.assertIn("Error writing to", response.message)
+        self.assertIsNone(response.data_reference)
+
+
+class TestReturnModel(TestCase):
+    """Tests returning the model itself from run_job"""
+
+    def test_return_model(self):
+        """Tests that the model is returned instead of its json, which is
+        only made when the response is serialized"""
+        expected_json = ExampleEtl(ExampleJobSettings()).run_job().data
+        with patch(
+            "aind_data_schema.base.AindCoreModel.model_dump_json"
+        ) as mock_dump:
+            response = ExampleEtl(
+                ExampleJobSettings(), return_model=True
+            ).run_job()
+        mock_dump.assert_not_called()
+        self.assertEqual(200, response.status_code)
+        self.assertIsNone(response.data)
+        self.assertEqual("12345", response.model.subject_id)
+        response_json = json.loads(response.model_dump_json())
+        self.assertEqual(expected_json, response_json["data"])
+        self.assertNotIn("model", response_json)
+
+    def test_return_model_with_output_directory(self):
+        """Tests that the model is returned alongside the written file and
+        is not serialized into data"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            response = ExampleEtl(
+                ExampleJobSettings(output_directory=Path(temp_dir)),
+                return_model=True,
+            ).run_job()
+        self.assertTrue(response.written)
+        self.assertEqual("12345", response.model.subject_id)
+        self.assertIsNone(response.model_dump()["data"])
+
+    def test_return_model_error(self):
+        """Tests that the model is still returned if it could not be
+        written, but is not serialized into data"""
+        stream = io.BytesIO()
+        stream.close()
+        response = ExampleEtl(
+            ExampleJobSettings(), output_stream=stream, return_model=True
+        ).run_job()
+        self.assertEqual(500, response.status_code)
+        self.assertEqual("12345", response.model.subject_id)
+        self.assertIsNone(response.model_dump()["data"])
+
+
+class TestSink(TestCase):
+    """Tests writing the model to a sink"""
+
+    def test_sink(self):
+        """Tests that the model is written to the sink under the name of its
+        file in the output directory"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "documents.db"
+            with SqliteSink(path) as sink:
+                responses = [
+                    ExampleEtl(
+                        ExampleJobSettings(output_directory=output_directory),
+                        sink=sink,
+                    ).run_job()
+                    for output_directory in [Path("/data/s1"), None]
+                ]
+            with sqlite3.connect(path) as connection:
+                rows = connection.execute(
+                    "SELECT name, contents FROM documents ORDER BY id"
+                ).fetchall()
+        expected_json = (
+            ExampleEtl(ExampleJobSettings())
+            ._transform(None)
+            .model_dump_json(indent=3)
+        )
+        self.assertEqual(
+            [
+                ("/data/s1/subject.json", expected_json.encode("utf-8")),
+                ("subject.json", expected_json.encode("utf-8")),
+            ],
+            rows,
+        )
+        for response in responses:
+            self.assertEqual(200, response.status_code)
+            self.assertTrue(response.written)
+            self.assertIsNone(response.data)
+            self.assertTrue(
+                response.message.startswith(f"Write model to {path}")
+            )
+
+    def test_sink_error(self):
+        """Tests that an error writing to the sink returns a 500"""
+        sink = MagicMock(location="broken")
+        sink.write.side_effect = OSError("Disk full")
+        response = ExampleEtl(ExampleJobSettings(), sink=sink).run_job()
+        self.assertEqual(500, response.status_code)
+        self.assertTrue(response.message.startswith("Error writing to broken"))
+
+
+class TestWriteMode(TestCase):
+    """Tests skipping unchanged writes in _load"""
+
+    def test_skip_unchanged(self):
+        """Tests that an unchanged file is not rewritten and the response
+        says so"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            settings = ExampleJobSettings(output_directory=Path(temp_dir))
+            first_response = ExampleEtl(
+                settings, write_mode="skip_unchanged"
+            ).run_job()
+            second_response = ExampleEtl(
+                settings, write_mode="skip_unchanged"
+            ).run_job()
+        self.assertTrue(first_response.written)
+        self.assertFalse(second_response.written)
+        self.assertEqual(200, second_response.status_code)
+        self.assertTrue(
+            second_response.message.startswith(
+                "Skip writing unchanged model to"
+            )
+        )
+
+    @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
+    def test_overwrite_by_default(self, mock_write: MagicMock):
+        """Tests that the default write mode writes through
+        write_standard_file"""
+        response = ExampleEtl(
+            ExampleJobSettings(output_directory=Path("out"))
+        ).run_job()
+        mock_write.assert_called_once_with(output_directory=Path("out"))
+        self.assertTrue(response.written)
+
+
+class TestResultCache(TestCase):
+    """Tests looking up models in the result cache"""
+
+    def setUp(self):
+        """Create a cache and an input file in a temporary directory"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.result_cache = DiskCache(Path(self.temp_dir.name) / "cache")
+        self.input_source = Path(self.temp_dir.name) / "input.json"
+        self.input_source.write_text("{}")
+
+    def tearDown(self):
+        """Remove the temporary directory"""
+        self.temp_dir.cleanup()
+
+    def test_no_result_cache(self):
+        """Tests that cache_hit is not set without a result cache"""
+        response = ExampleEtl(ExampleJobSettings()).run_job()
+        self.assertIsNone(response.cache_hit)
+
+    def test_cache_hit(self):
+        """Tests that a second run skips extract and transform"""
+        settings = ExampleJobSettings(input_source=self.input_source)
+        first_response = ExampleEtl(
+            settings, result_cache=self.result_cache
+        ).run_job()
+        with (
+            patch.object(ExampleEtl, "_extract") as mock_extract,
+            patch.object(ExampleEtl, "_transform") as mock_transform,
+        ):
+            second_response = ExampleEtl(
+                settings, result_cache=self.result_cache
+            ).run_job()
+        mock_extract.assert_not_called()
+        mock_transform.assert_not_called()
+        self.assertFalse(first_response.cache_hit)
+        self.assertTrue(second_response.cache_hit)
+        self.assertEqual(first_response.data, second_response.data)
+        self.assertEqual(1, len(self.result_cache.entries()))
+
+    def test_cache_miss_on_changed_input(self):
+        """Tests that a changed input file or job setting is a miss"""
+        settings = ExampleJobSettings(input_source=self.input_source)
+        ExampleEtl(settings, result_cache=self.result_cache).run_job()
+        self.input_source.write_text('{"a": 1}')
+        changed_input_response = ExampleEtl(
+            settings, result_cache=self.result_cache
+        ).run_job()
+        changed_settings_response = ExampleEtl(
+            ExampleJobSettings(input_source=self.input_source, valid=False),
+            result_cache=self.result_cache,
+        ).run_job()
+        self.assertFalse(changed_input_response.cache_hit)
+        self.assertFalse(changed_settings_response.cache_hit)
+        self.assertEqual(3, len(self.result_cache.entries()))
+
+    def test_cache_hit_invalid_model(self):
+        """Tests that a cached invalid model is still reported as invalid"""
+        settings = ExampleJobSettings(valid=False)
+        ExampleEtl(settings, result_cache=self.result_cache).run_job()
+        response = ExampleEtl(
+            settings, result_cache=self.result_cache
+        ).run_job()
+        self.assertTrue(response.cache_hit)
+        self.assertEqual(406, response.status_code)
+
+    @patch("logging.warning")
+    def test_unreadable_entry(self, mock_log_warning: MagicMock):
+        """Tests that an unreadable entry is treated as a miss"""
+        etl = ExampleEtl(ExampleJobSettings(), result_cache=self.result_cache)
+        self.result_cache.set(
+            _etl_cache_key(etl, "result", self.result_cache, __version__),
+            b"not a pickle",
+        )
+        response = etl.run_job()
+        mock_log_warning.assert_called_once()
+        self.assertFalse(response.cache_hit)
+        self.assertEqual(200, response.status_code)
+
+    def test_arun_job_cache_hit(self):
+        """Tests that arun_job reads and writes the result cache"""
+        settings = ExampleJobSettings(input_source=self.input_source)
+        first_response = asyncio.run(
+            ExampleEtl(settings, result_cache=self.result_cache).arun_job()
+        )
+        second_response = asyncio.run(
+            ExampleEtl(settings, result_cache=self.result_cache).arun_job()
+        )
+        self.assertFalse(first_response.cache_hit)
+        self.assertTrue(second_response.cache_hit)
+        self.assertEqual(first_response.data, second_response.data)
+
+
+class TestExtractCache(TestCase):
+    """Tests looking up extracted data in the extract cache"""
+
+    def test_extract_cache_hit(self):
+        """Tests that a second run skips extract but not transform"""
+        extract_cache = MemoryCache()
+        settings = ExampleJobSettings()
+        first_response = ExampleEtl(
+            settings, extract_cache=extract_cache
+        ).run_job()
+        with patch.object(ExampleEtl, "_extract") as mock_extract:
+            second_response = ExampleEtl(
+                settings, extract_cache=extract_cache
+            ).run_job()
+        mock_extract.assert_not_called()
+        self.assertEqual(first_response.data, second_response.data)
+        self.assertIsNone(second_response.cache_hit)
+        self.assertEqual(1, len(extract_cache.entries()))
+
+    def test_extract_cache_ignores_output_directory(self):
+        """Tests that jobs writing to different directories share their
+        extract cache entries"""
+        extract_cache = MemoryCache()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for name in ["first", "second"]:
+                ExampleEtl(
+                    ExampleJobSettings(output_directory=Path(temp_dir) / name),
+                    extract_cache=extract_cache,
+                ).run_job()
+        self.assertEqual(1, len(extract_cache.entries()))
+
+    def test_extract_cache_version(self):
+        """Tests that bumping the extract cache version is a miss"""
+        extract_cache = MemoryCache()
+        ExampleEtl(ExampleJobSettings(), extract_cache=extract_cache).run_job()
+        with patch.object(ExampleEtl, "_extract_cache_version", "2"):
+            ExampleEtl(
+                ExampleJobSettings(), extract_cache=extract_cache
+            ).run_job()
+        self.assertEqual(2, len(extract_cache.entries()))
+
+    def test_extract_cache_package_versions(self):
+        """Tests that upgrading this package or aind_data_schema is a miss,
+        since the extracted data can hold their classes"""
+        extract_cache = MemoryCache()
+        ExampleEtl(ExampleJobSettings(), extract_cache=extract_cache).run_job()
+        for version in ["__version__", "aind_data_schema_version"]:
+            with patch(f"aind_metadata_mapper.core.{version}", "999.0.0"):
+                ExampleEtl(
+                    ExampleJobSettings(), extract_cache=extract_cache
+                ).run_job()
+        self.assertEqual(3, len(extract_cache.entries()))
+
+    def test_arun_job_extract_cache_hit(self):
+        """Tests that arun_job reads and writes the extract cache"""
+        extract_cache = MemoryCache()
+        settings = ExampleJobSettings()
+        asyncio.run(
+            ExampleEtl(settings, extract_cache=extract_cache).arun_job()
+        )
+        with patch.object(ExampleEtl, "_aextract") as mock_aextract:
+            response = asyncio.run(
+                ExampleEtl(settings, extract_cache=extract_cache).arun_job()
+            )
+        mock_aextract.assert_not_called()
+        self.assertEqual(200, response.status_code)
+
+
+if __name__ == "__main__":
+    unittest_main()
@@ -1,18 +1,34 @@
 """Tests gather_metadata module"""
 
+import asyncio
 import json
 import os
+import tarfile
+import tempfile
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from unittest.mock import MagicMock, mock_open, patch
+from typing import List, Optional, Tuple
+from unittest.mock import MagicMock, patch
 
+import requests
 from aind_data_schema.core.processing import DataProcess, PipelineProcess
 from aind_data_schema.models.modalities import Modality
 from aind_data_schema.models.pid_names import PIDName
 from aind_data_schema.models.process_names import ProcessName
 from requests import Response
 
+from aind_metadata_mapper import codec
+from aind_metadata_mapper.cache import (
+    BaseCache,
+    DiskCache,
+    MemoryCache,
+    make_cache_key,
+)
 from aind_metadata_mapper.gather_metadata import (
     DataDescriptionSettings,
     GatherMetadataJob,
@@ -21,7 +37,11 @@ from aind_metadata_mapper.gather_metadata import (
     ProceduresSettings,
     ProcessingSettings,
     SubjectSettings,
+    _ServiceClient,
+    run_batch,
 )
+from aind_metadata_mapper.metrics import MemoryProfile
+from aind_metadata_mapper.sinks import TarSink
 
 RESOURCES_DIR = (
     Path(os.path.dirname(os.path.realpath(__file__)))
@@ -51,8 +71,12 @@ class TestGatherMetadataJob(unittest.TestCase):
         job_settings = JobSettings(directory_to_write_to=RESOURCES_DIR)
         metadata_job = GatherMetadataJob(settings=job_settings)
         self.assertIsNotNone(metadata_job)
+        metadata_job_from_json = GatherMetadataJob(
+            settings=job_settings.model_dump_json()
+        )
+        self.assertEqual(job_settings, metadata_job_from_json.settings)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_subject(self, mock_get: MagicMock):
         """Tests get_subject method"""
         mock_response = Response()
@@ -72,7 +96,7 @@ class TestGatherMetadataJob(unittest.TestCase):
         contents = metadata_job.get_subject()
         self.assertEqual("632269", contents["subject_id"])
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_subject_error(self, mock_get: MagicMock):
         """Tests get_subject when an error is raised"""
         mock_response = Response()
@@ -97,7 +121,7 @@ class TestGatherMetadataJob(unittest.TestCase):
         )
         self.assertTrue(expected_error_message in str(e.exception))
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_procedures(self, mock_get: MagicMock):
         """Tests get_procedures method"""
         mock_response = Response()
@@ -117,7 +141,7 @@ class TestGatherMetadataJob(unittest.TestCase):
         contents = metadata_job.get_procedures()
         self.assertEqual("632269", contents["subject_id"])
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_procedures_error(self, mock_get: MagicMock):
         """Tests get_procedures when an error is raised"""
         mock_response = Response()
@@ -266,24 +290,70 @@ class TestGatherMetadataJob(unittest.TestCase):
         self.assertEqual("Invalid", main_metadata.metadata_status.value)
         self.assertEqual("632269", main_metadata.subject.subject_id)
 
-    @patch("builtins.open", new_callable=mock_open())
-    @patch("json.dump")
-    def test_write_json_file(
-        self, mock_json_dump: MagicMock, mock_file: MagicMock
-    ):
-        """Tests write_json_file method"""
-        mock_file.return_value.__enter__.return_value = (
-            RESOURCES_DIR / "subject.json"
+    def test_get_main_metadata_parses_invalid_files_only(self):
+        """Tests get_main_metadata validates files from their bytes and only
+        parses the invalid ones into dicts"""
+        job_settings = JobSettings(
+            directory_to_write_to=RESOURCES_DIR,
+            metadata_settings=MetadataSettings(
+                name="ecephys_632269_2023-10-10_10-10-10",
+                location="s3://some-bucket/ecephys_632269_2023-10-10_10-10-10",
+                subject_filepath=(METADATA_DIR / "subject.json"),
+                procedures_filepath=(METADATA_DIR / "procedures.json"),
+            ),
         )
-
-        job_settings = JobSettings(directory_to_write_to=RESOURCES_DIR)
         metadata_job = GatherMetadataJob(settings=job_settings)
-        metadata_job._write_json_file(
-            filename="subject.json", contents={"subject_id": "123456"}
+        with (
+            patch.object(codec, "loads", wraps=codec.loads) as mock_loads,
+            self.assertWarns(UserWarning),
+        ):
+            main_metadata = metadata_job.get_main_metadata()
+        mock_loads.assert_called_once_with(
+            (METADATA_DIR / "procedures.json").read_bytes()
         )
+        self.assertEqual("632269", main_metadata.subject.subject_id)
+        self.assertEqual("632269", main_metadata.procedures.subject_id)
+
+    def test_get_main_metadata_thread_per_file(self):
+        """Tests get_main_metadata starts one thread per file that is set,
+        and none if no file is set"""
+        metadata_settings = MetadataSettings(
+            name="ecephys_632269_2023-10-10_10-10-10",
+            location="s3://some-bucket/ecephys_632269_2023-10-10_10-10-10",
+        )
+        metadata_job = GatherMetadataJob(
+            settings=JobSettings(
+                directory_to_write_to=RESOURCES_DIR,
+                metadata_settings=metadata_settings,
+            )
+        )
+        with patch(
+            "aind_metadata_mapper.gather_metadata.ThreadPoolExecutor",
+            wraps=ThreadPoolExecutor,
+        ) as mock_executor:
+            main_metadata = metadata_job.get_main_metadata()
+            mock_executor.assert_not_called()
+            metadata_settings.subject_filepath = METADATA_DIR / "subject.json"
+            subject_metadata = metadata_job.get_main_metadata()
+        mock_executor.assert_called_once_with(max_workers=1)
+        self.assertIsNone(main_metadata.subject)
+        self.assertEqual("632269", subject_metadata.subject.subject_id)
+        self.assertIsNone(subject_metadata.procedures)
+
+    def test_write_json_file(self):
+        """Tests write_json_file method writes the same bytes as
+        json.dump(contents, f, indent=3)"""
+        contents = {"subject_id": "123456", "notes": "caf\u00e9", "n": [1]}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            job_settings = JobSettings(directory_to_write_to=Path(temp_dir))
+            metadata_job = GatherMetadataJob(settings=job_settings)
+            metadata_job._write_json_file(
+                filename="subject.json", contents=contents
+            )
+            written = (Path(temp_dir) / "subject.json").read_bytes()
 
-        mock_json_dump.assert_called_once_with(
-            {"subject_id": "123456"}, RESOURCES_DIR / "subject.json", indent=3
+        self.assertEqual(
+            json.dumps(contents, indent=3).encode("utf-8"), written
         )
 
     @patch(
@@ -388,6 +458,532 @@ class TestGatherMetadataJob(unittest.TestCase):
         mock_get_main_metadata.assert_called_once()
         mock_write_json_file.assert_called()
 
+    def test_run_job_memory_profile(self):
+        """Tests run_job writes the memory profile of each file to a report
+        file"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            job_settings = JobSettings(
+                directory_to_write_to=Path(temp_dir),
+                data_description_settings=DataDescriptionSettings(
+                    investigators=[PIDName(name="Anna Apple")],
+                    name="ecephys_632269_2023-10-10_10-10-10",
+                    modality=[Modality.ECEPHYS],
+                ),
+            )
+            report_path = Path(temp_dir) / "memory.json"
+            metadata_job = GatherMetadataJob(
+                settings=job_settings, memory_report_path=report_path
+            )
+            metadata_job.run_job()
+            memory_profile = MemoryProfile.model_validate_json(
+                report_path.read_text()
+            )
+            self.assertTrue(
+                (Path(temp_dir) / "data_description.json").exists()
+            )
+        self.assertTrue(metadata_job.profile_memory)
+        self.assertEqual(["data_description"], list(memory_profile.stages))
+        self.assertGreater(memory_profile.peak_memory, 0)
+
+    @patch("requests.Session.get")
+    def test_run_job_cpu_profile_and_trace(self, mock_get: MagicMock):
+        """Tests run_job writes the cpu profile and the trace of each file
+        when run from the command line with --profile and --trace"""
+        mock_response = Response()
+        mock_response.status_code = 200
+        mock_response._content = json.dumps(
+            self.example_subject_response
+        ).encode("utf-8")
+        mock_get.return_value = mock_response
+        with tempfile.TemporaryDirectory() as temp_dir:
+            job_settings = JobSettings(
+                directory_to_write_to=Path(temp_dir),
+                subject_settings=SubjectSettings(
+                    subject_id="632269",
+                    metadata_service_url="http://acme.test",
+                ),
+                data_description_settings=DataDescriptionSettings(
+                    investigators=[PIDName(name="Anna Apple")],
+                    name="ecephys_632269_2023-10-10_10-10-10",
+                    modality=[Modality.ECEPHYS],
+                ),
+            )
+            profile_path = Path(temp_dir) / "job.prof"
+            trace_path = Path(temp_dir) / "trace.json"
+            metadata_job = GatherMetadataJob.from_args(
+                [
+                    "-j",
+                    job_settings.model_dump_json(),
+                    "--profile",
+                    str(profile_path),
+                    "--trace",
+                    str(trace_path),
+                ]
+            )
+            metadata_job.run_job()
+            summary = Path(temp_dir, "job.prof.txt").read_text()
+            trace = json.loads(trace_path.read_text())
+            self.assertTrue(profile_path.exists())
+        self.assertTrue(summary.startswith("Stage subject\n"))
+        self.assertIn("Stage data_description\n", summary)
+        self.assertNotIn("Stage procedures", summary)
+        self.assertEqual(
+            ["http_get", "subject", "data_description", "run_job"],
+            [event["name"] for event in trace["traceEvents"]],
+        )
+        self.assertEqual(
+            {"url": "http://acme.test/subject/632269"},
+            trace["traceEvents"][0]["args"],
+        )
+
+    def _service_response(self, url: str, status_code: int) -> Response:
+        """Response of the metadata service to a request for url"""
+        response = Response()
+        response.status_code = status_code
+        if status_code == 500:
+            body = {"message": "Internal Server Error"}
+        elif "/procedures/" in url:
+            body = self.example_procedures_response
+        else:
+            body = self.example_subject_response
+        response._content = json.dumps(body).encode("utf-8")
+        return response
+
+    @staticmethod
+    def _service_job_settings(directory: Path) -> JobSettings:
+        """Settings of a job that fetches the subject and procedures"""
+        return JobSettings(
+            directory_to_write_to=directory,
+            subject_settings=SubjectSettings(
+                subject_id="632269",
+                metadata_service_url="http://acme.test",
+            ),
+            procedures_settings=ProceduresSettings(
+                subject_id="632269",
+                metadata_service_url="http://acme.test",
+            ),
+        )
+
+    @patch("requests.Session.get")
+    def test_run_job_concurrent_fetches(self, mock_get: MagicMock):
+        """Tests run_job sends the requests to the metadata service at the
+        same time"""
+        # Each request waits until the other one has been sent
+        barrier = threading.Barrier(2, timeout=5)
+
+        def get(url, **kwargs):
+            """Answer once both requests are in flight"""
+            barrier.wait()
+            return self._service_response(url, 200)
+
+        mock_get.side_effect = get
+        with tempfile.TemporaryDirectory() as temp_dir:
+            job_settings = self._service_job_settings(Path(temp_dir))
+            GatherMetadataJob(settings=job_settings).run_job()
+            subject = json.loads(Path(temp_dir, "subject.json").read_text())
+            procedures = json.loads(
+                Path(temp_dir, "procedures.json").read_text()
+            )
+        self.assertEqual(2, mock_get.call_count)
+        self.assertEqual("632269", subject["subject_id"])
+        self.assertEqual("632269", procedures["subject_id"])
+
+    @patch("requests.Session.get")
+    def test_run_job_concurrent_fetch_errors(self, mock_get: MagicMock):
+        """Tests run_job writes the files fetched without errors and raises
+        the error of the first file that failed"""
+        status_codes = {"subject": 200, "procedures": 500}
+        mock_get.side_effect = lambda url, **kwargs: self._service_response(
+            url, status_codes[url.split("/")[-2]]
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            job_settings = self._service_job_settings(Path(temp_dir))
+            with self.assertRaises(AssertionError) as e:
+                GatherMetadataJob(settings=job_settings).run_job()
+            self.assertTrue(Path(temp_dir, "subject.json").exists())
+            self.assertFalse(Path(temp_dir, "procedures.json").exists())
+        self.assertIn("Procedures metadata is not valid!", str(e.exception))
+        status_codes["subject"] = 500
+        with tempfile.TemporaryDirectory() as temp_dir:
+            job_settings = self._service_job_settings(Path(temp_dir))
+            with self.assertRaises(AssertionError) as e:
+                GatherMetadataJob(settings=job_settings).run_job()
+        self.assertIn("Subject metadata is not valid!", str(e.exception))
+
+    def test_run_job_sink(self):
+        """Tests run_job writes the files to a sink"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            job_settings = JobSettings(
+                directory_to_write_to=Path(temp_dir) / "s1",
+                data_description_settings=DataDescriptionSettings(
+                    investigators=[PIDName(name="Anna Apple")],
+                    name="ecephys_632269_2023-10-10_10-10-10",
+                    modality=[Modality.ECEPHYS],
+                ),
+                metadata_settings=MetadataSettings(
+                    name="ecephys_632269_2023-10-10_10-10-10",
+                    location="s3://some-bucket/ecephys_632269",
+                    subject_filepath=(METADATA_DIR / "subject.json"),
+                    data_description_filepath=None,
+                    procedures_filepath=None,
+                    session_filepath=None,
+                    rig_filepath=None,
+                    processing_filepath=None,
+                    acquisition_filepath=None,
+                    instrument_filepath=None,
+                ),
+            )
+            sink = TarSink(Path(temp_dir) / "documents.tar")
+            with sink:
+                GatherMetadataJob(settings=job_settings, sink=sink).run_job()
+            with tarfile.open(sink.path) as archive:
+                members = {
+                    member.name: json.load(archive.extractfile(member))
+                    for member in archive.getmembers()
+                }
+            self.assertFalse((Path(temp_dir) / "s1").exists())
+        prefix = (Path(temp_dir) / "s1").as_posix().lstrip("/")
+        self.assertEqual(
+            [f"{prefix}/data_description.json", f"{prefix}/metadata.nd.json"],
+            list(members),
+        )
+        self.assertEqual(
+            "632269",
+            members[f"{prefix}/metadata.nd.json"]["subject"]["subject_id"],
+        )
+
+    @patch("aind_metadata_mapper.gather_metadata.GatherMetadataJob.run_job")
+    def test_arun_job(self, mock_run_job: MagicMock):
+        """Tests arun_job runs the job"""
+        job_settings = JobSettings(directory_to_write_to=RESOURCES_DIR)
+        metadata_job = GatherMetadataJob(settings=job_settings)
+        asyncio.run(metadata_job.arun_job())
+        mock_run_job.assert_called_once()
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    """Handles the requests to the stand-in for the metadata service"""
+
+    protocol_version = "HTTP/1.1"
+
+    def _answer(self, subject_id: str) -> Tuple[int, Optional[dict]]:
+        """Status code and body of the response for subject_id"""
+        if self.server.failures > 0:
+            self.server.failures -= 1
+            return 503, {"message": "Service Unavailable"}
+        if subject_id == "etag" and self.headers["If-None-Match"] == '"v1"':
+            return 304, None
+        status_code = 406 if subject_id == "invalid" else 200
+        return status_code, {"data": {"subject_id": subject_id}}
+
+    def do_GET(self):
+        """Answer with the subject id, after a delay for slow subjects and
+        with an error while the server has failures left. The etag subject
+        has an ETag and the invalid subject is not valid."""
+        self.server.client_ports.add(self.client_address[1])
+        self.server.paths.append(self.path)
+        self.server.validators.append(self.headers["If-None-Match"])
+        subject_id = self.path.split("/")[-1]
+        if subject_id == "slow":
+            time.sleep(0.5)
+        status_code, body = self._answer(subject_id)
+        content = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        if subject_id == "etag":
+            self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        """Do not log requests"""
+
+
+class _Service(ThreadingHTTPServer):
+    """Stand-in for the metadata service"""
+
+    def handle_error(self, request, client_address):
+        """Ignore the clients that time out before they are answered"""
+
+
+class TestMetadataServiceConnections(unittest.TestCase):
+    """Tests the requests GatherMetadataJob sends to the metadata service"""
+
+    def setUp(self):
+        """Start a stand-in for the metadata service"""
+        self.server = _Service(("127.0.0.1", 0), _ServiceHandler)
+        self.server.client_ports = set()
+        self.server.paths = []
+        self.server.validators = []
+        self.server.failures = 0
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        """Stop the stand-in for the metadata service"""
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def _job(
+        self,
+        subject_id: str = "632269",
+        response_cache: Optional[BaseCache] = None,
+        response_ttl: float = 3600,
+        **kwargs,
+    ) -> GatherMetadataJob:
+        """Job that fetches the subject and procedures from the stand-in"""
+        settings = {
+            "subject_id": subject_id,
+            "metadata_service_url": self.url,
+            **kwargs,
+        }
+        return GatherMetadataJob(
+            settings=JobSettings(
+                directory_to_write_to=RESOURCES_DIR,
+                subject_settings=SubjectSettings(**settings),
+                procedures_settings=ProceduresSettings(**settings),
+            ),
+            response_cache=response_cache,
+            response_ttl=response_ttl,
+        )
+
+    def test_connections_reused(self):
+        """Tests requests reuse the connection of the job until it is
+        closed"""
+        metadata_job = self._job()
+        self.assertEqual("632269", metadata_job.get_subject()["subject_id"])
+        self.assertEqual("632269", metadata_job.get_procedures()["subject_id"])
+        metadata_job.get_subject()
+        self.assertEqual(1, len(self.server.client_ports))
+        metadata_job.close()
+        metadata_job.get_subject()
+        self.assertEqual(2, len(self.server.client_ports))
+
+    @patch(
+        "aind_metadata_mapper.gather_metadata.GatherMetadataJob"
+        "._gather_service_files"
+    )
+    def test_run_job_closes_connections(self, mock_gather: MagicMock):
+        """Tests run_job closes the connections once it finishes"""
+        metadata_job = self._job()
+        mock_gather.side_effect = lambda *args: metadata_job.get_subject()
+        metadata_job.run_job()
+        self.assertEqual(1, len(self.server.client_ports))
+        self.assertEqual({}, metadata_job._client._sessions)
+
+    def test_retries(self):
+        """Tests 5xx responses are retried until the retries run out"""
+        self.server.failures = 2
+        metadata_job = self._job(backoff_factor=0, backoff_jitter=0)
+        self.assertEqual("632269", metadata_job.get_subject()["subject_id"])
+        self.assertEqual(0, self.server.failures)
+        self.server.failures = 3
+        metadata_job = self._job(
+            max_retries=1, backoff_factor=0, backoff_jitter=0
+        )
+        with self.assertRaises(AssertionError) as e:
+            metadata_job.get_procedures()
+        self.assertIn(
+            "Procedures metadata is not valid! "
+            "{'message': 'Service Unavailable'}",
+            str(e.exception),
+        )
+        self.assertEqual(1, self.server.failures)
+
+    def _batch_settings(
+        self, directory: Path, subject_ids: List[str]
+    ) -> List[JobSettings]:
+        """Settings of jobs that write to their own directories"""
+        all_settings = []
+        for i, subject_id in enumerate(subject_ids):
+            service_settings = {
+                "subject_id": subject_id,
+                "metadata_service_url": self.url,
+                "max_retries": 0,
+            }
+            job_directory = directory / f"session_{i}"
+            job_directory.mkdir()
+            all_settings.append(
+                JobSettings(
+                    directory_to_write_to=job_directory,
+                    subject_settings=SubjectSettings(**service_settings),
+                    procedures_settings=ProceduresSettings(**service_settings),
+                )
+            )
+        return all_settings
+
+    def test_run_batch(self):
+        """Tests each subject and procedures file of a batch is fetched
+        once and written for every job"""
+        subject_ids = ["1", "2", "1", "1", "2", "3"]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            all_settings = self._batch_settings(Path(temp_dir), subject_ids)
+            all_settings[1] = all_settings[1].model_dump_json()
+            with self.assertLogs(level="INFO") as captured:
+                errors = run_batch(all_settings, max_workers=3)
+            written = [
+                [
+                    json.loads(
+                        Path(temp_dir, f"session_{i}", filename).read_text()
+                    )["subject_id"]
+                    for filename in ["subject.json", "procedures.json"]
+                ]
+                for i in range(len(subject_ids))
+            ]
+        self.assertEqual([None] * 6, errors)
+        self.assertEqual([[i, i] for i in subject_ids], written)
+        self.assertEqual(6, len(self.server.paths))
+        self.assertEqual(6, len(set(self.server.paths)))
+        self.assertIn("Gathered 6 jobs with 6 requests", captured.output[0])
+
+    def test_run_batch_max_shared_responses(self):
+        """Tests only the last used responses are kept, and that the jobs of
+        a batch leave the shared client open"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            all_settings = self._batch_settings(
+                Path(temp_dir), ["1", "2", "1", "1"]
+            )
+            with patch.object(
+                _ServiceClient, "close", autospec=True
+            ) as mock_close:
+                errors = run_batch(
+                    all_settings, max_workers=1, max_shared_responses=2
+                )
+        self.assertEqual([None] * 4, errors)
+        # The third job fetches subject 1 again, the fourth shares its files
+        self.assertEqual(
+            sorted(
+                f"/{name}/{i}"
+                for i in "121"
+                for name in ["subject", "procedures"]
+            ),
+            sorted(self.server.paths),
+        )
+        mock_close.assert_called_once()
+
+    def test_run_batch_errors(self):
+        """Tests the jobs that share a failed request get its error and the
+        other jobs are gathered"""
+        self.server.failures = 1
+        with tempfile.TemporaryDirectory() as temp_dir:
+            all_settings = self._batch_settings(Path(temp_dir), ["1", "1"])
+            all_settings.append(
+                JobSettings(directory_to_write_to=Path(temp_dir) / "missing")
+            )
+            with patch(
+                "aind_metadata_mapper.gather_metadata.GatherMetadataJob"
+                "._gather_service_files",
+                side_effect=lambda service_files, *args: [
+                    get_contents() for _, get_contents, _ in service_files
+                ],
+            ):
+                errors = run_batch(all_settings, max_workers=1)
+        self.assertIsInstance(errors[0], AssertionError)
+        self.assertEqual(str(errors[0]), str(errors[1]))
+        self.assertIn("Service Unavailable", str(errors[0]))
+        self.assertIsNone(errors[2])
+        self.assertEqual(["/subject/1"], self.server.paths)
+
+    def test_run_batch_connection_errors(self):
+        """Tests the jobs that share a request that could not be sent get
+        its error"""
+        self.url = "http://127.0.0.1:1"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            all_settings = self._batch_settings(Path(temp_dir), ["1", "1"])
+            errors = run_batch(all_settings, max_workers=2)
+        self.assertIsInstance(errors[0], requests.ConnectionError)
+        self.assertIsInstance(errors[1], requests.ConnectionError)
+
+    def test_response_cache(self):
+        """Tests fresh cached responses skip the service, and that 406
+        responses are cached with their status but errors are not"""
+        cache = MemoryCache()
+        self.server.failures = 1
+        with self.assertRaises(AssertionError):
+            self._job(max_retries=0, response_cache=cache).get_subject()
+        self.assertEqual([], cache.entries())
+        for subject_id in ["632269", "632269", "invalid", "invalid"]:
+            metadata_job = self._job(subject_id, response_cache=cache)
+            self.assertEqual(
+                subject_id, metadata_job.get_subject()["subject_id"]
+            )
+        response = metadata_job._client.get(
+            metadata_job.settings.subject_settings,
+            f"{self.url}/subject/invalid",
+        )
+        self.assertEqual(406, response.status_code)
+        self.assertEqual(
+            [f"/subject/{i}" for i in ["632269", "632269", "invalid"]],
+            self.server.paths,
+        )
+        self.assertEqual(2, len(cache.entries()))
+
+    def test_response_cache_revalidation(self):
+        """Tests stale cached responses are revalidated when the service
+        sent an ETag and fetched again otherwise"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = DiskCache(temp_dir)
+            for subject_id in ["etag", "etag", "632269", "632269"]:
+                metadata_job = self._job(
+                    subject_id, response_cache=cache, response_ttl=0
+                )
+                self.assertEqual(
+                    subject_id, metadata_job.get_subject()["subject_id"]
+                )
+            self.assertEqual(2, len(cache.entries()))
+        self.assertEqual(4, len(self.server.paths))
+        self.assertEqual([None, '"v1"', None, None], self.server.validators)
+
+    def test_response_cache_stale_on_error(self):
+        """Tests a stale cached response is used when the service fails to
+        revalidate it"""
+        cache = MemoryCache()
+        self._job(response_cache=cache, response_ttl=0).get_subject()
+        self.server.failures = 1
+        metadata_job = self._job(
+            response_cache=cache, response_ttl=0, max_retries=0
+        )
+        with self.assertLogs(level="WARNING") as captured:
+            subject = metadata_job.get_subject()
+        self.assertEqual("632269", subject["subject_id"])
+        self.assertIn("responded with 503", captured.output[0])
+        self.assertEqual(2, len(self.server.paths))
+
+    def test_response_cache_unreadable(self):
+        """Tests cut short or corrupt cached responses are fetched again"""
+        cache = MemoryCache()
+        cache_key = make_cache_key(
+            "service_response", f"{self.url}/subject/632269"
+        )
+        entries = [b"cut short", b"not json\n{}", b"[]\n{}", b"{}\n{}"]
+        for entry in entries:
+            cache.set(cache_key, entry)
+            metadata_job = self._job(response_cache=cache)
+            with self.assertLogs(level="WARNING") as captured:
+                subject = metadata_job.get_subject()
+            self.assertEqual("632269", subject["subject_id"])
+            self.assertIn(
+                "unreadable response cache entry", captured.output[0]
+            )
+        self.assertEqual(4, len(self.server.paths))
+
+    def test_timeout(self):
+        """Tests stalled requests time out with the url of the service"""
+        for max_retries in [0, 1]:
+            metadata_job = self._job(
+                "slow",
+                read_timeout=0.1,
+                max_retries=max_retries,
+                backoff_factor=0,
+                backoff_jitter=0,
+            )
+            with self.assertRaises(requests.ReadTimeout) as e:
+                metadata_job.get_subject()
+            self.assertIn(self.url, str(e.exception))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,18 +1,25 @@
 """Tests legacy BaseEtl class methods. We can remove this once the other jobs
  are ported over."""
 
+import asyncio
+import json
+import tempfile
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 from unittest import TestCase
 from unittest import main as unittest_main
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 from aind_data_schema.core.subject import BreedingInfo, Housing, Sex, Subject
 from aind_data_schema.models.organizations import Organization
 from aind_data_schema.models.species import Species
 
-from aind_metadata_mapper.core import BaseEtl
+from aind_metadata_mapper.cache import DiskCache, MemoryCache
+from aind_metadata_mapper.core import BaseEtl, ValidationMode
+from aind_metadata_mapper.metrics import MemoryProfile
+from aind_metadata_mapper.staging import StagingStats
+from aind_metadata_mapper.writers import WriteMode
 
 
 class TestBaseEtl(TestCase):
@@ -87,6 +94,225 @@ class TestBaseEtl(TestCase):
         )
         mock_write.assert_called_once_with(output_directory=Path("out"))
 
+    def test_legacy_invalid_sample_rate(self):
+        """Tests sample rates below 1 are rejected."""
+        with self.assertRaises(ValueError):
+            self.LegacyEtl(
+                input_source="valid_source",
+                output_directory=Path("out"),
+                validation_sample_rate=0,
+            )
+
+    @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
+    @patch("logging.debug")
+    def test_legacy_arun_job(
+        self, mock_log_debug: MagicMock, mock_write: MagicMock
+    ):
+        """Tests arun_job when a valid model is created."""
+
+        etl_job = self.LegacyEtl(
+            input_source="valid_source", output_directory=Path("out")
+        )
+        asyncio.run(etl_job.arun_job())
+        mock_log_debug.assert_called_once_with(
+            "No validation errors detected."
+        )
+        mock_write.assert_called_once_with(output_directory=Path("out"))
+
+    @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
+    @patch("logging.warning")
+    @patch("aind_metadata_mapper.core.BaseEtl._run_validation_check")
+    def test_legacy_once_mode(
+        self,
+        mock_validation_check: MagicMock,
+        mock_log_warning: MagicMock,
+        mock_write: MagicMock,
+    ):
+        """Tests run_job in ONCE mode only checks for missing fields."""
+        valid_job = self.LegacyEtl(
+            input_source="valid_source",
+            output_directory=Path("out"),
+            validation_mode=ValidationMode.ONCE,
+        )
+        valid_job.run_job()
+        mock_log_warning.assert_not_called()
+        invalid_job = self.LegacyEtl(
+            input_source="source",
+            output_directory=Path("out"),
+            validation_mode=ValidationMode.ONCE,
+        )
+        invalid_job.run_job()
+        mock_log_warning.assert_called_once()
+        mock_validation_check.assert_not_called()
+        self.assertEqual(2, mock_write.call_count)
+
+    @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
+    @patch("logging.warning")
+    @patch("aind_metadata_mapper.core.BaseEtl._run_validation_check")
+    def test_legacy_off_mode(
+        self,
+        mock_validation_check: MagicMock,
+        mock_log_warning: MagicMock,
+        mock_write: MagicMock,
+    ):
+        """Tests run_job in OFF mode does not validate."""
+        etl_job = self.LegacyEtl(
+            input_source="source",
+            output_directory=Path("out"),
+            validation_mode="off",
+        )
+        etl_job.run_job()
+        mock_validation_check.assert_not_called()
+        mock_log_warning.assert_not_called()
+        mock_write.assert_called_once_with(output_directory=Path("out"))
+
+    @patch("logging.info")
+    def test_legacy_skip_unchanged(self, mock_log_info: MagicMock):
+        """Tests run_job skips rewriting an unchanged file."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            etl_job = self.LegacyEtl(
+                input_source="valid_source",
+                output_directory=Path(temp_dir),
+                write_mode=WriteMode.SKIP_UNCHANGED,
+            )
+            etl_job.run_job()
+            mock_log_info.assert_not_called()
+            etl_job.run_job()
+            mock_log_info.assert_called_once_with(
+                "Skipped writing unchanged model to %s", Path(temp_dir)
+            )
+
+    @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
+    @patch("logging.info")
+    def test_legacy_memory_profile(
+        self, mock_log_info: MagicMock, mock_write: MagicMock
+    ):
+        """Tests run_job logs the memory profile, or writes it to a report
+        file if one is set."""
+        etl_job = self.LegacyEtl(
+            input_source="valid_source",
+            output_directory=Path("out"),
+            profile_memory=True,
+        )
+        etl_job.run_job()
+        self.assertEqual("Memory profile: %s", mock_log_info.call_args[0][0])
+        memory_profile = MemoryProfile.model_validate_json(
+            mock_log_info.call_args[0][1]
+        )
+        self.assertEqual(
+            ["extract", "transform", "validation", "load"],
+            list(memory_profile.stages),
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            report_path = Path(temp_dir) / "memory.json"
+            result_cache = MemoryCache()
+            for _ in range(2):
+                self.LegacyEtl(
+                    input_source="valid_source",
+                    output_directory=Path("out"),
+                    memory_report_path=report_path,
+                    result_cache=result_cache,
+                ).run_job()
+            memory_profile = MemoryProfile.model_validate_json(
+                report_path.read_text()
+            )
+        # The second run is a result cache hit
+        self.assertEqual(["validation", "load"], list(memory_profile.stages))
+        mock_log_info.assert_called_once()
+        self.assertEqual(3, mock_write.call_count)
+
+    @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
+    def test_legacy_cpu_profile(self, mock_write: MagicMock):
+        """Tests run_job writes the cpu profile and the trace of the stages
+        and from_args passes the --profile and --trace options."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profile_path = Path(temp_dir) / "job.prof"
+            trace_path = Path(temp_dir) / "trace.json"
+            etl_job = self.LegacyEtl.from_args(
+                [
+                    "-i",
+                    "valid_source",
+                    "--profile",
+                    str(profile_path),
+                    "--trace",
+                    str(trace_path),
+                ]
+            )
+            etl_job.run_job()
+            summary = Path(temp_dir, "job.prof.txt").read_text()
+            trace = json.loads(trace_path.read_text())
+            self.assertTrue(profile_path.exists())
+        self.assertEqual(str(profile_path), etl_job.profile_path)
+        self.assertIn("Stage transform\n", summary)
+        self.assertEqual(
+            ["extract", "transform", "validation", "load", "run_job"],
+            [event["name"] for event in trace["traceEvents"]],
+        )
+        mock_write.assert_called_once_with(output_directory=Path("."))
+
+    @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
+    def test_legacy_result_cache(self, mock_write: MagicMock):
+        """Tests run_job and arun_job skip extract and transform on a result
+        cache hit."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result_cache = DiskCache(temp_dir)
+            etl_job = self.LegacyEtl(
+                input_source="valid_source",
+                output_directory=Path("out"),
+                result_cache=result_cache,
+            )
+            self.assertEqual([Path("valid_source")], etl_job._input_files())
+            etl_job.run_job()
+            with patch.object(
+                self.LegacyEtl, "_extract"
+            ) as mock_extract, patch.object(
+                self.LegacyEtl, "_transform"
+            ) as mock_transform:
+                etl_job.run_job()
+                asyncio.run(etl_job.arun_job())
+            mock_extract.assert_not_called()
+            mock_transform.assert_not_called()
+            result_cache.clear()
+            asyncio.run(etl_job.arun_job())
+            self.assertEqual(1, len(result_cache.entries()))
+        self.assertEqual(4, mock_write.call_count)
+
+    @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
+    def test_legacy_extract_cache(self, mock_write: MagicMock):
+        """Tests run_job and arun_job skip extract on an extract cache hit."""
+        extract_cache = MemoryCache()
+        etl_job = self.LegacyEtl(
+            input_source="valid_source",
+            output_directory=Path("out"),
+            extract_cache=extract_cache,
+        )
+        asyncio.run(etl_job.arun_job())
+        with patch.object(self.LegacyEtl, "_extract") as mock_extract:
+            etl_job.run_job()
+        mock_extract.assert_not_called()
+        self.assertEqual(1, len(extract_cache.entries()))
+        self.assertEqual(2, mock_write.call_count)
+
+    @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
+    @patch("logging.info")
+    def test_legacy_staging(
+        self, mock_log_info: MagicMock, mock_write: MagicMock
+    ):
+        """Tests run_job and arun_job log the hits and misses of the staging
+        cache."""
+        etl_job = self.LegacyEtl(
+            input_source="valid_source",
+            output_directory=Path("out"),
+            staging_cache=MemoryCache(),
+        )
+        etl_job.run_job()
+        asyncio.run(etl_job.arun_job())
+        self.assertEqual(
+            [call("Staged inputs: %s", StagingStats())] * 2,
+            mock_log_info.mock_calls,
+        )
+        self.assertEqual(2, mock_write.call_count)
+
 
 if __name__ == "__main__":
     unittest_main()
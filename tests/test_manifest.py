@@ -0,0 +1,157 @@
+"""Tests running jobs from a manifest."""
+
+import io
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from aind_metadata_mapper.cache import make_cache_key
+from aind_metadata_mapper.manifest import (
+    ManifestSummary,
+    _log_progress,
+    main,
+    read_completed,
+    run_manifest,
+)
+from tests.test_cli import fib_job_settings
+
+
+class TestManifest(unittest.TestCase):
+    """Tests methods in the manifest module"""
+
+    def setUp(self):
+        """Write a manifest with two valid jobs and one invalid job"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manifest_path = Path(self.temp_dir.name) / "manifest.jsonl"
+        self.progress_log_path = Path(self.temp_dir.name) / "progress.jsonl"
+        entries = [
+            {"etl": "fib", "id": "a", "job_settings": fib_job_settings()},
+            {"etl": "fib", "job_settings": {}},
+            {"etl": "fib", "id": "c", "job_settings": fib_job_settings()},
+        ]
+        with open(self.manifest_path, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.write("\n")
+
+    def tearDown(self):
+        """Remove the temporary directory"""
+        self.temp_dir.cleanup()
+
+    def test_run_manifest(self):
+        """Tests jobs are run and logged, and that a second run only retries
+        the failed job"""
+        first_summary = run_manifest(
+            self.manifest_path, self.progress_log_path, workers=2
+        )
+        self.assertEqual({"a", "c"}, read_completed(self.progress_log_path))
+        second_summary = run_manifest(
+            self.manifest_path,
+            self.progress_log_path,
+            workers=1,
+            progress_interval=0,
+        )
+        self.assertEqual(
+            ManifestSummary(total=3, succeeded=2, failed=1), first_summary
+        )
+        self.assertEqual(
+            ManifestSummary(total=3, skipped=2, failed=1), second_summary
+        )
+        with open(self.progress_log_path, "r") as f:
+            records = [json.loads(line) for line in f]
+        failed_id = make_cache_key("fib", {})
+        self.assertEqual(
+            sorted(["a", "c", failed_id, failed_id]),
+            sorted(record["id"] for record in records),
+        )
+        for record in records:
+            self.assertNotIn("data", record["response"])
+
+    def test_resume_after_new_entries(self):
+        """Tests an entry without an id is still skipped once entries are
+        added before it"""
+        job_settings = fib_job_settings()
+        with open(self.manifest_path, "w") as f:
+            f.write(json.dumps({"etl": "fib", "job_settings": job_settings}))
+        run_manifest(self.manifest_path, self.progress_log_path, workers=1)
+        job_settings["notes"] = "Another session"
+        with open(self.manifest_path, "r+") as f:
+            entry = f.read()
+            f.seek(0)
+            f.write(json.dumps({"etl": "fib", "job_settings": job_settings}))
+            f.write("\n" + entry)
+        summary = run_manifest(
+            self.manifest_path, self.progress_log_path, workers=1
+        )
+        self.assertEqual(
+            ManifestSummary(total=2, skipped=1, succeeded=1), summary
+        )
+
+    def test_resume_after_cut_short_record(self):
+        """Tests a record cut short by a killed run is ignored and does not
+        corrupt the next record"""
+        with open(self.progress_log_path, "w") as f:
+            f.write(
+                '{"id":"a","etl":"fib","response":{"status_code":200}}\n'
+                '{"id":"c","etl":"fib","resp'
+            )
+        self.assertEqual({"a"}, read_completed(self.progress_log_path))
+        summary = run_manifest(
+            self.manifest_path, self.progress_log_path, workers=2
+        )
+        self.assertEqual(
+            ManifestSummary(total=3, skipped=1, succeeded=1, failed=1),
+            summary,
+        )
+        self.assertEqual({"a", "c"}, read_completed(self.progress_log_path))
+
+    def test_invalid_manifest(self):
+        """Tests invalid entries and unknown etls are reported by line"""
+        with open(self.manifest_path, "a") as f:
+            f.write('{"etl": "fib"}\n')
+        with self.assertRaises(ValueError) as e:
+            run_manifest(self.manifest_path, self.progress_log_path)
+        self.assertIn("line 5", str(e.exception))
+        with open(self.manifest_path, "w") as f:
+            f.write('{"etl": "unknown", "job_settings": {}}\n')
+        with self.assertRaises(ValueError) as e:
+            run_manifest(self.manifest_path, self.progress_log_path)
+        self.assertEqual("Unknown etl unknown on line 1", str(e.exception))
+
+    @patch("logging.info")
+    def test_log_progress(self, mock_log_info: MagicMock):
+        """Tests throughput and ETA are logged"""
+        _log_progress(
+            ManifestSummary(total=4, succeeded=1, failed=1),
+            4,
+            time.monotonic() - 2,
+        )
+        _log_progress(ManifestSummary(total=4), 4, time.monotonic())
+        self.assertEqual((2, 4, 1), mock_log_info.call_args_list[0].args[1:4])
+        self.assertEqual("0:00:02", str(mock_log_info.call_args_list[0][0][5]))
+        self.assertEqual("unknown", mock_log_info.call_args_list[1][0][5])
+
+    def test_main(self):
+        """Tests main prints the summary and exits with 1 if a job failed"""
+        with patch("sys.stdout", new_callable=io.StringIO) as mock_stdout:
+            exit_code = main(
+                [
+                    str(self.manifest_path),
+                    "-p",
+                    str(self.progress_log_path),
+                    "--workers",
+                    "2",
+                ]
+            )
+        self.assertEqual(1, exit_code)
+        self.assertEqual(
+            ManifestSummary(total=3, succeeded=2, failed=1),
+            ManifestSummary.model_validate_json(mock_stdout.getvalue()),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 """Unit tests for mesoscope etl package"""
 
+import asyncio
 import json
 import os
 import unittest
@@ -121,6 +122,16 @@ class TestMesoscope(unittest.TestCase):
         extract = etl._extract()
         self.assertEqual(extract, expected_extract)
 
+    def test_aextract(self) -> None:
+        """Tests that the async extract reads the same data as _extract."""
+        etl = MesoscopeEtl(
+            job_settings=self.example_job_settings,
+        )
+        with open(EXAMPLE_EXTRACT, "r") as f:
+            expected_extract = json.load(f)
+        extract = asyncio.run(etl._aextract())
+        self.assertEqual(expected_extract, extract)
+
     @patch("pathlib.Path.is_dir")
     def test_extract_no_behavior_dir(self, mock_is_dir: MagicMock) -> None:
         """Tests that _extract raises a ValueError"""
@@ -215,9 +226,10 @@ class TestMesoscope(unittest.TestCase):
         etl = MesoscopeEtl(
             job_settings=self.example_job_settings,
         )
-        etl.run_job()
+        response = etl.run_job()
         mock_extract.assert_called_once()
         mock_write.assert_called_once_with(output_directory=RESOURCES_DIR)
+        self.assertEqual(406, response.status_code)
 
 
 if __name__ == "__main__":
@@ -35,6 +35,20 @@ class TestMvrRigEtl(unittest.TestCase):
         transformed = etl._transform(extracted)
         self.assertEqual(transformed, self.expected)
 
+    def test_input_files(self):
+        """Test the rig and MVR config files are fingerprinted for the
+        result cache."""
+        etl = MvrRigEtl(
+            self.input_source,
+            self.output_dir,
+            RESOURCES_DIR / "mvr.ini",
+            mvr_mapping={},
+        )
+        self.assertEqual(
+            [self.input_source, RESOURCES_DIR / "mvr.ini"],
+            etl._input_files(),
+        )
+
     @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
     def test_run_job(self, mock_write_standard_file: MagicMock):
         """Test basic MVR etl workflow."""
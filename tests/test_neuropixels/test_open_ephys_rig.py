@@ -1,5 +1,6 @@
 """Tests for the neuropixels open ephys rig ETL."""
 
+import asyncio
 import os
 import unittest
 from pathlib import Path
@@ -61,6 +62,33 @@ class TestOpenEphysRigEtl(unittest.TestCase):
         transformed = etl._transform(extracted)
         self.assertEqual(transformed, self.expected)
 
+    def test_aextract(self):
+        """Tests async extract reads the same context as _extract."""
+        etl = OpenEphysRigEtl(
+            self.input_source,
+            self.output_dir,
+            open_ephys_settings_sources=[
+                RESOURCES_DIR / "settings.xml",
+                RESOURCES_DIR / "settings.xml",
+            ],
+        )
+        extracted = asyncio.run(etl._aextract())
+        self.assertEqual(etl._extract(), extracted)
+        self.assertEqual(2, len(extracted.versions))
+
+    def test_input_files(self):
+        """Tests the rig and settings files are fingerprinted for the result
+        cache."""
+        etl = OpenEphysRigEtl(
+            self.input_source,
+            self.output_dir,
+            open_ephys_settings_sources=[RESOURCES_DIR / "settings.xml"],
+        )
+        self.assertEqual(
+            [self.input_source, RESOURCES_DIR / "settings.xml"],
+            etl._input_files(),
+        )
+
     @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
     def test_etl(self, mock_write_standard_file: MagicMock):
         """Test ETL workflow."""
@@ -1,10 +1,12 @@
 """Tests for Sync rig ETL."""
 
 import os
+import tempfile
 import unittest
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+from aind_metadata_mapper.cache import DiskCache
 from aind_metadata_mapper.neuropixels.sync_rig import (  # type: ignore
     SyncRigEtl,
 )
@@ -32,6 +34,39 @@ class TestSyncRigEtl(unittest.TestCase):
         transformed = etl._transform(extracted)
         self.assertEqual(transformed, self.expected)
 
+    def test_input_files(self):
+        """Test the rig and config files are fingerprinted for the result
+        cache."""
+        etl = SyncRigEtl(
+            self.input_source,
+            self.output_dir,
+            RESOURCES_DIR / "sync.yml",
+        )
+        self.assertEqual(
+            [self.input_source, RESOURCES_DIR / "sync.yml"],
+            etl._input_files(),
+        )
+
+    def test_extract_cache(self):
+        """Test the extract context round trips through an extract cache."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            etl = SyncRigEtl(
+                self.input_source,
+                self.output_dir,
+                RESOURCES_DIR / "sync.yml",
+                extract_cache=DiskCache(temp_dir),
+            )
+            extracted = etl._extract()
+            with patch(
+                "aind_metadata_mapper.core.BaseEtl._load"
+            ) as mock_load:
+                etl.run_job()
+                with patch.object(SyncRigEtl, "_extract") as mock_extract:
+                    etl.run_job()
+        mock_extract.assert_not_called()
+        self.assertEqual(2, mock_load.call_count)
+        self.assertEqual(etl._transform(extracted), self.expected)
+
     @patch("aind_data_schema.base.AindCoreModel.write_standard_file")
     def test_etl(
         self,
@@ -0,0 +1,293 @@
+"""Tests the pipelined scheduler."""
+
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any
+from unittest import TestCase
+from unittest import main as unittest_main
+from unittest.mock import MagicMock, patch
+
+from aind_data_schema.core.subject import Subject
+
+from aind_metadata_mapper.cache import DiskCache
+from aind_metadata_mapper.scheduler import (
+    _acquire,
+    _extract_job,
+    _finish_job,
+    _Pipeline,
+    run_pipelined,
+)
+from aind_metadata_mapper.staging import StagingStats
+from tests.test_core import ExampleEtl, ExampleJobSettings, StagedInputEtl
+
+
+class SlowJobSettings(ExampleJobSettings):
+    """Job settings for the SlowEtl class"""
+
+    extract_seconds: float = 0.0
+    transform_seconds: float = 0.0
+    kill_worker: bool = False
+
+
+class SlowEtl(ExampleEtl):
+    """Mock a child class with slow stages"""
+
+    def _extract(self) -> None:
+        """Mocked extract method that waits on the file system"""
+        time.sleep(self.job_settings.extract_seconds)
+
+    def _transform(self, extracted_source: Any = None) -> Subject:
+        """Mocked transform method that keeps the cpu busy, or kills the
+        worker process it runs in"""
+        if self.job_settings.kill_worker:
+            os._exit(1)  # pragma: no cover
+        time.sleep(self.job_settings.transform_seconds)
+        return super()._transform(extracted_source)
+
+
+class TestRunPipelined(TestCase):
+    """Tests the pipelined batch runner"""
+
+    def test_run_pipelined(self):
+        """Tests that every job is run and a response yielded for each"""
+        settings = (
+            SlowJobSettings(valid=i % 2 == 0, extract_seconds=0.15)
+            for i in range(5)
+        )
+        responses = list(
+            run_pipelined(
+                SlowEtl,
+                settings,
+                extract_workers=2,
+                transform_workers=2,
+                max_tasks_per_worker=1,
+            )
+        )
+        self.assertEqual(
+            [200, 200, 200, 406, 406],
+            sorted(response.status_code for response in responses),
+        )
+        for response in responses:
+            self.assertGreaterEqual(response.metrics.extract.wall_time, 0.15)
+            self.assertGreater(response.metrics.validation.wall_time, 0)
+
+    def test_run_pipelined_passes_kwargs(self):
+        """Tests that extra kwargs are passed to every job"""
+        responses = list(
+            run_pipelined(
+                ExampleEtl,
+                [ExampleJobSettings(valid=False)] * 2,
+                transform_workers=1,
+                validation_mode="off",
+            )
+        )
+        self.assertEqual(
+            [200, 200], [response.status_code for response in responses]
+        )
+
+    def test_run_pipelined_errors(self):
+        """Tests that jobs that fail to extract or cannot be sent to a worker
+        are reported as 500s"""
+        responses = list(
+            run_pipelined(ExampleEtl, ["not json"], transform_workers=1)
+        )
+        self.assertEqual([500], [r.status_code for r in responses])
+        self.assertIn("Error running job", responses[0].message)
+        responses = list(
+            run_pipelined(
+                ExampleEtl,
+                [ExampleJobSettings()],
+                transform_workers=1,
+                unpicklable=lambda: None,
+            )
+        )
+        self.assertEqual([500], [r.status_code for r in responses])
+
+    def test_backpressure(self):
+        """Tests that the extract threads stop taking jobs while the worker
+        processes are behind"""
+        taken = []
+
+        def settings():
+            """Count the jobs taken by the extract threads"""
+            for i in range(12):
+                taken.append(i)
+                yield SlowJobSettings(transform_seconds=0.05)
+
+        responses = run_pipelined(
+            SlowEtl,
+            settings(),
+            extract_workers=1,
+            transform_workers=1,
+            queue_size=1,
+        )
+        next(responses)
+        # One finished, two in flight, one queued, one waiting to be queued
+        # and one being extracted
+        self.assertLessEqual(len(taken), 6)
+        self.assertEqual(11, len(list(responses)))
+        self.assertEqual(12, len(taken))
+
+    def test_slow_consumer(self):
+        """Tests that the workers stop taking jobs while the responses wait
+        for the consumer"""
+        taken = []
+
+        def settings():
+            """Count the jobs taken by the extract threads"""
+            for i in range(40):
+                taken.append(i)
+                yield SlowJobSettings(transform_seconds=0.02)
+
+        responses = run_pipelined(
+            SlowEtl,
+            settings(),
+            extract_workers=1,
+            transform_workers=1,
+            queue_size=1,
+        )
+        next(responses)
+        time.sleep(1)
+        # One consumed, one waiting for the consumer, one waiting for a
+        # slot, one queued and one waiting to be queued
+        self.assertLessEqual(len(taken), 6)
+        self.assertEqual(39, len(list(responses)))
+
+    def test_worker_dies(self):
+        """Tests the jobs lost with a worker that died are reported as 500s
+        and the next jobs run on a new pool"""
+        settings = [SlowJobSettings(kill_worker=True)] + [
+            SlowJobSettings(extract_seconds=0.1) for _ in range(6)
+        ]
+        for max_tasks_per_worker in [None, 2]:
+            with self.subTest(max_tasks_per_worker=max_tasks_per_worker):
+                status_codes = [
+                    response.status_code
+                    for response in run_pipelined(
+                        SlowEtl,
+                        settings,
+                        extract_workers=1,
+                        transform_workers=1,
+                        max_tasks_per_worker=max_tasks_per_worker,
+                    )
+                ]
+                self.assertEqual(7, len(status_codes))
+                self.assertIn(500, status_codes)
+                self.assertEqual(200, status_codes[-1])
+
+    def test_stop_early(self):
+        """Tests that closing the iterator stops the run"""
+        thread_count = threading.active_count()
+        responses = run_pipelined(
+            SlowEtl,
+            (SlowJobSettings(transform_seconds=0.05) for _ in range(100)),
+            extract_workers=2,
+            transform_workers=1,
+            queue_size=1,
+        )
+        self.assertEqual(200, next(responses).status_code)
+        responses.close()
+        self.assertEqual(thread_count, threading.active_count())
+
+    def test_result_cache(self):
+        """Tests that cached models skip extract and transform"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result_cache = DiskCache(Path(temp_dir) / "cache")
+            for cache_hit in [False, True]:
+                responses = list(
+                    run_pipelined(
+                        ExampleEtl,
+                        [ExampleJobSettings()],
+                        transform_workers=1,
+                        result_cache=result_cache,
+                    )
+                )
+                self.assertEqual([cache_hit], [r.cache_hit for r in responses])
+
+    def test_staging(self):
+        """Tests that inputs are staged in the extract threads and in the
+        worker processes, with the hits and misses counted together"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_source = Path(temp_dir) / "input.json"
+            input_source.write_text("{}")
+            responses = list(
+                run_pipelined(
+                    StagedInputEtl,
+                    [ExampleJobSettings(input_source=input_source)],
+                    transform_workers=1,
+                    staging_cache=DiskCache(Path(temp_dir) / "staging"),
+                )
+            )
+        self.assertEqual(
+            [StagingStats(hits=1, misses=1, bytes_fetched=2)],
+            [response.metrics.staging for response in responses],
+        )
+
+
+class TestPipelineStages(TestCase):
+    """Tests the stages run by the threads and worker processes"""
+
+    def test_extract_and_finish_job(self):
+        """Tests a job split into its extract and finish stages"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result_cache = DiskCache(Path(temp_dir) / "cache")
+            kwargs = {"result_cache": result_cache}
+            extracted_job = _extract_job(
+                ExampleEtl, ExampleJobSettings(), kwargs
+            )
+            self.assertIsNone(extracted_job[4])
+            self.assertFalse(_finish_job(*extracted_job).cache_hit)
+            extracted_job = _extract_job(
+                ExampleEtl, ExampleJobSettings(), kwargs
+            )
+            self.assertIsNotNone(extracted_job[4])
+            self.assertTrue(_finish_job(*extracted_job).cache_hit)
+        response = _finish_job(*_extract_job(SlowEtl, SlowJobSettings(), {}))
+        self.assertEqual(200, response.status_code)
+        self.assertIsNone(response.cache_hit)
+
+    def test_acquire_stopped(self):
+        """Tests waiting for a slot ends when the run is stopped"""
+        stop = threading.Event()
+        threading.Timer(0.15, stop.set).start()
+        self.assertFalse(_acquire(threading.Semaphore(0), stop))
+
+    def test_stopped_while_queue_full(self):
+        """Tests blocked extract threads and the dispatcher give up when the
+        run is stopped"""
+        pipeline = _Pipeline(ExampleEtl, [], {}, 1, 1, queue_size=1)
+        pipeline.extracted.put("extracted")
+        threading.Timer(0.15, pipeline.stop.set).start()
+        pipeline.extract()
+        self.assertEqual("extracted", pipeline.extracted.get_nowait())
+        self.assertTrue(pipeline._slots.acquire(blocking=False))
+        pipeline.dispatch()
+        with self.assertRaises(queue.Empty):
+            pipeline.finished.get_nowait()
+
+    def test_submit_to_broken_pool(self):
+        """Tests a job sent to a pool that broke between jobs runs on a new
+        pool"""
+        broken_pool = MagicMock()
+        broken_pool.submit.side_effect = BrokenProcessPool()
+        pipeline = _Pipeline(ExampleEtl, [], {}, 1, 1, queue_size=1)
+        with patch(
+            "aind_metadata_mapper.scheduler._process_pool",
+            side_effect=[broken_pool, ThreadPoolExecutor(1)],
+        ):
+            pipeline._submit(
+                _extract_job(ExampleEtl, ExampleJobSettings(), {})
+            )
+        pipeline.shutdown()
+        broken_pool.shutdown.assert_called_once_with(wait=False)
+        self.assertEqual(200, pipeline.finished.get_nowait().status_code)
+
+
+if __name__ == "__main__":
+    unittest_main()
@@ -0,0 +1,202 @@
+"""Tests the server that runs etl jobs on warm workers."""
+
+import http.client
+import json
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from aind_metadata_mapper.core import JobResponse
+from aind_metadata_mapper.server import (
+    WorkerPool,
+    create_pool,
+    main,
+    make_server,
+)
+from tests.test_cli import HEAVY_MODULES, fib_job_settings
+from tests.test_core import _job_that_kills_its_worker
+
+
+def _loaded_heavy_modules() -> JobResponse:
+    """Job function that reports the heavy modules loaded in its worker"""
+    loaded = [module for module in HEAVY_MODULES if module in sys.modules]
+    return JobResponse(status_code=200, message=json.dumps(loaded))
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """Http connection over a Unix socket"""
+
+    def __init__(self, socket_path: str):
+        """Class constructor"""
+        super().__init__("localhost")
+        self.socket_path = socket_path
+
+    def connect(self):
+        """Connect to the Unix socket instead of host and port"""
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class TestServer(unittest.TestCase):
+    """Tests requests to a running server"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start a tcp and a Unix socket server that share one worker"""
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.socket_path = str(Path(cls.temp_dir.name) / "server.sock")
+        cls.pool = create_pool(workers=1)
+        cls.tcp_server = make_server(cls.pool, ("127.0.0.1", 0))
+        cls.unix_server = make_server(cls.pool, cls.socket_path)
+        for server in (cls.tcp_server, cls.unix_server):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the servers and the worker"""
+        for server in (cls.tcp_server, cls.unix_server):
+            server.shutdown()
+            server.server_close()
+        cls.pool.shutdown()
+        cls.temp_dir.cleanup()
+
+    def _request(self, connection, method: str, path: str, body=None):
+        """Send a request and return the status and json body"""
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_health(self):
+        """Tests the health check lists the etls"""
+        connection = http.client.HTTPConnection(
+            *self.tcp_server.server_address
+        )
+        status, body = self._request(connection, "GET", "/health")
+        connection.close()
+        self.assertEqual(200, status)
+        self.assertIn("fib", body["etls"])
+
+    def test_not_found(self):
+        """Tests unknown paths and etls return 404"""
+        connection = http.client.HTTPConnection(
+            *self.tcp_server.server_address
+        )
+        get_status, _ = self._request(connection, "GET", "/jobs")
+        post_status, _ = self._request(connection, "POST", "/jobs/x", "{}")
+        connection.close()
+        self.assertEqual(404, get_status)
+        self.assertEqual(404, post_status)
+
+    def test_run_jobs(self):
+        """Tests jobs run on the worker over one kept alive connection"""
+        connection = http.client.HTTPConnection(
+            *self.tcp_server.server_address
+        )
+        responses = [
+            self._request(
+                connection,
+                "POST",
+                "/jobs/fib",
+                json.dumps(fib_job_settings()),
+            )
+            for _ in range(2)
+        ]
+        error_status, error_body = self._request(
+            connection, "POST", "/jobs/fib", "{}"
+        )
+        connection.close()
+        for status, body in responses:
+            self.assertEqual(200, status)
+            self.assertEqual("000000", json.loads(body["data"])["subject_id"])
+        self.assertEqual(500, error_status)
+        self.assertTrue(error_body["message"].startswith("Error running"))
+
+    def test_unix_socket(self):
+        """Tests jobs can be sent over the Unix socket"""
+        connection = UnixHTTPConnection(self.socket_path)
+        status, body = self._request(
+            connection,
+            "POST",
+            "/jobs/gather-metadata",
+            json.dumps({"directory_to_write_to": self.temp_dir.name}),
+        )
+        connection.close()
+        self.assertEqual(200, status)
+        self.assertEqual("Job finished.", body["message"])
+
+
+class TestWorkerPool(unittest.TestCase):
+    """Tests the pool of workers of the server"""
+
+    def test_preloaded_dependencies(self):
+        """Tests fresh workers have the heavy dependencies of the etls
+        loaded before they run a job"""
+        self.assertIsInstance(_loaded_heavy_modules(), JobResponse)
+        with WorkerPool(
+            workers=1,
+            max_tasks_per_worker=1,
+            job_function=_loaded_heavy_modules,
+        ) as pool:
+            job_response = pool.run()
+        self.assertEqual(HEAVY_MODULES, json.loads(job_response.message))
+
+    def test_workers_start_with_pool(self):
+        """Tests every worker is started before the first job, from a
+        forkserver that has the etl modules loaded"""
+        with WorkerPool(workers=2, job_function=_loaded_heavy_modules) as pool:
+            self.assertEqual(2, len(pool._executor._processes))
+            self.assertEqual(
+                "forkserver",
+                pool._executor._mp_context.get_start_method(),
+            )
+
+    def test_worker_dies(self):
+        """Tests a job whose worker dies gets a 500 and that the next jobs
+        run on a new pool"""
+        with WorkerPool(
+            workers=1, job_function=_job_that_kills_its_worker
+        ) as pool:
+            lost_response = pool.run(2)
+            broken_pool = MagicMock()
+            broken_pool.submit.side_effect = BrokenProcessPool()
+            pool._executor = broken_pool
+            responses = [pool.run(i) for i in range(2)]
+        self.assertEqual(500, lost_response.status_code)
+        self.assertIn("BrokenProcessPool", lost_response.message)
+        broken_pool.shutdown.assert_called_once_with(wait=False)
+        self.assertEqual(
+            ["0", "1"], [job_response.message for job_response in responses]
+        )
+
+
+class TestServerMain(unittest.TestCase):
+    """Tests starting the server from the command line"""
+
+    @patch("aind_metadata_mapper.server.make_server")
+    @patch("aind_metadata_mapper.server.create_pool")
+    def test_main(
+        self, mock_create_pool: MagicMock, mock_make_server: MagicMock
+    ):
+        """Tests main serves until interrupted"""
+        mock_server = mock_make_server.return_value.__enter__.return_value
+        mock_server.serve_forever.side_effect = KeyboardInterrupt()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = Path(temp_dir) / "server.sock"
+            socket_path.touch()
+            tcp_exit_code = main(["--port", "8001", "--workers", "2"])
+            unix_exit_code = main(["--socket", str(socket_path)])
+            self.assertFalse(socket_path.exists())
+        self.assertEqual([0, 0], [tcp_exit_code, unix_exit_code])
+        mock_create_pool.assert_called_with(None, None)
+        self.assertEqual(
+            ("127.0.0.1", 8001), mock_make_server.call_args_list[0].args[1]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,291 @@
+"""Tests sinks module"""
+
+import sqlite3
+import tarfile
+import tempfile
+import unittest
+import warnings
+import zipfile
+from pathlib import Path
+from typing import List, Tuple
+from unittest.mock import MagicMock, patch
+
+from aind_metadata_mapper.core import JobResponse, _run_etl_job
+from aind_metadata_mapper.scheduler import run_pipelined
+from aind_metadata_mapper.sinks import (
+    BaseSink,
+    CollectingSink,
+    DirectorySink,
+    SqliteSink,
+    TarSink,
+    ZipSink,
+    document_name,
+)
+from aind_metadata_mapper.writers import WriteMode
+from tests.test_core import ExampleEtl, ExampleJobSettings
+
+
+class TestSinks(unittest.TestCase):
+    """Tests methods in sinks module"""
+
+    def setUp(self):
+        """Create a temporary directory to write to"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_directory = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        """Remove the temporary directory"""
+        self.temp_dir.cleanup()
+
+    def test_document_name(self):
+        """Tests documents are named by the path they would have as files"""
+        self.assertEqual("session.json", document_name(None, "session.json"))
+        self.assertEqual(
+            "/data/s1/session.json",
+            document_name(Path("/data/s1"), "session.json"),
+        )
+
+    def test_directory_sink(self):
+        """Tests documents are written to their own files under the root"""
+        with DirectorySink(
+            self.output_directory, write_mode=WriteMode.SKIP_UNCHANGED
+        ) as sink:
+            self.assertTrue(sink.write("s1/session.json", b"{}"))
+            self.assertFalse(sink.write("s1/session.json", b"{}"))
+        self.assertEqual(
+            b"{}", (self.output_directory / "s1" / "session.json").read_bytes()
+        )
+        self.assertEqual(str(self.output_directory), sink.location)
+        self.assertEqual(".", DirectorySink().location)
+
+    def test_sqlite_sink(self):
+        """Tests documents are inserted in batches and appended"""
+        path = self.output_directory / "documents.db"
+        with SqliteSink(path, batch_size=2) as sink:
+            sink.write("s1/session.json", b"1")
+            self.assertEqual(0, self._count_rows(path))
+            sink.write("s2/session.json", b"2")
+            self.assertEqual(2, self._count_rows(path))
+            sink.write("s1/session.json", b"3")
+        with SqliteSink(path) as sink:
+            sink.write("s3/session.json", b"4")
+        self.assertEqual(str(path), sink.location)
+        with sqlite3.connect(path) as connection:
+            rows = connection.execute(
+                "SELECT name, contents FROM documents ORDER BY id"
+            ).fetchall()
+        self.assertEqual(
+            [
+                ("s1/session.json", b"1"),
+                ("s2/session.json", b"2"),
+                ("s1/session.json", b"3"),
+                ("s3/session.json", b"4"),
+            ],
+            rows,
+        )
+
+    @staticmethod
+    def _count_rows(path: Path) -> int:
+        """Count the committed documents of a database."""
+        with sqlite3.connect(path) as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM documents"
+            ).fetchone()[0]
+
+    def test_tar_sink(self):
+        """Tests documents are appended to a tar archive"""
+        path = self.output_directory / "documents.tar"
+        with TarSink(path, batch_size=2) as sink:
+            sink.write("/data/s1/session.json", b"1")
+            self.assertFalse(path.exists())
+            sink.write("/data/s2/session.json", b"22")
+            sink.write("/data/s1/session.json", b"333")
+        self.assertEqual(str(path), sink.location)
+        with tarfile.open(path) as archive:
+            names = archive.getnames()
+            contents = archive.extractfile("data/s1/session.json").read()
+        self.assertEqual(
+            [
+                "data/s1/session.json",
+                "data/s2/session.json",
+                "data/s1/session.json",
+            ],
+            names,
+        )
+        self.assertEqual(b"333", contents)
+
+    def test_zip_sink(self):
+        """Tests documents are appended to a zip archive without warnings
+        about rewritten names"""
+        path = self.output_directory / "documents.zip"
+        with warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter("always")
+            with ZipSink(path) as sink:
+                sink.write("/data/s1/session.json", b"1")
+            with ZipSink(path) as sink:
+                sink.write("/data/s1/session.json", b"22")
+        self.assertEqual([], caught_warnings)
+        self.assertEqual(str(path), sink.location)
+        with zipfile.ZipFile(path) as archive:
+            names = archive.namelist()
+            contents = archive.read("data/s1/session.json")
+        self.assertEqual(["data/s1/session.json"] * 2, names)
+        self.assertEqual(b"22", contents)
+
+    @staticmethod
+    def _read_tar(path: Path) -> List[Tuple[str, bytes]]:
+        """Names and contents of the members of a tar archive"""
+        with tarfile.open(path) as archive:
+            return [
+                (member.name, archive.extractfile(member).read())
+                for member in archive.getmembers()
+            ]
+
+    @staticmethod
+    def _read_zip(path: Path) -> List[Tuple[str, bytes]]:
+        """Names and contents of the members of a zip archive"""
+        with zipfile.ZipFile(path) as archive:
+            return [(name, archive.read(name)) for name in archive.namelist()]
+
+    def test_archives_opened_once(self):
+        """Tests the archives are opened once for many batches and that
+        every document can be read back"""
+        documents = [(f"/data/s{i}/session.json", b"x" * i) for i in range(7)]
+        for sink_class, open_target, open_archive, read_archive in [
+            (TarSink, "tarfile.open", tarfile.open, self._read_tar),
+            (ZipSink, "zipfile.ZipFile", zipfile.ZipFile, self._read_zip),
+        ]:
+            path = self.output_directory / f"documents_{sink_class.__name__}"
+            with patch(open_target, wraps=open_archive) as mock_open:
+                with sink_class(path, batch_size=2) as sink:
+                    for name, contents in documents:
+                        sink.write(name, contents)
+            mock_open.assert_called_once()
+            self.assertEqual(
+                [(name.lstrip("/"), contents) for name, contents in documents],
+                read_archive(path),
+            )
+
+    @patch("tarfile.open")
+    def test_failed_batch_is_kept(self, mock_open: MagicMock):
+        """Tests documents stay buffered if writing their batch fails"""
+        mock_open.side_effect = [OSError("Disk full"), MagicMock()]
+        sink = TarSink(self.output_directory / "documents.tar")
+        sink.write("session.json", b"1")
+        with self.assertRaises(OSError):
+            sink.flush()
+        sink.flush()
+        self.assertEqual(2, mock_open.call_count)
+        self.assertEqual([], sink._batch)
+
+
+class TestSinksInProcessPools(unittest.TestCase):
+    """Tests sinks passed to the runners that send jobs to worker
+    processes"""
+
+    @staticmethod
+    def _run(runner: str, sink: BaseSink) -> List[JobResponse]:
+        """Run three jobs that write to sink with run_many or run_pipelined"""
+        settings = [
+            ExampleJobSettings(output_directory=Path(f"data/s{i}"))
+            for i in range(3)
+        ]
+        if runner == "run_many":
+            responses = ExampleEtl.run_many(
+                settings, workers=1, max_tasks_per_worker=None, sink=sink
+            )
+        else:
+            responses = run_pipelined(
+                ExampleEtl,
+                settings,
+                transform_workers=1,
+                max_tasks_per_worker=None,
+                sink=sink,
+            )
+        return list(responses)
+
+    def test_batch_sinks(self):
+        """Tests the documents of the workers are written to SQLite and tar
+        sinks by the parent process"""
+        expected_names = [f"data/s{i}/subject.json" for i in range(3)]
+        for runner in ["run_many", "run_pipelined"]:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                sqlite_path = Path(temp_dir) / "documents.db"
+                tar_path = Path(temp_dir) / "documents.tar"
+                with (
+                    SqliteSink(sqlite_path) as sqlite_sink,
+                    TarSink(tar_path) as tar_sink,
+                ):
+                    responses = self._run(runner, sqlite_sink)
+                    responses += self._run(runner, tar_sink)
+                with sqlite3.connect(sqlite_path) as connection:
+                    sqlite_names = [
+                        name
+                        for name, in connection.execute(
+                            "SELECT name FROM documents"
+                        )
+                    ]
+                with tarfile.open(tar_path) as archive:
+                    tar_names = archive.getnames()
+            with self.subTest(runner=runner):
+                self.assertEqual([200] * 6, [r.status_code for r in responses])
+                self.assertTrue(
+                    responses[0].message.startswith(
+                        f"Write model to {sqlite_path}"
+                    )
+                )
+                self.assertEqual(expected_names, sorted(sqlite_names))
+                self.assertEqual(expected_names, sorted(tar_names))
+
+    def test_sink_error(self):
+        """Tests a failed write in the parent process returns a 500"""
+        sink = MagicMock(spec=BaseSink, location="broken")
+        sink.write.side_effect = OSError("Disk full")
+        for runner in ["run_many", "run_pipelined"]:
+            with self.subTest(runner=runner):
+                responses = self._run(runner, sink)
+                self.assertEqual([500] * 3, [r.status_code for r in responses])
+                self.assertTrue(
+                    responses[0].message.startswith(
+                        "Error writing to broken: OSError('Disk full')"
+                    )
+                )
+                self.assertTrue(
+                    responses[0].message.endswith(
+                        "No validation errors detected."
+                    )
+                )
+
+    def test_directory_sink(self):
+        """Tests a directory sink is used by the workers themselves"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            responses = self._run("run_many", DirectorySink(temp_dir))
+            self.assertTrue(
+                Path(temp_dir, "data", "s2", "subject.json").exists()
+            )
+        self.assertEqual([200] * 3, [r.status_code for r in responses])
+
+    def test_collecting_sink(self):
+        """Tests the collecting sink keeps the documents"""
+        sink = CollectingSink("documents.db")
+        self.assertTrue(sink.write("session.json", b"1"))
+        self.assertEqual("documents.db", sink.location)
+        self.assertEqual([("session.json", b"1")], sink.documents)
+
+    def test_job_returns_collected_documents(self):
+        """Tests a job run with a collecting sink sends its documents back
+        with the response"""
+        job_response = _run_etl_job(
+            ExampleEtl,
+            ExampleJobSettings(output_directory=Path("data/s1")),
+            {"sink": CollectingSink("documents.db")},
+        )
+        self.assertEqual(200, job_response.status_code)
+        self.assertEqual(
+            ["data/s1/subject.json"],
+            [name for name, _ in job_response._documents],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
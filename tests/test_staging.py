@@ -0,0 +1,164 @@
+"""Tests the staging module."""
+
+import io
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
+
+from aind_metadata_mapper.cache import DiskCache, MemoryCache
+from aind_metadata_mapper.neuropixels import utils
+from aind_metadata_mapper.staging import (
+    StagedFile,
+    StagingStats,
+    input_file,
+    open_input,
+    read_input,
+    stage_inputs,
+)
+
+CONTENTS = bytes(range(256)) * 4
+
+
+class TestStaging(unittest.TestCase):
+    """Tests methods in the staging module."""
+
+    def setUp(self):
+        """Write an input file"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "input.bin"
+        self.path.write_bytes(CONTENTS)
+
+    def tearDown(self):
+        """Remove the input file"""
+        self.temp_dir.cleanup()
+
+    def test_staging_off(self):
+        """Tests inputs are read directly while staging is off"""
+        with stage_inputs(None) as stats:
+            self.assertIsNone(stats)
+            with open_input(self.path) as f:
+                self.assertIsInstance(f, io.BufferedReader)
+            with input_file(self.path) as f:
+                self.assertEqual(self.path, f)
+            self.assertEqual(CONTENTS, read_input(self.path))
+
+    def test_read_input(self):
+        """Tests files are fetched once in blocks and then read from the
+        cache"""
+        cache = MemoryCache()
+        with stage_inputs(cache, block_size=100) as stats:
+            self.assertEqual(CONTENTS, read_input(self.path))
+            self.assertEqual(
+                StagingStats(hits=0, misses=11, bytes_fetched=1024), stats
+            )
+            self.assertEqual(CONTENTS, read_input(str(self.path)))
+        self.assertEqual(
+            StagingStats(hits=11, misses=11, bytes_fetched=1024), stats
+        )
+        self.assertEqual(11, len(cache.entries()))
+        with stage_inputs(cache, block_size=100) as stats:
+            os.utime(self.path, ns=(0, 0))
+            self.assertEqual(CONTENTS, read_input(self.path))
+        self.assertEqual(11, stats.misses)
+
+    def test_missing_runs_fetched_together(self):
+        """Tests consecutive missing blocks are fetched with one read"""
+        with stage_inputs(DiskCache(self.temp_dir.name), block_size=100):
+            with open_input(self.path) as f:
+                f.seek(450)
+                self.assertEqual(CONTENTS[450:460], f.read(10))
+            with (
+                patch.object(
+                    StagedFile,
+                    "fetch",
+                    autospec=True,
+                    side_effect=StagedFile.fetch,
+                ) as mock_fetch,
+                open_input(self.path) as f,
+            ):
+                self.assertEqual(CONTENTS, f.read())
+        self.assertEqual(
+            [(0, 400), (500, 600)],
+            [call.args[1:] for call in mock_fetch.call_args_list],
+        )
+
+    def test_staged_file(self):
+        """Tests seeks and small reads of a staged file"""
+        with stage_inputs(MemoryCache(), block_size=100) as stats:
+            with open_input(self.path) as f:
+                self.assertTrue(f.readable() and f.seekable())
+                self.assertEqual(1000, f.seek(-24, io.SEEK_END))
+                self.assertEqual(CONTENTS[1000:], f.read(100))
+                self.assertEqual(b"", f.read(10))
+                self.assertEqual(b"", f.read())
+                self.assertEqual(0, f.seek(0))
+                chunks = []
+                while chunk := f.read(7):
+                    chunks.append(chunk)
+                self.assertEqual(CONTENTS, b"".join(chunks))
+                self.assertEqual(1024, f.tell())
+                self.assertEqual(90, f.seek(-934, io.SEEK_CUR))
+                self.assertEqual(CONTENTS[90:310], f.read(220))
+                with self.assertRaises(ValueError):
+                    f.seek(-1)
+                self.assertEqual(4, len(f._blocks))
+        self.assertEqual(11, stats.misses)
+        self.assertEqual(5, stats.hits)
+
+    def test_nested_stage_inputs(self):
+        """Tests an enclosing staging cache keeps serving the reads of a
+        nested one"""
+        outer_cache = MemoryCache()
+        with stage_inputs(outer_cache) as outer_stats:
+            with stage_inputs(MemoryCache()) as inner_stats:
+                read_input(self.path)
+        self.assertIsNone(inner_stats)
+        self.assertEqual(1, outer_stats.misses)
+        self.assertEqual(1, len(outer_cache.entries()))
+
+    def test_threads_stage_separately(self):
+        """Tests staging turned on in one thread does not affect the reads
+        of another"""
+        staged = threading.Event()
+        read = threading.Event()
+        opened = []
+
+        def read_in_other_thread():
+            """Open the input while the main thread is staging"""
+            staged.wait()
+            with open_input(self.path) as f:
+                opened.append(type(f))
+            read.set()
+
+        thread = threading.Thread(target=read_in_other_thread)
+        thread.start()
+        with stage_inputs(MemoryCache()) as stats:
+            staged.set()
+            read.wait()
+        thread.join()
+        self.assertEqual([io.BufferedReader], opened)
+        self.assertEqual(StagingStats(), stats)
+
+    def test_readers(self):
+        """Tests file readers work on staged files"""
+        tif_path = Path(self.temp_dir.name) / "vasculature.tif"
+        Image.new("L", (16, 16)).save(
+            tif_path, tiffinfo={306: "2024:02:12 09:00:00"}
+        )
+        xml_path = Path(self.temp_dir.name) / "settings.xml"
+        xml_path.write_text("<SETTINGS><INFO>1</INFO></SETTINGS>")
+        with stage_inputs(MemoryCache(), block_size=64) as stats:
+            with input_file(tif_path) as tif, Image.open(tif) as img:
+                self.assertEqual(("2024:02:12 09:00:00",), img.tag[306])
+            self.assertTrue(tif.closed)
+            self.assertEqual("INFO", utils.load_xml(xml_path)[0].tag)
+        self.assertGreater(stats.misses, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
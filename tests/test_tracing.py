@@ -0,0 +1,87 @@
+"""Tests the tracing module."""
+
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from aind_metadata_mapper import tracing
+from aind_metadata_mapper.neuropixels import utils
+from aind_metadata_mapper.tracing import span, trace_to
+
+
+class TestTracing(unittest.TestCase):
+    """Tests methods in the tracing module."""
+
+    def test_span_disabled(self):
+        """Tests spans are a shared no-op while tracing is off."""
+        self.assertIsNone(tracing._tracer)
+        self.assertIs(span("extract"), span("load", path=Path("a")))
+        with span("extract"):
+            pass
+
+    def test_trace_to(self):
+        """Tests spans of every thread are written to the trace file in the
+        Chrome trace event format."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            trace_path = Path(temp_dir) / "trace.json"
+            with trace_to(trace_path):
+                with span("outer", path=Path("a.xml"), size=3):
+                    with span("inner"):
+                        pass
+                thread = threading.Thread(target=self._run_span)
+                thread.start()
+                thread.join()
+            trace = json.loads(trace_path.read_text())
+        self.assertIsNone(tracing._tracer)
+        events = {event["name"]: event for event in trace["traceEvents"]}
+        self.assertEqual(["inner", "outer", "in_thread"], list(events))
+        self.assertEqual({"path": "a.xml", "size": 3}, events["outer"]["args"])
+        self.assertNotIn("args", events["inner"])
+        self.assertEqual("X", events["inner"]["ph"])
+        self.assertGreaterEqual(events["inner"]["ts"], events["outer"]["ts"])
+        self.assertGreaterEqual(events["outer"]["dur"], events["inner"]["dur"])
+        self.assertNotEqual(events["outer"]["tid"], events["in_thread"]["tid"])
+
+    @staticmethod
+    def _run_span():
+        """Record a span from another thread."""
+        with span("in_thread"):
+            pass
+
+    def test_nested_trace_to(self):
+        """Tests an enclosing trace keeps recording spans of a nested one,
+        which does not write its own file."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            outer_path = Path(temp_dir) / "outer.json"
+            inner_path = Path(temp_dir) / "inner.json"
+            with trace_to(outer_path):
+                with trace_to(inner_path), span("nested"):
+                    pass
+            with trace_to(None), span("untraced"):
+                pass
+            trace = json.loads(outer_path.read_text())
+            self.assertFalse(inner_path.exists())
+        self.assertEqual(
+            ["nested"], [event["name"] for event in trace["traceEvents"]]
+        )
+
+    def test_trace_error(self):
+        """Tests a span is recorded and the trace written when the body
+        raises."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            trace_path = Path(temp_dir) / "trace.json"
+            xml_path = Path(temp_dir) / "settings.xml"
+            xml_path.write_text("<SETTINGS>")
+            with self.assertRaises(Exception), trace_to(trace_path):
+                utils.load_xml(xml_path)
+            trace = json.loads(trace_path.read_text())
+        self.assertEqual(
+            [{"path": str(xml_path)}],
+            [event["args"] for event in trace["traceEvents"]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Tests writers module"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from aind_data_schema.core.subject import Subject
+
+from aind_metadata_mapper.writers import (
+    WriteMode,
+    atomic_write,
+    file_matches,
+    write_file,
+    write_model,
+)
+
+
+class TestWriters(unittest.TestCase):
+    """Tests methods in writers module"""
+
+    def setUp(self):
+        """Create a temporary directory to write to"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_directory = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        """Remove the temporary directory"""
+        self.temp_dir.cleanup()
+
+    def test_file_matches(self):
+        """Tests file_matches compares sizes and hashes"""
+        path = self.output_directory / "a.json"
+        self.assertFalse(file_matches(path, b"abc"))
+        path.write_bytes(b"abc")
+        self.assertTrue(file_matches(path, b"abc"))
+        self.assertFalse(file_matches(path, b"abcd"))
+        self.assertFalse(file_matches(path, b"abd"))
+
+    def test_atomic_write(self):
+        """Tests atomic_write replaces the file and leaves no temp files"""
+        path = self.output_directory / "a.json"
+        path.write_bytes(b"old")
+        atomic_write(path, b"new")
+        self.assertEqual(b"new", path.read_bytes())
+        self.assertEqual(["a.json"], os.listdir(self.output_directory))
+
+    @patch("os.replace")
+    def test_atomic_write_error(self, mock_replace: MagicMock):
+        """Tests atomic_write cleans up the temp file if the rename fails"""
+        mock_replace.side_effect = OSError("rename failed")
+        path = self.output_directory / "a.json"
+        path.write_bytes(b"old")
+        with self.assertRaises(OSError):
+            atomic_write(path, b"new")
+        self.assertEqual(b"old", path.read_bytes())
+        self.assertEqual(["a.json"], os.listdir(self.output_directory))
+
+    def test_write_file(self):
+        """Tests write_file in each write mode"""
+        path = self.output_directory / "a.json"
+        self.assertTrue(write_file(path, b"abc"))
+        self.assertTrue(write_file(path, b"abc"))
+        self.assertFalse(write_file(path, b"abc", WriteMode.SKIP_UNCHANGED))
+        self.assertTrue(write_file(path, b"abd", WriteMode.SKIP_UNCHANGED))
+        self.assertEqual(b"abd", path.read_bytes())
+
+    def test_write_model(self):
+        """Tests write_model writes the same contents as
+        write_standard_file and skips unchanged files"""
+        model = Subject.model_construct(subject_id="12345")
+        self.assertTrue(write_model(model, self.output_directory))
+        path = self.output_directory / "subject.json"
+        expected_contents = path.read_bytes()
+        modified_time = path.stat().st_mtime_ns
+        self.assertFalse(
+            write_model(model, self.output_directory, WriteMode.SKIP_UNCHANGED)
+        )
+        self.assertEqual(modified_time, path.stat().st_mtime_ns)
+        path.unlink()
+        self.assertTrue(
+            write_model(model, self.output_directory, WriteMode.SKIP_UNCHANGED)
+        )
+        self.assertEqual(expected_contents, path.read_bytes())
+
+
+if __name__ == "__main__":
+    unittest.main()